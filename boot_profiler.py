@@ -0,0 +1,123 @@
+import builtins
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+_original_import = builtins.__import__
+_hook_lock = threading.Lock()
+_hook_users = 0
+_active = threading.local()
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where it cannot be read cheaply."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS; better than nothing
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _profiling_import(name, globals=None, locals=None, fromlist=(), level=0):
+    recorder = getattr(_active, 'recorder', None)
+    # Only first-time imports are interesting; cached lookups would just add noise
+    if recorder is None or level != 0 or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    node = {"module": name, "children": []}
+    recorder.stack[-1]["children"].append(node)
+    recorder.stack.append(node)
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        node["cumulative_ms"] = (time.perf_counter() - started) * 1000
+        recorder.stack.pop()
+
+
+def _install_hook():
+    global _hook_users
+    with _hook_lock:
+        if _hook_users == 0:
+            builtins.__import__ = _profiling_import
+        _hook_users += 1
+
+
+def _remove_hook():
+    global _hook_users
+    with _hook_lock:
+        _hook_users -= 1
+        if _hook_users == 0:
+            builtins.__import__ = _original_import
+
+
+def _finalize(node: dict, min_ms: float) -> dict:
+    """Derives self time (as `-X importtime` reports it) and prunes cheap subtrees."""
+    children = node.pop("children")
+    child_total = sum(child["cumulative_ms"] for child in children)
+    node["self_ms"] = round(max(node["cumulative_ms"] - child_total, 0.0), 3)
+    node["cumulative_ms"] = round(node["cumulative_ms"], 3)
+    kept = [_finalize(child, min_ms) for child in children if child["cumulative_ms"] >= min_ms]
+    if kept:
+        node["imports"] = sorted(kept, key=lambda child: child["cumulative_ms"], reverse=True)
+    return node
+
+
+class ImportProfiler:
+    """Records wall time, an import-time tree, RSS delta and new module count for one import attempt.
+
+    Usage::
+
+        with ImportProfiler("netlazy.main") as profile:
+            importlib.import_module("netlazy.main")
+        report = profile.report
+
+    Only imports executed on the profiling thread are attributed, so lazy plugin
+    loads running in worker threads do not pollute each other's trees.
+    """
+
+    def __init__(self, entrypoint: str, min_ms: float = 1.0):
+        self.entrypoint = entrypoint
+        self.min_ms = min_ms
+        self.report: Optional[dict] = None
+        self.stack = []
+
+    def __enter__(self):
+        self._root = {"module": self.entrypoint, "children": []}
+        self.stack = [self._root]
+        self._modules_before = len(sys.modules)
+        self._rss_before = _current_rss_bytes()
+        self._previous = getattr(_active, 'recorder', None)
+        _active.recorder = self
+        _install_hook()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_ms = (time.perf_counter() - self._started) * 1000
+        _remove_hook()
+        _active.recorder = self._previous
+
+        rss_after = _current_rss_bytes()
+        self._root["cumulative_ms"] = wall_ms
+        self.report = {
+            "entrypoint": self.entrypoint,
+            "wall_ms": round(wall_ms, 3),
+            "modules_loaded": len(sys.modules) - self._modules_before,
+            "rss_delta_bytes": (
+                rss_after - self._rss_before
+                if rss_after is not None and self._rss_before is not None else None
+            ),
+            "succeeded": exc_type is None,
+            "import_tree": _finalize(self._root, self.min_ms),
+        }
+        return False
@@ -6,14 +6,23 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from motor.motor_asyncio import AsyncIOMotorClient
 
+try:
+    from mongo_registry import mongo_registry as hub_mongo_registry
+except ImportError:
+    hub_mongo_registry = None
+
 router = APIRouter()
 BASE_DIR = Path(__file__).parent
 templates = Jinja2Templates(directory=BASE_DIR / 'templates')
 
 # Подключение к MongoDB (аналогично другим микросервисам)
 MONGO_URL = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL, tls=True, tlsAllowInvalidCertificates=True)
-db = client['evenfest']
+if hub_mongo_registry is not None and hub_mongo_registry.managed:
+    # Hosted by the hub: reuse its pooled client instead of opening another TLS pool
+    db = hub_mongo_registry.get_database('evenfest', 'evenfest')
+else:
+    client = AsyncIOMotorClient(MONGO_URL, tls=True, tlsAllowInvalidCertificates=True)
+    db = client['evenfest']
 config_collection = db['config']
 
 
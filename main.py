@@ -1,28 +1,63 @@
+import asyncio
 import importlib
+import inspect
 import logging
 import re
-from datetime import datetime
+import sys
+from datetime import date, datetime, timedelta
 from os import environ
 from pathlib import Path
 from collections import OrderedDict
+from typing import Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, JSONResponse, Response
-from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel
 
+from boot_profiler import ImportProfiler
+from mongo_registry import mongo_registry
+from path_classifier import API, STATIC, SUSPICIOUS, PathClassifier
+from rate_limit import MongoTokenBucketStore, RateLimiter, RateLimitMiddleware, ShardedTokenBucketStore, parse_policies
+from shared_state import MongoSharedState, SharedCounter, shared_state
+from static_assets import PrecompressedStaticFiles
+from visitor_stats import VisitorSketchStore
+from visitor_tracking import PersistentVisitorFilter, VisitorWriteBehindBuffer
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-MONGO_URL = environ.get('MONGODB_URI', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL, tls=True, tlsAllowInvalidCertificates=True)
-stats_db = client['main-page']
+# The hub owns one pooled client per connection profile; plugins pick it up through the registry
+mongo_registry.managed = True
+stats_db = mongo_registry.get_database('hub', 'main-page')
+
+def _configured_workers() -> int:
+    """Worker count from the environment or the server's command line.
+
+    `uvicorn --workers N` does not export WEB_CONCURRENCY, but its workers (spawned) and
+    gunicorn's (forked) inherit the master's argv, so the flag is visible in every worker.
+    """
+    workers = max(int(environ.get('WEB_CONCURRENCY', '1')), int(environ.get('UVICORN_WORKERS', '1')))
+    args = sys.argv[1:]
+    for i, arg in enumerate(args):
+        value = None
+        if arg.startswith('--workers='):
+            value = arg.split('=', 1)[1]
+        elif arg in ('--workers', '-w') and i + 1 < len(args):
+            value = args[i + 1]
+        if value and value.isdigit():
+            workers = max(workers, int(value))
+    return workers
+
+# Counters, small caches and capacity slots that must agree across uvicorn workers.
+# "auto" switches to MongoDB as soon as more than one worker is configured.
+SHARED_STATE_BACKEND = environ.get('SHARED_STATE_BACKEND', 'auto').strip().lower()
+if SHARED_STATE_BACKEND == 'mongo' or (SHARED_STATE_BACKEND == 'auto' and _configured_workers() > 1):
+    shared_state.use(MongoSharedState(stats_db.stats, stats_db.shared_state))
 
 app = FastAPI(title="Nargan's Projects Ecosystem")
 
@@ -50,6 +85,52 @@ class ReverseProxySchemeMiddleware:
                     break
         await self.app(scope, receive, send)
 
+# --- Raw ASGI Shim for Lazily Mounted Plugins ---
+class LazyPluginMiddleware:
+    """Imports and mounts a registered plugin on the first request under one of its prefixes.
+
+    Concurrent first requests share a single load task; once the router is included
+    the request continues through the regular routing table.
+    """
+    def __init__(self, app):
+        self.app = app
+        self._loading = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and lazy_plugins:
+            plugin_name = _match_lazy_plugin(scope.get("path", ""))
+            if plugin_name:
+                task = self._loading.get(plugin_name)
+                if task is None:
+                    task = self._loading[plugin_name] = asyncio.create_task(_load_lazy_plugin(plugin_name))
+                # Shield so a disconnecting first client does not cancel the load for everyone else
+                await asyncio.shield(task)
+        await self.app(scope, receive, send)
+
+# --- Edge Token-Bucket Rate Limiting (per client IP, per prefix policy) ---
+# Format: "<prefix>=<tokens_per_second>:<burst>,..."; the longest matching prefix wins
+RATE_LIMIT_POLICIES = environ.get(
+    'RATE_LIMIT_POLICIES',
+    '/=20:100,/formular/api=1:10,/toadcode/api/proxy-zip=0.2:3,/yellow-mirror/ws=0.1:3'
+)
+_local_buckets = ShardedTokenBucketStore()
+rate_limiter = RateLimiter(
+    parse_policies(RATE_LIMIT_POLICIES),
+    MongoTokenBucketStore(stats_db.rate_limits, fallback=_local_buckets)
+    if environ.get('RATE_LIMIT_STORE', 'memory').lower() == 'mongo' else _local_buckets
+)
+
+# Added innermost-first: the proxy middleware normalizes the path, the limiter sheds
+# abusive clients, and only then may a lazily registered plugin be imported
+app.add_middleware(LazyPluginMiddleware)
+if environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        # The peers whose X-Forwarded-For is believed; start.sh hands uvicorn the same list, so by the
+        # time this runs an untrusted client's forged header has already been ignored
+        trusted_proxies=[ip.strip() for ip in environ.get('TRUSTED_PROXY_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+    )
 app.add_middleware(ReverseProxySchemeMiddleware)
 
 # --- Security/CORS Configuration for Capacitor (Mobile Wrapper) ---
@@ -66,71 +147,211 @@ BASE_DIR = Path(__file__).parent
 templates = Jinja2Templates(directory=BASE_DIR)
 
 # --- Safe Static Mounting ---
+# Compressed variants of plugin assets are built on first request and cached on disk
+STATIC_CACHE_DIR = environ.get('STATIC_CACHE_DIR') or None
+
 def mount_if_exists(path: str, name: str, dir_path: Path):
     if dir_path.exists() and dir_path.is_dir():
         logger.info(f"Mounting static files from {dir_path} at {path}")
-        app.mount(path, StaticFiles(directory=dir_path), name=name)
+        app.mount(path, PrecompressedStaticFiles(directory=dir_path, cache_dir=STATIC_CACHE_DIR), name=name)
     else:
         logger.warning(f"Static directory not found or invalid: {dir_path}")
 
+# --- 404 Path Classification (plugins may extend the suspicious patterns) ---
+SUSPICIOUS_PATH_PATTERNS = [
+    ".env", ".git", ".yml", ".yaml", ".ini", ".conf", 
+    "wp-admin", "wp-login", "xmlrpc", "wp-content",
+    "actuator", "cgi-bin", "etc/passwd", "bin/sh",
+    "phpinfo", "setup.php", "install.php", "config.php",
+    "mysql", "phpmyadmin", "pma", "jenkins", "confluence"
+]
+STATIC_EXTENSIONS = {
+    ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", 
+    ".ico", ".xml", ".woff", ".woff2", ".ttf", ".mp4", ".webm"
+}
+path_classifier = PathClassifier(STATIC_EXTENSIONS)
+path_classifier.register_patterns(SUSPICIOUS_PATH_PATTERNS)
+
 # --- Dynamic Plugin Discovery (Resilient Monolith) ---
 loaded_plugins = {}
 shutdown_callbacks = []
 
-logger.info("Starting dynamic plugin discovery...")
-for plugin_dir in BASE_DIR.iterdir():
-    if not plugin_dir.is_dir() or plugin_dir.name.startswith(('.', '__')):
-        continue
+# 'eager' imports every plugin at boot; 'lazy' only registers them and imports on first request
+PLUGIN_LOAD_MODE = environ.get('PLUGIN_LOAD_MODE', 'eager').lower()
+lazy_plugins = {}
 
-    plugin_name = plugin_dir.name
-    
+# Per-plugin boot instrumentation; a budget of 0 disables enforcement
+PLUGIN_BOOT_BUDGET_MS = float(environ.get('PLUGIN_BOOT_BUDGET_MS', '0'))
+PLUGIN_BOOT_BUDGET_ACTION = environ.get('PLUGIN_BOOT_BUDGET_ACTION', 'warn').lower()
+plugin_boot_reports = {}
+
+def _potential_entrypoints(plugin_name: str) -> list:
     # Smart Fallback List: Added `plugin_name` to check __init__.py directly
-    potential_entrypoints = [
+    return [
         f"{plugin_name}.main",
         f"{plugin_name}.{plugin_name}",
         f"{plugin_name}.router",
         f"{plugin_name}"
     ]
-    
-    mounted = False
+
+def _import_plugin(plugin_name: str):
+    """Tries every fallback entrypoint and returns (module, entrypoint, errors)."""
     plugin_errors = {}
-    
-    for entrypoint in potential_entrypoints:
-        try:
-            logger.info(f"Attempting to load plugin: {plugin_name} via {entrypoint}")
-            plugin_module = importlib.import_module(entrypoint)
-            
-            # Check for router contract
-            if hasattr(plugin_module, "router"):
-                # 1. Mount statics FIRST to prevent catch-all routes from intercepting static files
-                mount_if_exists(f'/{plugin_name}/static', f'{plugin_name}_static', plugin_dir / 'static')
-                mount_if_exists(f'/{plugin_name}/scripts', f'{plugin_name}_scripts', plugin_dir / 'scripts')
-
-                # 2. Include the router
-                prefix = f"/{plugin_name.replace('_', '-')}"
-                app.include_router(plugin_module.router, prefix=prefix, tags=[plugin_name.capitalize()])
-                
-                # Check for shutdown hook contract
-                if hasattr(plugin_module, "shutdown_clients"):
-                    shutdown_callbacks.append(plugin_module.shutdown_clients)
-                    
-                loaded_plugins[plugin_name] = {"status": "online", "entrypoint": entrypoint}
-                logger.info(f"Successfully mounted plugin: {plugin_name} at {prefix}")
-                mounted = True
-                break  # Stop searching once successfully mounted
-            else:
+    attempts = []
+    plugin_boot_reports[plugin_name] = {"attempts": attempts}
+    try:
+        for entrypoint in _potential_entrypoints(plugin_name):
+            profiler = ImportProfiler(entrypoint)
+            try:
+                logger.info(f"Attempting to load plugin: {plugin_name} via {entrypoint}")
+                with profiler:
+                    plugin_module = importlib.import_module(entrypoint)
+
+                # Check for router contract
+                if hasattr(plugin_module, "router"):
+                    return plugin_module, entrypoint, plugin_errors
                 plugin_errors[entrypoint] = "Module loaded but missing 'router' attribute."
-                
-        except Exception as e:
-            # Record the error and try the next potential entrypoint
-            plugin_errors[entrypoint] = str(e)
-            
-    if not mounted:
-        if plugin_errors:
-            logger.error(f"Gracefully degraded plugin {plugin_name}. Failed to load valid router. Errors: {plugin_errors}")
-            loaded_plugins[plugin_name] = {"status": "offline", "errors": plugin_errors}
+
+            except Exception as e:
+                # Record the error and try the next potential entrypoint
+                plugin_errors[entrypoint] = str(e)
+            finally:
+                if profiler.report:
+                    attempts.append(profiler.report)
+        return None, None, plugin_errors
+    finally:
+        _summarize_boot(plugin_name)
+
+def _summarize_boot(plugin_name: str):
+    report = plugin_boot_reports[plugin_name]
+    attempts = report["attempts"]
+    report["wall_ms"] = round(sum(a["wall_ms"] for a in attempts), 3)
+    report["modules_loaded"] = sum(a["modules_loaded"] for a in attempts)
+    rss_deltas = [a["rss_delta_bytes"] for a in attempts if a["rss_delta_bytes"] is not None]
+    report["rss_delta_bytes"] = sum(rss_deltas) if rss_deltas else None
+    report["over_budget"] = bool(PLUGIN_BOOT_BUDGET_MS) and report["wall_ms"] > PLUGIN_BOOT_BUDGET_MS
+
+    logger.info(
+        f"Plugin {plugin_name} boot: {report['wall_ms']:.1f}ms, "
+        f"{report['modules_loaded']} modules, RSS delta {report['rss_delta_bytes']} bytes"
+    )
+    if report["over_budget"]:
+        logger.warning(f"Plugin {plugin_name} exceeded its boot budget ({report['wall_ms']:.1f}ms > {PLUGIN_BOOT_BUDGET_MS:.1f}ms)")
+
+def _within_boot_budget(plugin_name: str, plugin_errors: dict) -> bool:
+    """False when the plugin blew its boot budget and the configured action is to fail it."""
+    report = plugin_boot_reports.get(plugin_name, {})
+    if report.get("over_budget") and PLUGIN_BOOT_BUDGET_ACTION == 'fail':
+        plugin_errors["boot_budget"] = f"Boot took {report['wall_ms']:.1f}ms, budget is {PLUGIN_BOOT_BUDGET_MS:.1f}ms"
+        return False
+    return True
+
+def _mount_plugin(plugin_name: str, plugin_dir: Path, plugin_module, entrypoint: str):
+    # 1. Mount statics FIRST to prevent catch-all routes from intercepting static files
+    mount_if_exists(f'/{plugin_name}/static', f'{plugin_name}_static', plugin_dir / 'static')
+    mount_if_exists(f'/{plugin_name}/scripts', f'{plugin_name}_scripts', plugin_dir / 'scripts')
+
+    # 2. Include the router
+    prefix = f"/{plugin_name.replace('_', '-')}"
+    app.include_router(plugin_module.router, prefix=prefix, tags=[plugin_name.capitalize()])
+
+    # Check for shutdown hook contract
+    if hasattr(plugin_module, "shutdown_clients"):
+        shutdown_callbacks.append(plugin_module.shutdown_clients)
+
+    # Check for scanner-pattern contract
+    if hasattr(plugin_module, "SUSPICIOUS_PATH_PATTERNS"):
+        path_classifier.register_patterns(plugin_module.SUSPICIOUS_PATH_PATTERNS, source=plugin_name)
+
+    loaded_plugins[plugin_name] = {"status": "online", "entrypoint": entrypoint}
+    logger.info(f"Successfully mounted plugin: {plugin_name} at {prefix}")
+
+def _record_plugin_failure(plugin_name: str, plugin_errors: dict):
+    if plugin_errors:
+        logger.error(f"Gracefully degraded plugin {plugin_name}. Failed to load valid router. Errors: {plugin_errors}")
+        loaded_plugins[plugin_name] = {"status": "offline", "errors": plugin_errors}
+    else:
+        loaded_plugins[plugin_name] = {"status": "ignored"}
+
+def _register_lazy_plugin(plugin_name: str, plugin_dir: Path):
+    """Records the plugin and the URL prefixes that should trigger its import, without importing it."""
+    candidate_files = {
+        f"{plugin_name}.main": plugin_dir / 'main.py',
+        f"{plugin_name}.{plugin_name}": plugin_dir / f'{plugin_name}.py',
+        f"{plugin_name}.router": plugin_dir / 'router.py',
+        f"{plugin_name}": plugin_dir / '__init__.py'
+    }
+    entrypoint = next((ep for ep, file in candidate_files.items() if file.exists()), None)
+    if entrypoint is None:
+        loaded_plugins[plugin_name] = {"status": "ignored"}
+        return
+
+    lazy_plugins[plugin_name] = {
+        "dir": plugin_dir,
+        "prefixes": (f"/{plugin_name.replace('_', '-')}", f"/{plugin_name}")
+    }
+    loaded_plugins[plugin_name] = {"status": "registered", "entrypoint": entrypoint}
+
+def _match_lazy_plugin(path: str):
+    for plugin_name, info in lazy_plugins.items():
+        for prefix in info["prefixes"]:
+            if path == prefix or path.startswith(prefix + "/"):
+                return plugin_name
+    return None
+
+async def _call_hook(handler):
+    result = handler()
+    if inspect.isawaitable(result):
+        await result
+
+async def _start_lazy_plugin(plugin_module):
+    """Runs the router's startup hooks, which the app fired before this plugin was mounted.
+
+    Its shutdown hooks join `shutdown_callbacks` so they run before the shared Mongo
+    clients are closed, rather than after the hub's own shutdown handler.
+    """
+    router = plugin_module.router
+    for handler in list(router.on_startup):
+        if handler in app.router.on_startup:
+            app.router.on_startup.remove(handler)
+        await _call_hook(handler)
+    for handler in list(router.on_shutdown):
+        if handler in app.router.on_shutdown:
+            app.router.on_shutdown.remove(handler)
+        shutdown_callbacks.append(handler)
+
+async def _load_lazy_plugin(plugin_name: str):
+    info = lazy_plugins[plugin_name]
+    loaded_plugins[plugin_name] = {**loaded_plugins[plugin_name], "status": "loading"}
+    try:
+        # Heavy imports run off the event loop so the hub keeps serving while a plugin boots
+        plugin_module, entrypoint, plugin_errors = await asyncio.to_thread(_import_plugin, plugin_name)
+        if plugin_module is not None and _within_boot_budget(plugin_name, plugin_errors):
+            _mount_plugin(plugin_name, info["dir"], plugin_module, entrypoint)
+            await _start_lazy_plugin(plugin_module)
         else:
-            loaded_plugins[plugin_name] = {"status": "ignored"}
+            _record_plugin_failure(plugin_name, plugin_errors)
+    except Exception as e:
+        _record_plugin_failure(plugin_name, {plugin_name: str(e)})
+    finally:
+        lazy_plugins.pop(plugin_name, None)
+
+logger.info(f"Starting dynamic plugin discovery ({PLUGIN_LOAD_MODE} mode)...")
+for plugin_dir in BASE_DIR.iterdir():
+    if not plugin_dir.is_dir() or plugin_dir.name.startswith(('.', '__')):
+        continue
+
+    plugin_name = plugin_dir.name
+
+    if PLUGIN_LOAD_MODE == 'lazy':
+        _register_lazy_plugin(plugin_name, plugin_dir)
+        continue
+
+    plugin_module, entrypoint, plugin_errors = _import_plugin(plugin_name)
+    if plugin_module is not None and _within_boot_budget(plugin_name, plugin_errors):
+        _mount_plugin(plugin_name, plugin_dir, plugin_module, entrypoint)
+    else:
+        _record_plugin_failure(plugin_name, plugin_errors)
 
 # --- Root Logic ---
 class BaseModelLimit(BaseModel):
@@ -156,119 +377,201 @@ class LRUSet:
         if len(self.cache) > self.capacity:
             self.cache.popitem(last=False)
 
+# Per-worker front cache only: a miss falls through to idempotent upserts, so workers never double count
 seen_visitors = LRUSet(capacity=10000)
-TOTAL_VISITORS = 0
+# The `unique_visitors` stats document is the counter; each worker keeps a periodically refreshed view
+visitor_total = SharedCounter(
+    shared_state,
+    'unique_visitors',
+    refresh_interval=float(environ.get('VISITOR_TOTAL_REFRESH_INTERVAL', '5'))
+)
+
+
+def _count_new_visitors(new_visitors: int):
+    visitor_total.bump(new_visitors)
+
+# --- Write-Behind Visitor Pipeline ---
+visitor_buffer = VisitorWriteBehindBuffer(
+    stats_db.visitors,
+    stats_db.stats,
+    max_batch=int(environ.get('TRACK_FLUSH_BATCH', '500')),
+    flush_interval=float(environ.get('TRACK_FLUSH_INTERVAL', '2.0')),
+    on_new_visitors=_count_new_visitors,
+    max_pending=int(environ.get('TRACK_MAX_PENDING', '100000')),
+    probable_interval=float(environ.get('TRACK_RETURNING_FLUSH_INTERVAL', '300'))
+)
+
+# --- Probabilistic Filter of Every Visitor Ever Seen (fronts the LRU misses) ---
+visitor_filter = PersistentVisitorFilter(
+    stats_db.visitors,
+    stats_db.stats,
+    capacity=int(environ.get('VISITOR_FILTER_CAPACITY', '2000000')),
+    error_rate=float(environ.get('VISITOR_FILTER_ERROR_RATE', '0.001')),
+    snapshot_interval=float(environ.get('VISITOR_FILTER_SNAPSHOT_INTERVAL', '300'))
+)
+
+# --- Mergeable HyperLogLog Sketches per Day and Plugin ---
+visitor_sketches = VisitorSketchStore(
+    stats_db.visitor_sketches,
+    flush_interval=float(environ.get('VISITOR_SKETCH_FLUSH_INTERVAL', '30'))
+)
 
 
 @app.get('/api/status')
-async def get_system_status():
+async def get_system_status(verbose: bool = False):
     """Endpoint for the frontend to determine which projects successfully booted."""
-    return JSONResponse(content={"plugins": loaded_plugins})
+    content = {
+        "plugins": loaded_plugins,
+        "tracking": {**visitor_buffer.metrics(), "filter": visitor_filter.metrics()}
+    }
+    if verbose:
+        content["boot"] = {
+            "budget_ms": PLUGIN_BOOT_BUDGET_MS or None,
+            "budget_action": PLUGIN_BOOT_BUDGET_ACTION,
+            "plugins": plugin_boot_reports
+        }
+        content["mongo"] = mongo_registry.stats()
+        content["not_found"] = path_classifier.metrics()
+        content["rate_limit"] = rate_limiter.metrics()
+        content["shared_state"] = {"backend": type(shared_state.backend).__name__}
+    return JSONResponse(content=content)
 
 class TrackRequest(BaseModel):
     uuid: str
+    plugin: Optional[str] = None
+
+
+@app.get('/api/stats')
+async def get_visitor_stats(start: Optional[str] = None, end: Optional[str] = None, plugin: Optional[str] = None, breakdown: bool = False):
+    """Approximate unique visitors over an inclusive UTC day range (defaults to the last 7 days)."""
+    try:
+        end_day = date.fromisoformat(end) if end else datetime.utcnow().date()
+        start_day = date.fromisoformat(start) if start else end_day - timedelta(days=6)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format")
+
+    if plugin is not None and plugin not in loaded_plugins:
+        # Not a 404: the catch-all 404 handler would replace the detail with the HTML page
+        raise HTTPException(status_code=400, detail="Unknown plugin")
+    scope = plugin or VisitorSketchStore.GLOBAL_SCOPE
+
+    try:
+        content = {
+            "start": start_day.isoformat(),
+            "end": end_day.isoformat(),
+            "scope": scope,
+            "unique_visitors": await visitor_sketches.count(start_day, end_day, scope),
+            "total_visitors": visitor_total.value
+        }
+        if breakdown:
+            content["days"] = await visitor_sketches.count_per_day(start_day, end_day, scope)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(content=content)
 
 
 @app.on_event('shutdown')
 async def shutdown_event():
+    # Drain buffered visitors before plugins tear down their clients
+    await visitor_total.stop()
+    try:
+        await visitor_buffer.stop()
+    except Exception as e:
+        logger.error(f"Error flushing visitor buffer on shutdown: {e}")
+    try:
+        await visitor_filter.stop()
+    except Exception as e:
+        logger.error(f"Error snapshotting visitor filter on shutdown: {e}")
+    try:
+        await visitor_sketches.stop()
+    except Exception as e:
+        logger.error(f"Error flushing visitor sketches on shutdown: {e}")
+
     for callback in shutdown_callbacks:
         try:
-            await callback()
+            await _call_hook(callback)
         except Exception as e:
             logger.error(f"Error executing shutdown callback: {e}")
 
+    # Shared clients are closed once, after every plugin has finished with them
+    await mongo_registry.close_all()
+
 @app.get('/', response_class=HTMLResponse)
 async def home(request: Request):
     return FileResponse(BASE_DIR / 'index.html')
 
 # --- Lifecycle & Database ---
 async def init_counter():
-    global TOTAL_VISITORS
     # Ensure the document exists
     await stats_db.stats.update_one({'_id': 'unique_visitors'}, {'$setOnInsert': {'count': 0}}, upsert=True)
     # Pre-load the total count into RAM
     counter_doc = await stats_db.stats.find_one({'_id': 'unique_visitors'})
     if counter_doc:
-        TOTAL_VISITORS = counter_doc.get('count', 0)
+        visitor_total.value = counter_doc.get('count', 0)
 
 @app.on_event('startup')
 async def startup_event():
     await init_counter()
+    try:
+        await visitor_filter.load()
+    except Exception as e:
+        logger.error(f"Visitor filter unavailable, falling back to LRU only: {e}")
+    visitor_filter.start()
+    visitor_buffer.start()
+    visitor_sketches.start()
+    visitor_total.start()
 
 # --- Optimized Tracking Endpoint ---
 @app.post('/api/track')
 async def track_visitor(request: Request, payload: TrackRequest):
-    global TOTAL_VISITORS
-    
+    # 0. Cardinality sketches count every hit (re-adding a UUID is idempotent), before any short-circuit
+    scopes = [VisitorSketchStore.GLOBAL_SCOPE]
+    if payload.plugin and payload.plugin in loaded_plugins:
+        scopes.append(payload.plugin)
+    visitor_sketches.add(payload.uuid, scopes)
+
     # 1. RAM Cache Check: 0ms response, 0 DB queries for returning active users
     if payload.uuid in seen_visitors:
-        return {'count': TOTAL_VISITORS}
-        
+        return {'count': visitor_total.value}
+
     # 2. Extract advanced identifying metrics (IP and Browser)
     # X-Forwarded-For handles standard reverse proxies/Docker routing
     client_ip = request.headers.get("X-Forwarded-For", request.client.host).split(",")[0].strip()
     user_agent = request.headers.get("user-agent", "unknown")
+
+    # 2b. Bloom filter of the full history: returning visitors that fell out of the LRU skip the fast path.
+    # A hit can be a false positive, so the buffer still upserts it, batched on a slower cadence
+    if payload.uuid in visitor_filter:
+        seen_visitors.add(payload.uuid)
+        visitor_buffer.enqueue_probable(payload.uuid, client_ip, user_agent)
+        return {'count': visitor_total.value}
+
+    # 3. Hand the record to the write-behind buffer; it is persisted in the next bulk flush
+    visitor_buffer.enqueue(payload.uuid, client_ip, user_agent)
     
-    # 3. Perform a single database operation for unknown users
-    result = await stats_db.visitors.update_one(
-        {'_id': payload.uuid},
-        {
-            '$setOnInsert': {
-                '_id': payload.uuid, 
-                'first_seen': datetime.utcnow(),
-                'ip_address': client_ip,
-                'user_agent': user_agent
-            },
-            '$set': {
-                'last_seen': datetime.utcnow()
-            }
-        },
-        upsert=True
-    )
-    
-    # Add to in-memory cache so they don't hit the DB again today
+    # Add to in-memory caches so they don't hit the DB again, today or after a restart
     seen_visitors.add(payload.uuid)
+    visitor_filter.add(payload.uuid)
     
-    # 4. If they were genuinely new to the database, increment global counter
-    if result.upserted_id is not None:
-        TOTAL_VISITORS += 1
-        # Fire-and-forget DB update (doesn't block the client response)
-        await stats_db.stats.update_one({'_id': 'unique_visitors'}, {'$inc': {'count': 1}})
-        
-    return {'count': TOTAL_VISITORS}
+    # 4. The global counter is advanced by the buffer once the flush reports new upserts
+    return {'count': visitor_total.value}
 
 # --- Refined 404 Exception Handler ---
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
-    path = request.url.path
-    
+    # One cached, precompiled classification instead of rescanning every pattern per 404
+    category = path_classifier.classify(request.url.path)
+
     # 1. Block requests for common bot scanning targets instantly to save CPU/logs
-    suspicious_patterns = [
-        ".env", ".git", ".yml", ".yaml", ".ini", ".conf", 
-        "wp-admin", "wp-login", "xmlrpc", "wp-content",
-        "actuator", "cgi-bin", "etc/passwd", "bin/sh",
-        "phpinfo", "setup.php", "install.php", "config.php",
-        "mysql", "phpmyadmin", "pma", "jenkins", "confluence"
-    ]
-    if any(pattern in path.lower() for pattern in suspicious_patterns):
+    if category == SUSPICIOUS:
         return Response(status_code=404, content="Not Found", media_type="text/plain")
 
-    # 2. Extract path segments to check if the destination is an API endpoint
-    path_segments = [seg.lower() for seg in path.split("/") if seg]
-    is_api = "api" in path_segments or path.startswith("/api") or path.endswith(".json")
-    
-    if is_api:
+    # 2. API destinations get a JSON body
+    if category == API:
         return JSONResponse(status_code=404, content={"detail": "Not Found"})
 
     # 3. Prevent redirecting static assets or client scripts
-    static_extensions = {
-        ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", 
-        ".ico", ".xml", ".woff", ".woff2", ".ttf", ".mp4", ".webm"
-    }
-    is_static_ext = any(path.endswith(ext) for ext in static_extensions)
-    is_static_path = "static" in path_segments or "scripts" in path_segments
-
-    if is_static_ext or is_static_path:
+    if category == STATIC:
         return Response(status_code=404, content="Not Found", media_type="text/plain")
         
     # 4. Clean redirect for HTML-requesting browsers
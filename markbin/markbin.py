@@ -12,14 +12,23 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel
 from pymongo.errors import DuplicateKeyError
 
+try:
+    from mongo_registry import mongo_registry as hub_mongo_registry
+except ImportError:
+    hub_mongo_registry = None
+
 router = APIRouter()
 
 BASE_DIR = Path(__file__).parent
 templates = Jinja2Templates(directory=BASE_DIR)
 
 MONGO_URL = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL, tls=True, tlsAllowInvalidCertificates=True)
-db = client.markbins
+if hub_mongo_registry is not None and hub_mongo_registry.managed:
+    # Hosted by the hub: reuse its pooled client instead of opening another TLS pool
+    db = hub_mongo_registry.get_database('markbin', 'markbins')
+else:
+    client = AsyncIOMotorClient(MONGO_URL, tls=True, tlsAllowInvalidCertificates=True)
+    db = client.markbins
 codes_collection = db.docs
 
 class DocRequest(BaseModel):
@@ -0,0 +1,174 @@
+import logging
+import threading
+from collections import Counter
+from os import environ
+from typing import Dict, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.monitoring import ConnectionPoolListener
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return environ.get(name, default).strip().lower() in ('1', 'true', 'yes')
+
+
+# Pool and timeout options: (client option, environment suffix, hub default)
+_POOL_OPTIONS = (
+    ('maxPoolSize', 'MAX_POOL_SIZE', '50'),
+    ('minPoolSize', 'MIN_POOL_SIZE', '0'),
+    ('maxIdleTimeMS', 'MAX_IDLE_TIME_MS', '300000'),
+    ('serverSelectionTimeoutMS', 'SERVER_SELECTION_TIMEOUT_MS', '10000'),
+    ('connectTimeoutMS', 'CONNECT_TIMEOUT_MS', '10000'),
+)
+
+
+def _default_client_options() -> dict:
+    return {
+        'tls': _env_flag('MONGO_TLS', 'true'),
+        'tlsAllowInvalidCertificates': _env_flag('MONGO_TLS_ALLOW_INVALID_CERTIFICATES', 'true'),
+        **{option: int(environ.get(f'MONGO_{suffix}', default)) for option, suffix, default in _POOL_OPTIONS},
+    }
+
+
+def _plugin_client_options(plugin: str) -> dict:
+    """Per-plugin pool tuning from the environment, e.g. MONGO_NETLAZY_MAX_POOL_SIZE=100."""
+    prefix = f"MONGO_{plugin.upper().replace('-', '_')}_"
+    return {
+        option: int(environ[prefix + suffix])
+        for option, suffix, _ in _POOL_OPTIONS if environ.get(prefix + suffix, '').strip()
+    }
+
+
+class _PoolStatsListener(ConnectionPoolListener):
+    """Aggregates pymongo connection pool events into monotonic counters and live gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def _bump(self, key: str, delta: int = 1):
+        with self._lock:
+            self.counters[key] += delta
+
+    def pool_created(self, event):
+        self._bump('pools_created')
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump('pools_cleared')
+
+    def pool_closed(self, event):
+        self._bump('pools_closed')
+
+    def connection_created(self, event):
+        self._bump('connections_created')
+        self._bump('open_connections')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump('connections_closed')
+        self._bump('open_connections', -1)
+
+    def connection_check_out_started(self, event):
+        self._bump('checkouts_started')
+
+    def connection_check_out_failed(self, event):
+        self._bump('checkouts_failed')
+
+    def connection_checked_out(self, event):
+        self._bump('checked_out')
+        self._bump('in_use', 1)
+
+    def connection_checked_in(self, event):
+        self._bump('checked_in')
+        self._bump('in_use', -1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+class MongoClientRegistry:
+    """Hub-wide owner of Motor clients so plugins share TLS sessions and connection pools.
+
+    Plugins ask for a database by name and get the client for their final options:
+    the hub's environment defaults, then the overrides the plugin passes (URI, TLS),
+    then `MONGO_<PLUGIN>_*` pool and timeout settings. Clients are keyed by those
+    merged options, so a plugin whose settings equal the hub's shares the hub's pool
+    and only a real difference costs another client. The root coordinator sets
+    `managed` and closes every client on shutdown; plugins booted standalone keep
+    constructing their own clients.
+    """
+
+    def __init__(self, uri: Optional[str] = None):
+        self.uri = uri or environ.get('MONGODB_URI', 'mongodb://localhost:27017')
+        self.managed = False
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple, Tuple[AsyncIOMotorClient, _PoolStatsListener]] = {}
+        self._plugins: Dict[str, dict] = {}
+
+    def get_client(self, plugin: str, uri: Optional[str] = None, **client_overrides) -> AsyncIOMotorClient:
+        uri = uri or self.uri
+        options = {**_default_client_options(), **client_overrides, **_plugin_client_options(plugin)}
+        key = (uri, tuple(sorted(options.items())))
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                listener = _PoolStatsListener()
+                client = AsyncIOMotorClient(uri, event_listeners=[listener], **options)
+                entry = self._clients[key] = (client, listener)
+                logger.info(f"Created pooled MongoDB client #{len(self._clients)} for {plugin} (overrides: {self._describe(key) or 'none'})")
+            self._plugins.setdefault(plugin, {})["client"] = key
+        return entry[0]
+
+    def _describe(self, key: Tuple) -> dict:
+        """How a client differs from the hub default, without credentials."""
+        uri, options = key
+        defaults = _default_client_options()
+        overrides = {name: value for name, value in options if defaults.get(name) != value}
+        if uri != self.uri:
+            # Never report credentials embedded in a connection string
+            overrides['uri'] = '<custom>'
+        return overrides
+
+    def get_database(self, plugin: str, db_name: str, read_preference=None, uri: Optional[str] = None, **client_overrides):
+        client = self.get_client(plugin, uri=uri, **client_overrides)
+        with self._lock:
+            self._plugins[plugin]["database"] = db_name
+        if read_preference is not None:
+            return client.get_database(db_name, read_preference=read_preference)
+        return client[db_name]
+
+    async def close_all(self) -> None:
+        with self._lock:
+            entries, self._clients = list(self._clients.values()), {}
+        for client, _ in entries:
+            try:
+                client.close()
+            except Exception as e:
+                logger.error(f"Error closing pooled MongoDB client: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            clients = list(self._clients.items())
+            plugins = {name: dict(info) for name, info in self._plugins.items()}
+        report = []
+        for key, (client, listener) in clients:
+            report.append({
+                "overrides": self._describe(key),
+                "plugins": sorted(name for name, info in plugins.items() if info.get("client") == key),
+                "pool": listener.snapshot(),
+            })
+        return {
+            "clients": report,
+            "plugins": {name: info.get("database") for name, info in plugins.items()},
+        }
+
+
+mongo_registry = MongoClientRegistry()
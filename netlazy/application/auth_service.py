@@ -1,15 +1,17 @@
 import time
 from datetime import datetime, timezone
-from typing import Tuple
+from typing import Optional, Tuple
 
 from netlazy.domain.models import User, UserAlreadyExistsError
 from netlazy.domain.repository import (
-    ChainRepository, NonceRepository, UserRepository, ProfileRepository, HandshakeRepository, HybridCryptoPort,
-    TransactionManager, SignatureVerificationError, HashChainDesyncError
+    ChainRepository, UserRepository, ProfileRepository, HandshakeRepository, HybridCryptoPort,
+    TransactionManager, SignatureVerificationError, HashChainDesyncError, SignatureVerifierPort
 )
-from netlazy.domain.chain import compute_genesis_anchor, compute_next_anchor, build_identity_payload
+from netlazy.domain.chain import RatchetOutcome, compute_genesis_anchor, compute_next_anchor, build_identity_payload
 
 TIMESTAMP_TOLERANCE_SECONDS = 120
+# Nonces must outlive the whole timestamp window on both sides of the server clock
+NONCE_RETENTION_SECONDS = 300
 
 class AuthenticationError(Exception):
     pass
@@ -19,15 +21,15 @@ class AuthService:
         self, 
         user_repo: UserRepository, 
         chain_repo: ChainRepository,
-        nonce_repo: NonceRepository, 
         crypto_port: HybridCryptoPort, 
-        transaction_manager: TransactionManager
+        transaction_manager: TransactionManager,
+        signature_verifier: Optional[SignatureVerifierPort] = None
     ):
         self._user_repo = user_repo
         self._chain_repo = chain_repo
-        self._nonce_repo = nonce_repo
         self._crypto_port = crypto_port
         self._transaction_manager = transaction_manager
+        self._signature_verifier = signature_verifier
 
     async def register_user(self, ed25519_pem: str, mldsa_hex: str, ip: str = None, fingerprint: str = None) -> Tuple[User, str]:
         user_id = self._crypto_port.derive_user_id(ed25519_pem, mldsa_hex)
@@ -56,6 +58,7 @@ class AuthService:
         handshake_repo: HandshakeRepository
     ) -> Tuple[str, str]:
         new_user_id = self._crypto_port.derive_user_id(new_ed25519_pem, new_mldsa_hex)
+        retired_keys = []
 
         async def _transaction_callback(session):
             existing_user = await self._user_repo.get_by_id(new_user_id, session=session)
@@ -66,6 +69,8 @@ class AuthService:
             known_ips = old_user.known_ips if old_user else []
             known_fingerprints = old_user.known_fingerprints if old_user else []
             score = old_user.risk_score if old_user else 0.0
+            if old_user:
+                retired_keys[:] = [old_user.ed25519_public_pem, old_user.mldsa_public_hex]
 
             new_user = User(
                 user_id=new_user_id,
@@ -86,7 +91,6 @@ class AuthService:
                 await profile_repo.delete(old_user_id, session=session)
 
             await handshake_repo.delete_for_user(old_user_id, session=session)
-            await self._nonce_repo.delete_for_user(old_user_id, session=session)
             await self._chain_repo.delete_for_user(old_user_id, session=session)
             await self._user_repo.delete(old_user_id, session=session)
             
@@ -96,7 +100,13 @@ class AuthService:
 
             return new_user_id, genesis_anchor
 
-        return await self._transaction_manager.execute_in_transaction(_transaction_callback)
+        result = await self._transaction_manager.execute_in_transaction(_transaction_callback)
+        # A concurrent read may have re-cached the old identity before the commit landed
+        await self._user_repo.invalidate(old_user_id)
+        await handshake_repo.invalidate_interactions(old_user_id)
+        if retired_keys:
+            self._crypto_port.discard_public_keys(*retired_keys)
+        return result
 
     async def authenticate_identity(
         self, user_id: str, timestamp: int, nonce: str, body_hash: str, method: str, path: str, ed_sig: bytes, pq_sig: bytes
@@ -105,15 +115,11 @@ class AuthService:
         user = await self._validate_basics(user_id, timestamp)
         payload = build_identity_payload(method, path, timestamp, nonce, body_hash)
         
-        self._crypto_port.verify_hybrid_signature(
-            user.ed25519_public_pem, user.mldsa_public_hex, payload, ed_sig, pq_sig
-        )
+        await self._verify_signature(user, payload, ed_sig, pq_sig)
 
-        is_fresh = await self._nonce_repo.insert_if_not_exists(user_id, nonce)
-        if not is_fresh:
+        anchors = await self._chain_repo.consume_nonce(user_id, nonce, NONCE_RETENTION_SECONDS)
+        if anchors is None:
             raise AuthenticationError("Nonce already used")
-        
-        anchors = await self._chain_repo.get_recent_anchors(user_id)
         if not anchors:
             raise AuthenticationError("Chain broken")
         return anchors[-1]
@@ -136,28 +142,26 @@ class AuthService:
 
         # 1. Verify Hybrid Signature
         try:
-            self._crypto_port.verify_hybrid_signature(
-                user.ed25519_public_pem, user.mldsa_public_hex, canonical_payload, ed25519_signature, mldsa_signature
-            )
+            await self._verify_signature(user, canonical_payload, ed25519_signature, mldsa_signature)
         except SignatureVerificationError:
             raise AuthenticationError("Hybrid signature verification failed")
 
-        # 2. Consume Nonce post-signature
-        is_fresh = await self._nonce_repo.insert_if_not_exists(user_id, nonce)
-        if not is_fresh:
+        # 2. Consume the nonce and advance the ratchet in one conditional write (post-signature)
+        next_anchor = compute_next_anchor(prev_anchor, user_id, method, path, body_hash, nonce, timestamp)
+        outcome = await self._chain_repo.advance(user_id, prev_anchor, next_anchor, nonce, NONCE_RETENTION_SECONDS)
+        if outcome is RatchetOutcome.NONCE_REUSED:
             raise AuthenticationError("Nonce already used")
-
-        # 3. Trace Continuity
-        recent_anchors = await self._chain_repo.get_recent_anchors(user_id)
-        if prev_anchor not in recent_anchors:
+        if outcome is not RatchetOutcome.ADVANCED:
             raise HashChainDesyncError("Execution trace broken or outdated")
 
-        # 3. Advance the Ratchet
-        next_anchor = compute_next_anchor(prev_anchor, user_id, method, path, body_hash, nonce, timestamp)
-        await self._chain_repo.push_anchor(user_id, next_anchor)
-
         return user, next_anchor
 
+    async def _verify_signature(self, user: User, payload: bytes, ed_sig: bytes, pq_sig: bytes) -> None:
+        if self._signature_verifier is not None:
+            await self._signature_verifier.verify(user.ed25519_public_pem, user.mldsa_public_hex, payload, ed_sig, pq_sig)
+        else:
+            self._crypto_port.verify_hybrid_signature(user.ed25519_public_pem, user.mldsa_public_hex, payload, ed_sig, pq_sig)
+
     async def _validate_basics(self, user_id: str, timestamp: int) -> User:
         current_time = int(time.time())
         if abs(current_time - timestamp) > TIMESTAMP_TOLERANCE_SECONDS:
@@ -174,5 +178,4 @@ class AuthService:
 
     async def delete_user(self, user_id: str) -> None:
         await self._user_repo.delete(user_id)
-        await self._nonce_repo.delete_for_user(user_id)
         await self._chain_repo.delete_for_user(user_id)
\ No newline at end of file
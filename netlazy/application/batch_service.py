@@ -0,0 +1,79 @@
+from typing import List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from netlazy.application.inbox_service import InboxService
+from netlazy.application.profile_service import ProfileService
+from netlazy.domain.models import Contact
+from netlazy.domain.repository import TransactionManager
+
+PROFILE_UPDATE = "profile.update"
+HANDSHAKE_RESOLVE = "handshake.resolve"
+HANDSHAKE_READ = "handshake.read"
+
+
+class BatchOperationError(Exception):
+    def __init__(self, index: int, op: str, cause: Exception):
+        self.index = index
+        self.op = op
+        self.cause = cause
+        super().__init__(f"Operation {index} ({op}) failed: {cause}")
+
+
+class BatchService:
+    """Applies a signed envelope of operations atomically: all of them commit or none do."""
+
+    def __init__(self, transaction_manager: TransactionManager, profile_service: ProfileService, inbox_service: InboxService):
+        self._transaction_manager = transaction_manager
+        self._profile_service = profile_service
+        self._inbox_service = inbox_service
+
+    async def execute(self, user_id: str, operations: List[dict]) -> List[dict]:
+        current: List[Optional[Tuple[int, str]]] = [None]
+
+        async def _transaction_callback(session):
+            results = []
+            for index, operation in enumerate(operations):
+                current[0] = (index, operation.get("op", "unknown"))
+                results.append(await self._apply(user_id, operation, session))
+            current[0] = None
+            return results
+
+        try:
+            return await self._transaction_manager.execute_in_transaction(_transaction_callback)
+        except PyMongoError:
+            # Errors must leave the callback untouched so the driver can read their retry labels
+            raise
+        except Exception as e:
+            if current[0] is None:
+                raise
+            index, op = current[0]
+            raise BatchOperationError(index, op, e) from e
+
+    async def _apply(self, user_id: str, operation: dict, session) -> dict:
+        op = operation["op"]
+        if op == PROFILE_UPDATE:
+            profile = await self._profile_service.update_profile(
+                user_id=user_id,
+                bio=operation.get("bio", ""),
+                tags=operation.get("tags", []),
+                contacts=[Contact(**c) for c in operation.get("contacts", [])],
+                session=session
+            )
+            return {"op": op, "user_id": profile.user_id}
+
+        if op == HANDSHAKE_RESOLVE:
+            h = await self._inbox_service.resolve_handshake(
+                user_id=user_id,
+                handshake_id=operation["handshake_id"],
+                status=operation["status"],
+                returned_contact=operation.get("returned_contact"),
+                session=session
+            )
+            return {"op": op, "handshake_id": h.id, "status": h.status}
+
+        if op == HANDSHAKE_READ:
+            h = await self._inbox_service.mark_as_read(user_id, operation["handshake_id"], session=session)
+            return {"op": op, "handshake_id": h.id, "is_read": h.is_read}
+
+        raise ValueError(f"Unsupported operation '{op}'")
@@ -1,16 +1,63 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
-from netlazy.domain.models import Profile
-from netlazy.domain.repository import HandshakeRepository, ProfileRepository
+from typing import Callable, List, Optional
+from netlazy.domain.models import FeedPage, Profile
+from netlazy.domain.repository import FeedSessionPort, HandshakeRepository, ProfileRepository
+
+PageRenderer = Callable[[List[Profile]], bytes]
+
+
+class _Prefetch:
+    __slots__ = ("key", "task", "expires_at")
+
+    def __init__(self, key: tuple, task: asyncio.Task, expires_at: float):
+        self.key = key
+        self.task = task
+        self.expires_at = expires_at
+
 
 class FeedService:
-    def __init__(self, profile_repo: ProfileRepository, handshake_repo: HandshakeRepository):
+    def __init__(self, profile_repo: ProfileRepository, handshake_repo: HandshakeRepository, feed_sessions: Optional[FeedSessionPort] = None, prefetch_ttl_seconds: float = 0.0, max_prefetched: int = 5000):
         self._profile_repo = profile_repo
         self._handshake_repo = handshake_repo
+        self._feed_sessions = feed_sessions
+        self._prefetch_ttl = prefetch_ttl_seconds
+        self._max_prefetched = max_prefetched
+        # One upcoming page per viewer: (cursor, filters) it was built for, and the task building it
+        self._prefetched: "OrderedDict[str, _Prefetch]" = OrderedDict()
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
+        self.prefetch_errors = 0
+
+    async def get_feed(self, viewer_id: str, seen_ids: List[str], requires: List[str], excludes: List[str], bonus: List[str], abonus: List[str], limit: int = 20, cursor: Optional[str] = None, render: Optional[PageRenderer] = None) -> FeedPage:
+        """One feed page; with `render`, also its response body and a prefetch of the page after it."""
+        session_seen: List[str] = []
+        if self._feed_sessions is not None:
+            token, session_seen = await self._feed_sessions.resume(viewer_id, cursor)
+        else:
+            token = None
+
+        key = (token, tuple(requires), tuple(excludes), tuple(bonus), tuple(abonus), limit)
+        page = None
+        if token is not None and token == cursor:
+            page = await self._take_prefetched(viewer_id, key)
+        if page is None:
+            # seen_ids is only sent by clients that predate feed sessions
+            profiles = await self._build_page(viewer_id, list(set(seen_ids).union(session_seen)), requires, excludes, bonus, abonus, limit)
+            page = FeedPage(profiles=profiles, cursor=token, body=render(profiles) if render else None)
 
-    async def get_feed(self, viewer_id: str, seen_ids: List[str], requires: List[str], excludes: List[str], bonus: List[str], abonus: List[str], limit: int = 20) -> List[Profile]:
+        if token is not None:
+            await self._feed_sessions.record(token, [p.user_id for p in page.profiles])
+            if render is not None and not seen_ids and len(page.profiles) == limit:
+                self._schedule_prefetch(viewer_id, key, render)
+        return page
+
+    async def _build_page(self, viewer_id: str, seen_ids: List[str], requires: List[str], excludes: List[str], bonus: List[str], abonus: List[str], limit: int) -> List[Profile]:
         interacted_ids = await self._handshake_repo.get_interacted_user_ids(viewer_id)
-        all_excludes = list(set(interacted_ids + seen_ids))
+        all_excludes = list(set(interacted_ids).union(seen_ids))
         return await self._profile_repo.get_feed(
             viewer_id=viewer_id,
             exclude_ids=all_excludes,
@@ -19,4 +66,59 @@ class FeedService:
             bonus=bonus,
             abonus=abonus,
             limit=limit
-        )
\ No newline at end of file
+        )
+
+    def _schedule_prefetch(self, viewer_id: str, key: tuple, render: PageRenderer) -> None:
+        if self._prefetch_ttl <= 0:
+            return
+        self._drop_prefetched(viewer_id)
+        task = asyncio.create_task(self._prefetch(viewer_id, key, render))
+        self._prefetched[viewer_id] = _Prefetch(key, task, time.monotonic() + self._prefetch_ttl)
+        while len(self._prefetched) > self._max_prefetched:
+            _, oldest = self._prefetched.popitem(last=False)
+            oldest.task.cancel()
+
+    async def _prefetch(self, viewer_id: str, key: tuple, render: PageRenderer) -> Optional[FeedPage]:
+        token, requires, excludes, bonus, abonus, limit = key
+        try:
+            # The session already holds the page just served, so this is the next one
+            seen = await self._feed_sessions.seen(token)
+            if seen is None:
+                return None
+            profiles = await self._build_page(viewer_id, seen, list(requires), list(excludes), list(bonus), list(abonus), limit)
+            return FeedPage(profiles=profiles, cursor=token, body=render(profiles))
+        except Exception as e:
+            self.prefetch_errors += 1
+            logging.warning(f"[netlazy] Feed prefetch for {viewer_id} failed: {e}")
+            return None
+
+    async def _take_prefetched(self, viewer_id: str, key: tuple) -> Optional[FeedPage]:
+        entry = self._prefetched.get(viewer_id)
+        if entry is None or entry.key != key or entry.expires_at <= time.monotonic():
+            self._drop_prefetched(viewer_id)
+            self.prefetch_misses += 1
+            return None
+        del self._prefetched[viewer_id]
+        # Still running means the client scrolled faster than we built; waiting beats starting over
+        page = await asyncio.shield(entry.task)
+        if page is None:
+            self.prefetch_misses += 1
+            return None
+        self.prefetch_hits += 1
+        return page
+
+    def _drop_prefetched(self, viewer_id: str) -> None:
+        entry = self._prefetched.pop(viewer_id, None)
+        if entry is not None:
+            entry.task.cancel()
+
+    def prefetch_metrics(self) -> dict:
+        served = self.prefetch_hits + self.prefetch_misses
+        return {
+            "enabled": self._prefetch_ttl > 0,
+            "pending": len(self._prefetched),
+            "hits": self.prefetch_hits,
+            "misses": self.prefetch_misses,
+            "hit_ratio": round(self.prefetch_hits / served, 4) if served else None,
+            "errors": self.prefetch_errors,
+        }
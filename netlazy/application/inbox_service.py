@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from typing import List, Tuple
+from typing import Any, List, Tuple
 from netlazy.domain.models import Handshake, Profile
 from netlazy.domain.repository import HandshakeRepository, ProfileRepository, UserRepository
 
@@ -76,8 +76,10 @@ class InboxService:
         await self._handshake_repo.create(h)
         return h
 
-    async def resolve_handshake(self, user_id: str, handshake_id: str, status: str, returned_contact: str = None) -> Handshake:
-        h = await self._handshake_repo.get_by_id(handshake_id)
+    async def resolve_handshake(
+        self, user_id: str, handshake_id: str, status: str, returned_contact: str = None, session: Any = None
+    ) -> Handshake:
+        h = await self._handshake_repo.get_by_id(handshake_id, session=session)
         if not h:
             raise HandshakeNotFoundError("Handshake not found")
         if h.receiver_id != user_id:
@@ -106,11 +108,11 @@ class InboxService:
             h.receiver_deleted = True
 
         h.updated_at = datetime.now(timezone.utc)
-        await self._handshake_repo.update(h)
+        await self._handshake_repo.update(h, session=session)
         return h
 
-    async def mark_as_read(self, user_id: str, handshake_id: str) -> Handshake:
-        h = await self._handshake_repo.get_by_id(handshake_id)
+    async def mark_as_read(self, user_id: str, handshake_id: str, session: Any = None) -> Handshake:
+        h = await self._handshake_repo.get_by_id(handshake_id, session=session)
         if not h:
             raise HandshakeNotFoundError("Handshake not found")
         if h.receiver_id != user_id and h.sender_id != user_id:
@@ -122,7 +124,7 @@ class InboxService:
             h.is_read = True
             
         h.updated_at = datetime.now(timezone.utc)
-        await self._handshake_repo.update(h)
+        await self._handshake_repo.update(h, session=session)
         return h
 
     async def get_inbox(self, user_id: str) -> List[Tuple[Handshake, Profile]]:
@@ -2,7 +2,7 @@ import asyncio
 import hashlib
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, List
 from netlazy.domain.models import Contact, MediaItem, Profile
 from netlazy.domain.repository import (
     MediaStorage, ProfileRepository, TagRepository, MediaProcessorPort,
@@ -64,26 +64,28 @@ class ProfileService:
         self._audio_bitrate = audio_bitrate
         self._locks = _LockManager()
 
-    async def get_or_create_profile(self, user_id: str) -> Profile:
-        profile = await self._profile_repo.get_by_user_id(user_id)
+    async def get_or_create_profile(self, user_id: str, session: Any = None) -> Profile:
+        profile = await self._profile_repo.get_by_user_id(user_id, session=session)
         if profile:
             return profile
         return Profile(user_id=user_id, media_id=user_id)
 
-    async def update_profile(self, user_id: str, bio: str, tags: List[str], contacts: List[Contact]) -> Profile:
+    async def update_profile(
+        self, user_id: str, bio: str, tags: List[str], contacts: List[Contact], session: Any = None
+    ) -> Profile:
         valid_names = set(await self._tag_repo.get_all_names())
         unknown = [t for t in tags if t not in valid_names]
         if unknown:
             raise InvalidTagError(unknown)
 
         async with self._locks.acquire(user_id):
-            profile = await self.get_or_create_profile(user_id)
+            profile = await self.get_or_create_profile(user_id, session=session)
             profile.bio = bio[: self._max_bio_length]
             profile.tags = tags
             profile.contacts = contacts
             profile.updated_at = datetime.now(timezone.utc)
 
-            await self._profile_repo.upsert(profile)
+            await self._profile_repo.upsert(profile, session=session)
             return profile
 
     async def upload_media(self, user_id: str, raw_bytes: bytes, blur: bool = False) -> Profile:
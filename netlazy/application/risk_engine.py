@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from netlazy.domain.repository import GeoLocatorPort, UserRepository
+from netlazy.domain.risk import (
+    RiskThresholds, score_entropy, score_request_rate, score_travel, shannon_entropy_ratio
+)
+
+LOW_ENTROPY_CUTOFF = 0.05
+ENTROPY_MIN_PAYLOAD = 256
+ENTROPY_SAMPLE_BYTES = 8192
+
+
+class _UserState:
+    __slots__ = ("requests", "last_ip", "last_seen")
+
+    def __init__(self, max_requests: int):
+        self.requests: deque = deque(maxlen=max_requests)
+        self.last_ip: Optional[str] = None
+        self.last_seen: Optional[int] = None
+
+
+class RiskEngine:
+    """Scores signed requests from in-process state and writes penalties in batches.
+
+    Each user's recent request times live in a bounded deque, giving a sliding-window
+    rate without any query. The previous IP is also tracked in memory; only the first
+    request a worker sees for a user asks `get_last_activity`, and only when a GeoIP
+    locator is configured. Penalties accumulate per user and are written with one
+    `increment_risk_scores` call per `flush_interval`, after which users at or above the
+    ban threshold are handed to `on_threshold`.
+    """
+
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        thresholds: RiskThresholds = RiskThresholds(),
+        geo_locator: Optional[GeoLocatorPort] = None,
+        rate_window_seconds: float = 10.0,
+        flush_interval: float = 2.0,
+        max_tracked_users: int = 100_000
+    ):
+        self._user_repo = user_repo
+        self._thresholds = thresholds
+        self._geo = geo_locator
+        self._window = rate_window_seconds
+        self._flush_interval = flush_interval
+        self._max_tracked_users = max_tracked_users
+        # Enough slots to see a rate well past the limit without growing per flooding client
+        self._max_window_requests = max(8, int(thresholds.max_requests_per_second * rate_window_seconds * 4))
+        self._users: "OrderedDict[str, _UserState]" = OrderedDict()
+        self._pending: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._on_threshold: Optional[Callable[[str], Awaitable[None]]] = None
+        self.flushes = 0
+        self.flushed_users = 0
+        self.flush_errors = 0
+
+    def _state(self, user_id: str) -> Tuple[_UserState, bool]:
+        state = self._users.get(user_id)
+        if state is not None:
+            self._users.move_to_end(user_id)
+            return state, False
+        state = _UserState(self._max_window_requests)
+        self._users[user_id] = state
+        while len(self._users) > self._max_tracked_users:
+            self._users.popitem(last=False)
+        return state, True
+
+    def _request_rate(self, state: _UserState, now: float) -> float:
+        state.requests.append(now)
+        while state.requests and state.requests[0] <= now - self._window:
+            state.requests.popleft()
+        if len(state.requests) == state.requests.maxlen:
+            # Window saturated: the deque spans less than `_window`, so measure over what it covers
+            return len(state.requests) / max(now - state.requests[0], 1e-3)
+        return len(state.requests) / self._window
+
+    async def score(self, user_id: str, ip: str, payload: bytes, current_time: int) -> float:
+        state, is_new = self._state(user_id)
+        penalty = score_request_rate(self._request_rate(state, time.monotonic()), self._thresholds)
+
+        if payload and len(payload) >= ENTROPY_MIN_PAYLOAD:
+            ratio = await asyncio.to_thread(shannon_entropy_ratio, payload[:ENTROPY_SAMPLE_BYTES])
+            if ratio < LOW_ENTROPY_CUTOFF:
+                penalty += score_entropy(ratio, self._thresholds)
+
+        if self._geo is not None and ip:
+            if is_new:
+                state.last_ip, state.last_seen = await self._user_repo.get_last_activity(user_id)
+            if state.last_ip and state.last_seen is not None and state.last_ip != ip:
+                penalty += score_travel(
+                    self._geo.locate(state.last_ip), self._geo.locate(ip),
+                    current_time - state.last_seen, self._thresholds
+                )
+        if ip:
+            state.last_ip, state.last_seen = ip, current_time
+        return penalty
+
+    def queue(self, user_id: str, penalty: float) -> None:
+        if penalty > 0:
+            self._pending[user_id] = self._pending.get(user_id, 0.0) + penalty
+
+    async def flush(self) -> List[str]:
+        """Writes queued penalties and returns the users whose score reached the ban threshold."""
+        if not self._pending:
+            return []
+        pending, self._pending = self._pending, {}
+        try:
+            scores = await self._user_repo.increment_risk_scores(pending)
+        except Exception:
+            # Keep the penalties for the next attempt rather than forgiving them
+            for user_id, delta in pending.items():
+                self.queue(user_id, delta)
+            raise
+        self.flushes += 1
+        self.flushed_users += len(pending)
+        return [user_id for user_id, score in scores.items() if score >= self._thresholds.ban_threshold]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self._flush_and_escalate()
+
+    async def _flush_and_escalate(self) -> None:
+        try:
+            over_threshold = await self.flush()
+        except Exception as e:
+            self.flush_errors += 1
+            logging.warning(f"[netlazy] Risk score flush failed: {e}")
+            return
+        for user_id in over_threshold:
+            if self._on_threshold is None:
+                continue
+            try:
+                await self._on_threshold(user_id)
+            except Exception as e:
+                logging.error(f"[netlazy] Automatic ban of {user_id} failed: {e}")
+
+    def start(self, on_threshold: Callable[[str], Awaitable[None]]) -> None:
+        self._on_threshold = on_threshold
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._flush_and_escalate()
+
+    def metrics(self) -> dict:
+        return {
+            "tracked_users": len(self._users),
+            "pending_users": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_users": self.flushed_users,
+            "flush_errors": self.flush_errors,
+            "geoip": self._geo is not None,
+        }
@@ -4,8 +4,10 @@ import uuid
 import time
 from typing import Optional
 
-from netlazy.domain.models import PoWChallenge
-from netlazy.domain.repository import SecurityRepository, UserRepository
+from netlazy.application.risk_engine import RiskEngine
+from netlazy.domain.models import BanReport, PoWChallenge
+from netlazy.domain.pow import AdaptiveDifficulty
+from netlazy.domain.repository import ChallengeIssuerPort, SecurityRepository, UserRepository
 from netlazy.domain.risk import RiskThresholds, score_entropy, shannon_entropy_ratio
 
 class BannedError(Exception):
@@ -20,20 +22,49 @@ class SecurityService:
         security_repo: SecurityRepository, 
         user_repo: UserRepository, 
         difficulty: int,
-        risk_thresholds: RiskThresholds = RiskThresholds()
+        risk_thresholds: RiskThresholds = RiskThresholds(),
+        max_cascade_accounts: int = 500,
+        challenge_issuer: Optional[ChallengeIssuerPort] = None,
+        difficulty_controller: Optional[AdaptiveDifficulty] = None,
+        risk_engine: Optional[RiskEngine] = None
     ):
         self._security_repo = security_repo
         self._user_repo = user_repo
         self._difficulty = difficulty
         self._thresholds = risk_thresholds
+        self._max_cascade_accounts = max_cascade_accounts
+        self._challenge_issuer = challenge_issuer
+        self._difficulty_controller = difficulty_controller
+        self._risk_engine = risk_engine
 
-    async def generate_challenge(self) -> dict:
-        challenge = PoWChallenge(id=uuid.uuid4().hex, difficulty=self._difficulty)
-        await self._security_repo.create_challenge(challenge)
+    async def generate_challenge(self, client_ip: str = "", fingerprint: Optional[str] = None) -> dict:
+        difficulty = self._difficulty
+        if self._difficulty_controller is not None:
+            difficulty = self._difficulty_controller.on_challenge(client_ip, fingerprint)
+
+        if self._challenge_issuer is not None:
+            challenge = self._challenge_issuer.issue(difficulty, client_ip or "")
+        else:
+            challenge = PoWChallenge(id=uuid.uuid4().hex, difficulty=difficulty)
+            await self._security_repo.create_challenge(challenge)
         return {"challenge_id": challenge.id, "difficulty": challenge.difficulty}
 
-    async def verify_pow(self, challenge_id: str, nonce: str) -> None:
-        challenge = await self._security_repo.consume_challenge(challenge_id)
+    async def verify_pow(
+        self, challenge_id: str, nonce: str, client_ip: str = "", fingerprint: Optional[str] = None
+    ) -> None:
+        try:
+            await self._check_pow(challenge_id, nonce, client_ip)
+        except ProofOfWorkError:
+            if self._difficulty_controller is not None:
+                self._difficulty_controller.note_failure(client_ip, fingerprint)
+            raise
+
+    async def _check_pow(self, challenge_id: str, nonce: str, client_ip: str) -> None:
+        if self._challenge_issuer is not None:
+            # Signed tokens are checked in memory; only a correct solution is recorded as spent
+            challenge = self._challenge_issuer.open(challenge_id, client_ip or "")
+        else:
+            challenge = await self._security_repo.consume_challenge(challenge_id)
         if not challenge:
             raise ProofOfWorkError("Challenge expired, invalid, or already consumed.")
         
@@ -44,26 +75,75 @@ class SecurityService:
         if not result_hash.startswith(target_prefix):
             raise ProofOfWorkError("Invalid Proof of Work solution.")
 
+        if self._challenge_issuer is not None and not await self._challenge_issuer.mark_spent(challenge.id):
+            raise ProofOfWorkError("Challenge expired, invalid, or already consumed.")
+
     async def verify_not_banned(self, ip: str, fingerprint: str, user_id: Optional[str] = None) -> None:
         if await self._security_repo.is_banned(ip, fingerprint, user_id):
-            if user_id:
+            # A ban on the account itself is final; the (possibly cached) user record only
+            # excuses accounts that merely share a banned IP or fingerprint
+            if user_id and not await self._security_repo.is_banned("", "", user_id):
                 user = await self._user_repo.get_by_id(user_id)
                 if user and not user.is_banned:
                     return
             raise BannedError("Access denied by security policy.")
 
-    async def cascade_ban_user(self, user_id: str) -> None:
+    async def cascade_ban_user(self, user_id: str, depth: int = 0) -> BanReport:
+        """Bans the user's account and footprints in one bulk write.
+
+        With `depth > 0` the ban also follows shared IPs and fingerprints to linked
+        accounts, one hop per level, stopping after `max_cascade_accounts` accounts.
+        """
+        # Footprints recorded by other workers may be missing from a cached copy
+        await self._user_repo.invalidate(user_id)
         user = await self._user_repo.get_by_id(user_id)
         if not user:
             raise ValueError("User not found")
-            
-        await self._security_repo.apply_bans(
-            ips=user.known_ips,
-            fingerprints=user.known_fingerprints,
-            user_id=user.user_id
+
+        user_ids = [user.user_id]
+        ips = dict.fromkeys(user.known_ips)
+        fingerprints = dict.fromkeys(user.known_fingerprints)
+        frontier_ips, frontier_fps = list(ips), list(fingerprints)
+
+        level = 0
+        while level < depth and (frontier_ips or frontier_fps):
+            remaining = self._max_cascade_accounts - len(user_ids)
+            if remaining <= 0:
+                break
+            linked = await self._user_repo.find_linked(frontier_ips, frontier_fps, list(user_ids), remaining)
+            if not linked:
+                break
+            level += 1
+            frontier_ips, frontier_fps = [], []
+            for other in linked:
+                user_ids.append(other.user_id)
+                for ip in other.known_ips:
+                    if ip not in ips:
+                        ips[ip] = None
+                        frontier_ips.append(ip)
+                for fp in other.known_fingerprints:
+                    if fp not in fingerprints:
+                        fingerprints[fp] = None
+                        frontier_fps.append(fp)
+
+        report = await self._security_repo.apply_bans(
+            ips=list(ips),
+            fingerprints=list(fingerprints),
+            user_ids=user_ids
         )
+        report.depth = level
+        return report
 
     async def evaluate_risk(self, user_id: str, ip: str, payload: bytes, current_time: int) -> None:
+        if self._risk_engine is not None:
+            # Only dispatched for requests that already passed the ban checks, so no user read is needed
+            penalty = await self._risk_engine.score(user_id, ip, payload, current_time)
+            if penalty > 0:
+                if self._difficulty_controller is not None:
+                    self._difficulty_controller.note_risk(ip, penalty)
+                self._risk_engine.queue(user_id, penalty)
+            return
+
         user = await self._user_repo.get_by_id(user_id)
         if not user or user.is_banned:
             return
@@ -77,6 +157,8 @@ class SecurityService:
                 total_penalty += score_entropy(ratio, self._thresholds)
 
         if total_penalty > 0:
+            if self._difficulty_controller is not None:
+                self._difficulty_controller.note_risk(ip, total_penalty)
             new_score = await self._user_repo.increment_risk_score(user_id, total_penalty)
             if new_score >= self._thresholds.ban_threshold:
                 await self.cascade_ban_user(user_id)
\ No newline at end of file
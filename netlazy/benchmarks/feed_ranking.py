@@ -0,0 +1,121 @@
+"""Per-request cost of feed ranking: in-memory tag bitmaps versus candidate scoring.
+
+The candidate path is modelled in process. It seeks to the random start in a list
+sorted by `random_index`, as the `random_index` index does, walks forward applying
+the `$nin`/`$all`/`$nin` filters until the oversampled window is full, and scores it
+with Python sets, as `MongoProfileRepository.get_feed` does. Round trips, BSON decoding
+and the server's own filtering cost are not modelled, so the numbers compare ranking
+work only and say nothing about end-to-end latency against a real database.
+
+Run from the repository root:
+
+    python -m netlazy.benchmarks.feed_ranking [profiles] [iterations]
+"""
+import bisect
+import random
+import sys
+import time
+
+from netlazy.infrastructure.feed_index import TagBitmapFeedIndex
+
+TAG_VOCABULARY = 5000
+TAGS_PER_PROFILE = 8
+SEEN_PER_VIEWER = 200
+PAGE = 20
+
+
+def _candidates(profiles: int, rng: random.Random) -> list:
+    # Skewed popularity, like real tags: a few are common, most are rare
+    weights = [1.0 / (rank + 1) for rank in range(TAG_VOCABULARY)]
+    names = [f"tag{i}" for i in range(TAG_VOCABULARY)]
+    return [
+        {
+            "user_id": f"user{i}",
+            "tags": list(dict.fromkeys(rng.choices(names, weights, k=TAGS_PER_PROFILE))),
+            "random_index": rng.random(),
+        }
+        for i in range(profiles)
+    ]
+
+
+def _candidate_path(docs_by_random: list, keys: list, exclude: set, requires: list, excludes: list,
+                    bonus: set, abonus: set, limit: int, rng: random.Random) -> list:
+    rand_val = rng.random()
+    requires_set, excludes_set = set(requires), set(excludes)
+    seek = bisect.bisect_left(keys, rand_val)
+
+    def window(start, stop, wanted):
+        matched = []
+        for position in range(start, stop):
+            doc = docs_by_random[position]
+            if doc["user_id"] in exclude:
+                continue
+            tags = set(doc["tags"])
+            if not requires_set <= tags or tags & excludes_set:
+                continue
+            matched.append(doc)
+            if len(matched) >= wanted * 10:
+                break
+        ranked = [
+            (len(set(d["tags"]) & bonus) - len(set(d["tags"]) & abonus), d["random_index"], d["user_id"])
+            for d in matched
+        ]
+        ranked.sort(key=lambda c: (c[0], -c[1]), reverse=True)
+        return ranked[:wanted]
+
+    ranked = window(seek, len(docs_by_random), limit)
+    if len(ranked) < limit:
+        ranked.extend(window(0, seek, limit - len(ranked)))
+    return ranked
+
+
+def _time_ms(fn, queries: list) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    return (time.perf_counter() - started) / len(queries) * 1e3
+
+
+def main(profiles: int = 100_000, iterations: int = 50) -> None:
+    rng = random.Random(42)
+    docs = _candidates(profiles, rng)
+    docs_by_random = sorted(docs, key=lambda d: d["random_index"])
+    keys = [d["random_index"] for d in docs_by_random]
+
+    started = time.perf_counter()
+    index = TagBitmapFeedIndex()
+    index.replace_all(docs)
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    popular = [f"tag{i}" for i in range(50)]
+    queries = []
+    for _ in range(iterations):
+        seen = [f"user{rng.randrange(profiles)}" for _ in range(SEEN_PER_VIEWER)]
+        queries.append((
+            seen, rng.sample(popular, 1), rng.sample(popular, 2),
+            rng.sample(popular, 4), rng.sample(popular, 2),
+        ))
+
+    bitmap_ms = _time_ms(
+        lambda seen, req, exc, bon, abon: index.rank(seen, req, exc, bon, abon, PAGE), queries
+    )
+    candidate_ms = _time_ms(
+        lambda seen, req, exc, bon, abon: _candidate_path(
+            docs_by_random, keys, set(seen), req, exc, set(bon), set(abon), PAGE, rng
+        ),
+        queries
+    )
+
+    print(f"profiles:            {profiles}")
+    print(f"iterations:          {iterations}")
+    print(f"index build:         {build_ms:8.1f} ms")
+    print(f"candidate scoring:   {candidate_ms:8.2f} ms/request")
+    print(f"tag bitmaps:         {bitmap_ms:8.2f} ms/request")
+    print(f"speed-up:            {candidate_ms / bitmap_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    )
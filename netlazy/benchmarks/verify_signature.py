@@ -0,0 +1,51 @@
+"""Per-request cost of hybrid signature verification with and without the parsed key cache.
+
+Run from the repository root:
+
+    python -m netlazy.benchmarks.verify_signature [iterations]
+"""
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric.mldsa import MLDSA65PrivateKey
+
+from netlazy.infrastructure.crypto_adapter import CryptographyHybridAdapter
+
+
+def _identity():
+    ed_private = ed25519.Ed25519PrivateKey.generate()
+    pq_private = MLDSA65PrivateKey.generate()
+    ed_pem = ed_private.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+    pq_hex = pq_private.public_key().public_bytes_raw().hex()
+    return ed_private, pq_private, ed_pem, pq_hex
+
+
+def _per_call_us(adapter: CryptographyHybridAdapter, args: tuple, iterations: int) -> float:
+    adapter.verify_hybrid_signature(*args)  # warm-up (and cache fill where enabled)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        adapter.verify_hybrid_signature(*args)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main(iterations: int = 2000) -> None:
+    ed_private, pq_private, ed_pem, pq_hex = _identity()
+    payload = b"POST\n/api/feed/search\n\n1700000000\nnonce\n" + b"0" * 64
+    args = (ed_pem, pq_hex, payload, ed_private.sign(payload), pq_private.sign(payload))
+
+    uncached = _per_call_us(CryptographyHybridAdapter(key_cache_size=0), args, iterations)
+    cached = _per_call_us(CryptographyHybridAdapter(), args, iterations)
+
+    print(f"iterations:           {iterations}")
+    print(f"parse + verify:       {uncached:8.1f} us/request")
+    print(f"cached keys + verify: {cached:8.1f} us/request")
+    print(f"saved per request:    {uncached - cached:8.1f} us ({(1 - cached / uncached) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
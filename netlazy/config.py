@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List, Literal
+from typing import List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 _PROJECT_ROOT = Path(__file__).resolve().parent
@@ -24,8 +24,48 @@ class Settings(BaseSettings):
     image_max_dimension: int = 1600
     audio_bitrate: str = "96k"
 
-    pow_difficulty: int = 4
-    bot_protection_delay: float = 0.5
+    user_cache_max_entries: int = 10000
+    user_cache_ttl_seconds: float = 30.0
+    public_key_cache_size: int = 2048
+    signature_verify_workers: int = 0  # 0 = min(8, CPU count)
+    signature_verify_max_pending: int = 64
+    signature_verify_use_processes: bool = False
+
+    batch_max_operations: int = 50
+
+    feed_index_enabled: bool = True  # Rank the feed from in-memory tag bitmaps
+    feed_index_poll_seconds: float = 30.0
+    feed_candidates_rebuild_on_startup: bool = False  # Reconcile feed_candidates against profiles and bans at boot
+    feed_session_ttl_seconds: float = 1800.0
+    feed_session_max_sessions: int = 10000
+    feed_session_max_seen: int = 5000
+    feed_prefetch_ttl_seconds: float = 20.0  # 0 disables building the next page ahead of the request
+    feed_prefetch_max_viewers: int = 5000
+    interaction_cache_max_entries: int = 10000
+    interaction_cache_ttl_seconds: float = 300.0
+    interaction_cache_shared_ttl_seconds: float = 15.0  # Used instead when hub workers share state
+
+    ban_index_enabled: bool = True
+    ban_index_poll_seconds: float = 30.0  # Reload interval when change streams are unavailable
+    ban_cascade_max_depth: int = 3
+    ban_cascade_max_accounts: int = 500
+
+    risk_rate_window_seconds: float = 10.0
+    risk_flush_interval_seconds: float = 2.0
+    geoip_database_path: str = ""  # GeoLite2/GeoIP2 City .mmdb; enables impossible-travel checks
+
+    pow_difficulty: int = 4  # Fixed difficulty when pow_adaptive is off
+    pow_adaptive: bool = True
+    pow_min_difficulty: Optional[int] = None  # Unset means pow_difficulty, so adaptive mode never goes below the fixed baseline
+    pow_max_difficulty: int = 7
+    pow_rate_half_life_seconds: float = 60.0
+    pow_ip_rate_limit: float = 0.2  # Challenges per second before difficulty rises
+    pow_fingerprint_rate_limit: float = 0.2
+    pow_global_rate_limit: float = 50.0
+    pow_challenge_mode: Literal["auto", "stateless", "database"] = "auto"  # auto and stateless both issue signed tokens
+    pow_challenge_secret: str = ""  # Generated at startup (and shared across hub workers) when empty
+    pow_challenge_ttl_seconds: int = 300
+    bot_protection_delay: float = 0.5  # Database mode only: paces challenge inserts
 
     admin_api_key: str = ""
     trusted_bot_ips: str = ""  # Comma-separated static IPs for trusted bots
@@ -1,10 +1,16 @@
 import asyncio
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING
+from pymongo import ASCENDING, ReadPreference
 from pymongo.errors import OperationFailure
 from netlazy.config import settings
 
+try:
+    # Present when netlazy is mounted by the monorepo hub
+    from mongo_registry import mongo_registry as hub_mongo_registry
+except ImportError:
+    hub_mongo_registry = None
+
 class DatabaseUnavailableError(AttributeError):
     """Raised when an uninitialized DB client/collection is accessed.
     
@@ -17,7 +23,6 @@ class Database:
     client: AsyncIOMotorClient = None
     db = None
     users_collection = None
-    used_nonces_collection = None
     tags_collection = None
     profiles_collection = None
     handshakes_collection = None
@@ -25,6 +30,8 @@ class Database:
     bans_collection = None
     logs_collection = None
     chains_collection = None
+    feed_candidates_collection = None
+    owns_client = True
 
     def __getattribute__(self, name):
         val = super().__getattribute__(name)
@@ -97,21 +104,34 @@ async def connect_to_mongo():
     if settings.mongo_tls_allow_invalid_certificates:
         kwargs["tlsAllowInvalidCertificates"] = True
 
+    # Under the hub, reuse its pooled client; it owns the client's lifecycle. netlazy's own
+    # URI and TLS settings are passed on, so the hub's defaults never relax certificate checks
+    shared = hub_mongo_registry is not None and hub_mongo_registry.managed
+    hub_options = {
+        "uri": settings.mongodb_uri,
+        "tls": settings.mongo_tls,
+        "tlsAllowInvalidCertificates": settings.mongo_tls_allow_invalid_certificates,
+    }
+    db_instance.owns_client = not shared
+
     max_retries = 5
     for attempt in range(max_retries):
         client = None
         try:
-            client = AsyncIOMotorClient(
-                settings.mongodb_uri, 
-                readPreference="primaryPreferred", 
-                serverSelectionTimeoutMS=10000,
-                **kwargs
-            )
+            if shared:
+                client = hub_mongo_registry.get_client("netlazy", **hub_options)
+            else:
+                client = AsyncIOMotorClient(
+                    settings.mongodb_uri, 
+                    readPreference="primaryPreferred", 
+                    serverSelectionTimeoutMS=10000,
+                    **kwargs
+                )
             await client.admin.command('ping')
             db_instance.client = client
             break
         except Exception as e:
-            if client is not None:
+            if client is not None and not shared:
                 client.close()
             if attempt < max_retries - 1:
                 wait_time = 2 ** attempt
@@ -121,10 +141,14 @@ async def connect_to_mongo():
                 logging.critical(f"MongoDB connection failed definitively during startup: {e}")
                 raise DatabaseUnavailableError("Failed to initialize database connection") from e
 
-    db_instance.db = db_instance.client.netlazy
+    if shared:
+        db_instance.db = hub_mongo_registry.get_database(
+            "netlazy", "netlazy", read_preference=ReadPreference.PRIMARY_PREFERRED, **hub_options
+        )
+    else:
+        db_instance.db = db_instance.client.netlazy
 
     db_instance.users_collection = db_instance.db.users
-    db_instance.used_nonces_collection = db_instance.db.used_nonces
     db_instance.tags_collection = db_instance.db.tags
     db_instance.profiles_collection = db_instance.db.profiles
     db_instance.handshakes_collection = db_instance.db.handshakes
@@ -132,14 +156,13 @@ async def connect_to_mongo():
     db_instance.bans_collection = db_instance.db.bans
     db_instance.logs_collection = db_instance.db.logs
     db_instance.chains_collection = db_instance.db.chains
+    db_instance.feed_candidates_collection = db_instance.db.feed_candidates
 
     definitions = {
         db_instance.users_collection: [
-            ("user_id", {"unique": True})
-        ],
-        db_instance.used_nonces_collection: [
-            ([("user_id", ASCENDING), ("nonce", ASCENDING)], {"unique": True}),
-            ("created_at", {"expireAfterSeconds": 300})
+            ("user_id", {"unique": True}),
+            ("known_ips", {}),
+            ("known_fingerprints", {})
         ],
         db_instance.tags_collection: [
             ("name", {"unique": True})
@@ -152,8 +175,9 @@ async def connect_to_mongo():
             ("audio.file_hash", {})
         ],
         db_instance.handshakes_collection: [
-            ("sender_id", {}),
-            ("receiver_id", {})
+            ("id", {"unique": True}),
+            ([("sender_id", ASCENDING), ("sender_deleted", ASCENDING), ("receiver_id", ASCENDING)], {}),
+            ([("receiver_id", ASCENDING), ("receiver_deleted", ASCENDING), ("sender_id", ASCENDING)], {})
         ],
         db_instance.challenges_collection: [
             ("created_at", {"expireAfterSeconds": 300})
@@ -166,6 +190,11 @@ async def connect_to_mongo():
         ],
         db_instance.chains_collection: [
             ("user_id", {"unique": True})
+        ],
+        db_instance.feed_candidates_collection: [
+            ("user_id", {"unique": True}),
+            ("random_index", {}),
+            ([("tags", ASCENDING), ("random_index", ASCENDING)], {})
         ]
     }
 
@@ -175,5 +204,5 @@ async def connect_to_mongo():
     logging.info("Connected to netlazy MongoDB successfully.")
 
 async def close_mongo_connection():
-    if getattr(db_instance, 'client', None):
+    if getattr(db_instance, 'client', None) and db_instance.owns_client:
         db_instance.client.close()
\ No newline at end of file
@@ -1,10 +1,17 @@
 import hashlib
+from enum import Enum
 
 _CHAIN_TAG = b"PQDA-CHAIN-v1"
 _REQUEST_TAG = "PQDA-v1"
 _IDENTITY_TAG = "PQDA-ANCHOR-v1"
 
 
+class RatchetOutcome(Enum):
+    ADVANCED = "advanced"
+    NONCE_REUSED = "nonce_reused"
+    ANCHOR_UNKNOWN = "anchor_unknown"
+
+
 def compute_genesis_anchor(user_id: str) -> str:
     return hashlib.sha256(_CHAIN_TAG + b"|genesis|" + user_id.encode("utf-8")).hexdigest()
 
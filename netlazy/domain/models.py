@@ -57,6 +57,12 @@ class Profile:
         if not self.media_id:
             self.media_id = self.user_id
 
+@dataclass
+class FeedPage:
+    profiles: List[Profile] = field(default_factory=list)
+    cursor: Optional[str] = None  # Opaque continuation token for the next page
+    body: Optional[bytes] = None  # Serialized response, when the caller supplied a renderer
+
 @dataclass
 class Handshake:
     id: str
@@ -83,4 +89,14 @@ class PoWChallenge:
 class Ban:
     type: str
     value: str
-    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
\ No newline at end of file
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+@dataclass
+class BanReport:
+    user_ids: List[str] = field(default_factory=list)
+    ips: int = 0
+    fingerprints: int = 0
+    bans_created: int = 0
+    bans_existing: int = 0
+    users_flagged: int = 0
+    depth: int = 0
@@ -0,0 +1,137 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class DifficultyPolicy:
+    min_difficulty: int = 3
+    max_difficulty: int = 7
+    half_life_seconds: float = 60.0
+    ip_rate_limit: float = 0.2  # challenges/s per IP before difficulty starts rising
+    fingerprint_rate_limit: float = 0.2
+    global_rate_limit: float = 50.0
+    load_step_factor: float = 4.0  # every further 4x over a limit adds one hex digit
+    failures_per_step: float = 3.0
+    risk_score_per_step: float = 25.0
+
+
+class DecayingCounter:
+    """Per-key event counts that halve every `half_life_seconds`.
+
+    For a steady stream of `r` events per second a key converges to `r * tau`
+    (tau = half_life / ln 2), so `rate()` reads back an events-per-second estimate
+    without storing timestamps. Only the `max_keys` most recently touched keys are kept.
+    """
+
+    def __init__(self, half_life_seconds: float, max_keys: int = 100_000):
+        self._tau = half_life_seconds / math.log(2)
+        self._max_keys = max_keys
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _decayed(self, key: str, now: float) -> float:
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        value, updated_at = entry
+        return value * math.exp(-(now - updated_at) / self._tau)
+
+    def add(self, key: str, amount: float = 1.0, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        value = self._decayed(key, now) + amount
+        self._entries[key] = (value, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_keys:
+            self._entries.popitem(last=False)
+        return value
+
+    def value(self, key: str, now: Optional[float] = None) -> float:
+        return self._decayed(key, time.monotonic() if now is None else now)
+
+    def rate(self, key: str, now: Optional[float] = None) -> float:
+        return self.value(key, now) / self._tau
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AdaptiveDifficulty:
+    """Chooses a PoW difficulty per client from recent behaviour.
+
+    Three signals raise the difficulty above `min_difficulty`, each decaying with the
+    same half-life. The first is how fast the client's IP, its fingerprint or all clients
+    together request challenges, relative to their limits. The second is how many bad
+    solutions the client recently submitted. The third is risk penalties recently
+    scored against requests from its IP.
+    """
+
+    GLOBAL_KEY = "*"
+
+    def __init__(self, policy: DifficultyPolicy = DifficultyPolicy()):
+        self._policy = policy
+        self._requests = DecayingCounter(policy.half_life_seconds)
+        self._failures = DecayingCounter(policy.half_life_seconds)
+        self._risk = DecayingCounter(policy.half_life_seconds)
+
+    @staticmethod
+    def _keys(ip: Optional[str], fingerprint: Optional[str]) -> list:
+        keys = []
+        if ip:
+            keys.append(f"ip:{ip}")
+        if fingerprint:
+            keys.append(f"fp:{fingerprint}")
+        return keys
+
+    def _load_steps(self, ip: Optional[str], fingerprint: Optional[str], now: float) -> int:
+        policy = self._policy
+        load = self._requests.rate(self.GLOBAL_KEY, now) / policy.global_rate_limit
+        if ip:
+            load = max(load, self._requests.rate(f"ip:{ip}", now) / policy.ip_rate_limit)
+        if fingerprint:
+            load = max(load, self._requests.rate(f"fp:{fingerprint}", now) / policy.fingerprint_rate_limit)
+        if load <= 1.0:
+            return 0
+        return int(math.log(load, policy.load_step_factor)) + 1
+
+    def current(self, ip: Optional[str], fingerprint: Optional[str], now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        policy = self._policy
+        keys = self._keys(ip, fingerprint)
+        failures = max((self._failures.value(key, now) for key in keys), default=0.0)
+        risk = self._risk.value(f"ip:{ip}", now) if ip else 0.0
+
+        difficulty = (
+            policy.min_difficulty
+            + self._load_steps(ip, fingerprint, now)
+            + int(failures / policy.failures_per_step)
+            + int(risk / policy.risk_score_per_step)
+        )
+        return max(policy.min_difficulty, min(policy.max_difficulty, difficulty))
+
+    def on_challenge(self, ip: Optional[str], fingerprint: Optional[str], now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        self._requests.add(self.GLOBAL_KEY, now=now)
+        for key in self._keys(ip, fingerprint):
+            self._requests.add(key, now=now)
+        return self.current(ip, fingerprint, now)
+
+    def note_failure(self, ip: Optional[str], fingerprint: Optional[str]) -> None:
+        for key in self._keys(ip, fingerprint):
+            self._failures.add(key)
+
+    def note_risk(self, ip: Optional[str], penalty: float) -> None:
+        if ip and penalty > 0:
+            self._risk.add(f"ip:{ip}", penalty)
+
+    def metrics(self) -> dict:
+        return {
+            "min_difficulty": self._policy.min_difficulty,
+            "max_difficulty": self._policy.max_difficulty,
+            "global_rate_per_second": round(self._requests.rate(self.GLOBAL_KEY), 3),
+            "global_difficulty": self.current(None, None),
+            "tracked_clients": len(self._requests),
+            "tracked_failures": len(self._failures),
+            "tracked_risk": len(self._risk),
+        }
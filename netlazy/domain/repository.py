@@ -1,12 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Any, Callable, Tuple
-from netlazy.domain.models import Handshake, PoWChallenge, Profile, Tag, User, MediaItem
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from netlazy.domain.chain import RatchetOutcome
+from netlazy.domain.models import BanReport, Handshake, PoWChallenge, Profile, Tag, User, MediaItem
 
 class InvalidPublicKeyError(Exception): pass
 class SignatureVerificationError(Exception): pass
 class UnsupportedMediaTypeError(Exception): pass
 class MediaProcessingError(Exception): pass
 class HashChainDesyncError(Exception): pass
+class VerifierSaturatedError(Exception): pass
 
 class HybridCryptoPort(ABC):
     @abstractmethod
@@ -24,6 +26,64 @@ class HybridCryptoPort(ABC):
     ) -> None:
         ...
 
+    @abstractmethod
+    def discard_public_keys(self, ed25519_public_pem: str, mldsa_public_hex: str) -> None:
+        """Releases any parsed key objects held for a retired identity."""
+        ...
+
+class SignatureVerifierPort(ABC):
+    @abstractmethod
+    async def verify(
+        self,
+        ed25519_public_pem: str,
+        mldsa_public_hex: str,
+        payload: bytes,
+        ed25519_sig: bytes,
+        mldsa_sig: bytes
+    ) -> None:
+        """Same contract as `HybridCryptoPort.verify_hybrid_signature`, without blocking the event loop."""
+        ...
+
+class ChallengeIssuerPort(ABC):
+    """Issues and checks proof-of-work challenges without persisting them."""
+
+    @abstractmethod
+    def issue(self, difficulty: int, client_key: str = "") -> PoWChallenge:
+        ...
+
+    @abstractmethod
+    def open(self, challenge_id: str, client_key: str = "") -> Optional[PoWChallenge]:
+        """Returns the challenge a token stands for, or None if it is forged, expired or bound elsewhere."""
+        ...
+
+    @abstractmethod
+    async def mark_spent(self, challenge_id: str) -> bool:
+        """Records a solved token; False means it was already redeemed."""
+        ...
+
+class FeedSessionPort(ABC):
+    """Remembers which profiles a viewer has already been shown, behind an opaque token."""
+
+    @abstractmethod
+    async def resume(self, viewer_id: str, token: Optional[str]) -> Tuple[str, List[str]]:
+        """(token, seen user ids); unknown, expired or foreign tokens start a new, empty session."""
+        ...
+
+    @abstractmethod
+    async def record(self, token: str, user_ids: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def seen(self, token: str) -> Optional[List[str]]:
+        """Seen user ids of a live session, or None; unlike `resume` it neither starts nor extends one."""
+        ...
+
+class GeoLocatorPort(ABC):
+    @abstractmethod
+    def locate(self, ip: str) -> Optional[Tuple[float, float]]:
+        """(latitude, longitude) for an IP, or None when the database has no position for it."""
+        ...
+
 class ChainRepository(ABC):
     @abstractmethod
     async def get_recent_anchors(self, user_id: str) -> List[str]:
@@ -33,6 +93,19 @@ class ChainRepository(ABC):
     async def push_anchor(self, user_id: str, anchor: str, window_size: int = 5, session: Any = None) -> None:
         ...
 
+    @abstractmethod
+    async def advance(
+        self, user_id: str, prev_anchor: str, next_anchor: str, nonce: str,
+        nonce_retention_seconds: int, window_size: int = 5
+    ) -> RatchetOutcome:
+        """Atomically requires `prev_anchor` in the window and `nonce` unseen, then records both moves."""
+        ...
+
+    @abstractmethod
+    async def consume_nonce(self, user_id: str, nonce: str, nonce_retention_seconds: int) -> Optional[List[str]]:
+        """Records `nonce` for the user; returns the anchor window, or None if the nonce was already used."""
+        ...
+
     @abstractmethod
     async def delete_for_user(self, user_id: str, session: Any = None) -> None:
         ...
@@ -95,6 +168,11 @@ class UserRepository(ABC):
     async def increment_risk_score(self, user_id: str, score_delta: float) -> float:
         ...
 
+    @abstractmethod
+    async def increment_risk_scores(self, deltas: Dict[str, float]) -> Dict[str, float]:
+        """Applies many increments at once; returns the new scores of users that are not banned."""
+        ...
+
     @abstractmethod
     async def delete(self, user_id: str, session: Any = None) -> None:
         ...
@@ -103,13 +181,16 @@ class UserRepository(ABC):
     async def get_active_user_ids(self, user_ids: List[str]) -> List[str]:
         ...
 
-class NonceRepository(ABC):
     @abstractmethod
-    async def insert_if_not_exists(self, user_id: str, nonce: str) -> bool:
+    async def invalidate(self, user_id: str) -> None:
+        """Drops any cached copy so the next read reflects the stored record."""
         ...
 
     @abstractmethod
-    async def delete_for_user(self, user_id: str, session: Any = None) -> None:
+    async def find_linked(
+        self, ips: List[str], fingerprints: List[str], exclude_user_ids: List[str], limit: int
+    ) -> List[User]:
+        """Users outside `exclude_user_ids` whose footprints share any of the given IPs or fingerprints."""
         ...
 
 class TagRepository(ABC):
@@ -168,7 +249,7 @@ class HandshakeRepository(ABC):
         ...
 
     @abstractmethod
-    async def update(self, handshake: Handshake) -> None:
+    async def update(self, handshake: Handshake, session: Any = None) -> None:
         ...
 
     @abstractmethod
@@ -176,7 +257,7 @@ class HandshakeRepository(ABC):
         ...
 
     @abstractmethod
-    async def get_by_id(self, handshake_id: str) -> Optional[Handshake]:
+    async def get_by_id(self, handshake_id: str, session: Any = None) -> Optional[Handshake]:
         ...
 
     @abstractmethod
@@ -191,6 +272,11 @@ class HandshakeRepository(ABC):
     async def get_interacted_user_ids(self, user_id: str) -> List[str]:
         ...
 
+    @abstractmethod
+    async def invalidate_interactions(self, user_id: str) -> None:
+        """Drops any cached interaction set so the next read reflects the stored handshakes."""
+        ...
+
     @abstractmethod
     async def delete_for_user(self, user_id: str, session: Any = None) -> None:
         ...
@@ -218,7 +304,7 @@ class SecurityRepository(ABC):
         ...
 
     @abstractmethod
-    async def apply_bans(self, ips: List[str], fingerprints: List[str], user_id: str) -> None:
+    async def apply_bans(self, ips: List[str], fingerprints: List[str], user_ids: List[str]) -> BanReport:
         ...
         
     @abstractmethod
@@ -1,7 +1,12 @@
 import math
 from collections import Counter
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the Counter path below gives the same result, just slower
+    np = None
 
 
 @dataclass(frozen=True)
@@ -10,6 +15,7 @@ class RiskThresholds:
     frequency_weight: float = 1.5
     impossible_travel_kmh: float = 900.0  # ~ commercial aircraft cruise speed
     impossible_travel_score: float = 50.0
+    impossible_travel_min_km: float = 300.0  # below this, GeoIP city error dominates
     min_entropy_ratio: float = 0.2  # normalized 0..1 (fraction of 8 bits/byte)
     low_entropy_score: float = 20.0
     ban_threshold: float = 100.0
@@ -19,11 +25,44 @@ def shannon_entropy_ratio(data: bytes) -> float:
     """Returns entropy normalized to [0, 1] (1.0 == 8 bits/byte, maximally random)."""
     if not data:
         return 0.0
-    counts = Counter(data)
     length = len(data)
+    if np is not None:
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        probabilities = counts[counts > 0] / length
+        return float(-(probabilities * np.log2(probabilities)).sum()) / 8.0
+    counts = Counter(data)
     bits_per_byte = -sum((c / length) * math.log2(c / length) for c in counts.values())
     return bits_per_byte / 8.0
 
 
 def score_entropy(entropy_ratio: float, thresholds: RiskThresholds) -> float:
     return thresholds.low_entropy_score if entropy_ratio < thresholds.min_entropy_ratio else 0.0
+
+
+def score_request_rate(requests_per_second: float, thresholds: RiskThresholds) -> float:
+    """Per-request share of the excess, so a sustained flood accrues `excess * weight` points per second."""
+    if requests_per_second <= thresholds.max_requests_per_second:
+        return 0.0
+    excess = requests_per_second - thresholds.max_requests_per_second
+    return excess * thresholds.frequency_weight / requests_per_second
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(min(1.0, math.sqrt(h)))
+
+
+def score_travel(
+    previous: Optional[Tuple[float, float]],
+    current: Optional[Tuple[float, float]],
+    elapsed_seconds: float,
+    thresholds: RiskThresholds
+) -> float:
+    if previous is None or current is None:
+        return 0.0
+    distance = haversine_km(previous, current)
+    if distance < thresholds.impossible_travel_min_km:
+        return 0.0
+    speed_kmh = distance / (max(elapsed_seconds, 1.0) / 3600.0)
+    return thresholds.impossible_travel_score if speed_kmh > thresholds.impossible_travel_kmh else 0.0
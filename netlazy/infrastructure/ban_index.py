@@ -0,0 +1,172 @@
+import ipaddress
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from netlazy.infrastructure.mirror_sync import MongoMirrorSync
+
+BAN_TYPES = ("ip", "fingerprint", "user_id")
+
+
+def _normalize_ip(value: str) -> str:
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return value
+
+
+class _PrefixTrie:
+    """Binary trie over address bits; a lookup walks at most 32 (IPv4) or 128 (IPv6) levels."""
+
+    def __init__(self, bits: int):
+        self._bits = bits
+        self._root: list = [None, None, False]
+        self.size = 0
+
+    def _walk(self, network: ipaddress._BaseNetwork, create: bool) -> Optional[list]:
+        node = self._root
+        address = int(network.network_address)
+        for depth in range(network.prefixlen):
+            bit = (address >> (self._bits - 1 - depth)) & 1
+            if node[bit] is None:
+                if not create:
+                    return None
+                node[bit] = [None, None, False]
+            node = node[bit]
+        return node
+
+    def add(self, network: ipaddress._BaseNetwork) -> None:
+        node = self._walk(network, create=True)
+        if not node[2]:
+            node[2] = True
+            self.size += 1
+
+    def discard(self, network: ipaddress._BaseNetwork) -> None:
+        node = self._walk(network, create=False)
+        if node is not None and node[2]:
+            node[2] = False
+            self.size -= 1
+
+    def covers(self, address: int) -> bool:
+        node = self._root
+        for depth in range(self._bits):
+            if node[2]:
+                return True
+            node = node[(address >> (self._bits - 1 - depth)) & 1]
+            if node is None:
+                return False
+        return node[2]
+
+
+class BanIndex:
+    """In-memory copy of the bans collection answering `is_banned` without a query.
+
+    Exact values live in one hash set per ban type. An `ip` ban whose value is in CIDR
+    notation (`10.0.0.0/8`, `2001:db8::/32`) goes into a prefix trie instead, so a
+    single entry covers a whole range. Lookups are only trusted once `ready` is set by
+    the initial load; until then callers should fall back to the database.
+    """
+
+    def __init__(self):
+        self._exact: Dict[str, set] = {ban_type: set() for ban_type in BAN_TYPES}
+        self._ranges = {4: _PrefixTrie(32), 6: _PrefixTrie(128)}
+        self._by_id: Dict[object, Tuple[str, str]] = {}
+        self.ready = False
+        self.loaded_at: Optional[float] = None
+        self.hits = 0
+        self.lookups = 0
+
+    @staticmethod
+    def _parse_network(value: str) -> Optional[ipaddress._BaseNetwork]:
+        if "/" not in value:
+            return None
+        try:
+            return ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            return None
+
+    def add(self, ban_type: str, value: str, doc_id: object = None) -> None:
+        if ban_type not in self._exact or not value:
+            return
+        if doc_id is not None:
+            previous = self._by_id.get(doc_id)
+            if previous is not None and previous != (ban_type, value):
+                self.discard(*previous)
+            self._by_id[doc_id] = (ban_type, value)
+        network = self._parse_network(value) if ban_type == "ip" else None
+        if network is not None:
+            self._ranges[network.version].add(network)
+        elif ban_type == "ip":
+            self._exact["ip"].add(_normalize_ip(value))
+        else:
+            self._exact[ban_type].add(value)
+
+    def discard(self, ban_type: str, value: str) -> None:
+        if ban_type not in self._exact or not value:
+            return
+        network = self._parse_network(value) if ban_type == "ip" else None
+        if network is not None:
+            self._ranges[network.version].discard(network)
+        elif ban_type == "ip":
+            self._exact["ip"].discard(_normalize_ip(value))
+        else:
+            self._exact[ban_type].discard(value)
+
+    def discard_id(self, doc_id: object) -> None:
+        entry = self._by_id.pop(doc_id, None)
+        if entry is not None:
+            self.discard(*entry)
+
+    def apply_document(self, doc: dict) -> None:
+        self.add(doc.get("type"), doc.get("value"), doc["_id"])
+
+    def replace_all(self, docs: Iterable[dict]) -> None:
+        fresh = BanIndex()
+        for doc in docs:
+            fresh.add(doc.get("type"), doc.get("value"), doc.get("_id"))
+        # Swap whole structures so a concurrent lookup never sees a half-built index
+        self._exact, self._ranges, self._by_id = fresh._exact, fresh._ranges, fresh._by_id
+        self.ready = True
+        self.loaded_at = time.time()
+
+    def _ip_banned(self, ip: str) -> bool:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return ip in self._exact["ip"]
+        if str(address) in self._exact["ip"]:
+            return True
+        if address.version == 6 and address.ipv4_mapped is not None:
+            if self._ip_banned(str(address.ipv4_mapped)):
+                return True
+        trie = self._ranges[address.version]
+        return trie.size > 0 and trie.covers(int(address))
+
+    def contains(self, ip: Optional[str], fingerprint: Optional[str], user_id: Optional[str] = None) -> bool:
+        self.lookups += 1
+        banned = (
+            (bool(user_id) and user_id in self._exact["user_id"])
+            or (bool(fingerprint) and fingerprint in self._exact["fingerprint"])
+            or (bool(ip) and self._ip_banned(ip))
+        )
+        if banned:
+            self.hits += 1
+        return banned
+
+    def metrics(self) -> dict:
+        return {
+            "ready": self.ready,
+            "loaded_at": self.loaded_at,
+            "ips": len(self._exact["ip"]),
+            "ip_ranges": self._ranges[4].size + self._ranges[6].size,
+            "fingerprints": len(self._exact["fingerprint"]),
+            "user_ids": len(self._exact["user_id"]),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+class MongoBanIndexSync(MongoMirrorSync):
+    """Keeps a `BanIndex` in step with the bans collection."""
+
+    def __init__(self, index: BanIndex, poll_interval: float = 30.0):
+        super().__init__(index, "bans_collection", {"type": 1, "value": 1}, "ban index", poll_interval)
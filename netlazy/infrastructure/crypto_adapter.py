@@ -1,4 +1,8 @@
 import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives.serialization import load_pem_public_key
@@ -11,6 +15,53 @@ from netlazy.domain.repository import HybridCryptoPort, InvalidPublicKeyError, S
 
 
 class CryptographyHybridAdapter(HybridCryptoPort):
+    """Hybrid verifier that keeps parsed public key objects for recently seen identities.
+
+    Keys are cached by their exact encoded form, so a rotated identity can never hit a
+    stale entry; `discard_public_keys` just frees the slot early.
+    """
+
+    def __init__(self, key_cache_size: int = 2048):
+        self._key_cache_size = key_cache_size
+        self._key_cache: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._key_cache_lock = threading.Lock()
+        self.key_cache_hits = 0
+        self.key_cache_misses = 0
+
+    def _load_public_keys(self, ed25519_public_pem: str, mldsa_public_hex: str) -> tuple:
+        cache_key = (ed25519_public_pem, mldsa_public_hex)
+        with self._key_cache_lock:
+            keys = self._key_cache.get(cache_key)
+            if keys is not None:
+                self._key_cache.move_to_end(cache_key)
+                self.key_cache_hits += 1
+                return keys
+            self.key_cache_misses += 1
+
+        keys = (
+            load_pem_public_key(ed25519_public_pem.encode('utf-8')),
+            MLDSA65PublicKey.from_public_bytes(bytes.fromhex(mldsa_public_hex))
+        )
+        if self._key_cache_size > 0:
+            with self._key_cache_lock:
+                self._key_cache[cache_key] = keys
+                while len(self._key_cache) > self._key_cache_size:
+                    self._key_cache.popitem(last=False)
+        return keys
+
+    def discard_public_keys(self, ed25519_public_pem: str, mldsa_public_hex: str) -> None:
+        with self._key_cache_lock:
+            self._key_cache.pop((ed25519_public_pem, mldsa_public_hex), None)
+
+    def key_cache_metrics(self) -> dict:
+        with self._key_cache_lock:
+            return {
+                "size": len(self._key_cache),
+                "max_entries": self._key_cache_size,
+                "hits": self.key_cache_hits,
+                "misses": self.key_cache_misses,
+            }
+
     def _get_ed25519_der(self, pem: str) -> bytes:
         try:
             key = load_pem_public_key(pem.encode('utf-8'))
@@ -46,9 +97,8 @@ class CryptographyHybridAdapter(HybridCryptoPort):
         mldsa_sig: bytes
     ) -> None:
         try:
-            ed_key = load_pem_public_key(ed25519_public_pem.encode('utf-8'))
-            pq_key = MLDSA65PublicKey.from_public_bytes(bytes.fromhex(mldsa_public_hex))
-            
+            ed_key, pq_key = self._load_public_keys(ed25519_public_pem, mldsa_public_hex)
+
             # 1. Classical Ed25519 Verification
             ed_key.verify(ed25519_sig, payload)
             
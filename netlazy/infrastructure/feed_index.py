@@ -0,0 +1,246 @@
+import random
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from netlazy.infrastructure.mirror_sync import MongoMirrorSync
+
+
+def _add_to_counter(planes: List[int], bitmap: int) -> None:
+    """Adds one to every slot set in `bitmap` across bit-sliced counters (planes[i] holds bit i of each count)."""
+    carry = bitmap
+    for i, plane in enumerate(planes):
+        if not carry:
+            return
+        planes[i], carry = plane ^ carry, plane & carry
+    if carry:
+        planes.append(carry)
+
+
+def _equal_to(planes: List[int], value: int, universe: int) -> int:
+    """Slots within `universe` whose bit-sliced count equals `value`."""
+    if value >= 1 << len(planes):
+        return 0
+    result = universe
+    for i, plane in enumerate(planes):
+        result &= plane if (value >> i) & 1 else ~plane
+        if not result:
+            break
+    return result
+
+
+def _take_rotated(bitmap: int, start: int, n: int) -> List[int]:
+    """Up to `n` set slots in order `start, start+1, ..., end, 0, ..., start-1`."""
+    picked: List[int] = []
+    for part, offset in ((bitmap >> start, start), (bitmap & ((1 << start) - 1), 0)):
+        while part and len(picked) < n:
+            lowest = part & -part
+            picked.append(offset + lowest.bit_length() - 1)
+            part ^= lowest
+    return picked
+
+
+class TagBitmapFeedIndex:
+    """In-process ranking over feed candidates using one bitmap per tag.
+
+    Every candidate gets a slot, and slots are laid out in `random_index` order. A
+    Python int per tag has bit `slot` set when that profile carries the tag; ANDs
+    and shifts on these ints run in C over machine words. As in roaring bitmaps, rare
+    tags are kept as slot sets and only become bitmaps once they cover more than
+    1/256 of the slots, so a long tail of tags does not cost `slots / 8` bytes each. `requires` is an AND,
+    `excludes` an AND-NOT. Bonus and anti-bonus tags are counted for every slot at
+    once with bit-sliced adders. The result is taken highest score first; within a
+    score, slots are read in rotation from a random start slot, the same tie-break the
+    Mongo path gets from its `random_index` range scan. Deleted profiles leave holes
+    that are compacted once they outnumber a quarter of the slots.
+    """
+
+    def __init__(self):
+        self._user_ids: List[Optional[str]] = []
+        self._slot_tags: List[Tuple[str, ...]] = []
+        self._slot_of: Dict[str, int] = {}
+        self._user_of_doc: Dict[object, str] = {}
+        self._postings: Dict[str, int] = {}
+        self._sparse: Dict[str, Set[int]] = {}
+        self._alive = 0
+        self._holes = 0
+        self.ready = False
+        self.queries = 0
+
+    def replace_all(self, docs: Iterable[dict]) -> None:
+        user_ids: List[Optional[str]] = []
+        slot_tags: List[Tuple[str, ...]] = []
+        slot_of: Dict[str, int] = {}
+        user_of_doc: Dict[object, str] = {}
+        tag_slots: Dict[str, List[int]] = {}
+        for doc in sorted(docs, key=lambda d: d.get("random_index", 0.0)):
+            user_id = doc["user_id"]
+            if "_id" in doc:
+                user_of_doc[doc["_id"]] = user_id
+            if user_id in slot_of:
+                continue
+            slot = slot_of[user_id] = len(user_ids)
+            user_ids.append(user_id)
+            tags = tuple(dict.fromkeys(doc.get("tags", [])))
+            slot_tags.append(tags)
+            for tag in tags:
+                tag_slots.setdefault(tag, []).append(slot)
+
+        self._user_ids, self._slot_tags, self._slot_of, self._user_of_doc = user_ids, slot_tags, slot_of, user_of_doc
+        dense_from = self._dense_threshold()
+        # One bytearray per tag: OR-ing bits into a growing int one at a time would be quadratic
+        self._postings = {tag: self._bitmap_of(slots) for tag, slots in tag_slots.items() if len(slots) > dense_from}
+        self._sparse = {tag: set(slots) for tag, slots in tag_slots.items() if len(slots) <= dense_from}
+        self._alive = (1 << len(user_ids)) - 1
+        self._holes = 0
+        self.ready = True
+
+    def apply_document(self, doc: dict) -> None:
+        if "_id" in doc:
+            self._user_of_doc[doc["_id"]] = doc["user_id"]
+        self.upsert(doc["user_id"], doc.get("tags", []))
+
+    def discard_id(self, doc_id: object) -> None:
+        user_id = self._user_of_doc.pop(doc_id, None)
+        if user_id is not None:
+            self.remove(user_id)
+
+    def _dense_threshold(self) -> int:
+        return len(self._user_ids) >> 8
+
+    def _posting(self, tag: str) -> int:
+        posting = self._postings.get(tag)
+        if posting is not None:
+            return posting
+        return self._bitmap_of(self._sparse.get(tag, ()))
+
+    def _unlink(self, slot: int) -> None:
+        bit = 1 << slot
+        for tag in self._slot_tags[slot]:
+            if tag in self._postings:
+                posting = self._postings[tag] & ~bit
+                if posting:
+                    self._postings[tag] = posting
+                else:
+                    del self._postings[tag]
+            else:
+                slots = self._sparse.get(tag)
+                if slots is not None:
+                    slots.discard(slot)
+                    if not slots:
+                        del self._sparse[tag]
+        self._slot_tags[slot] = ()
+
+    def upsert(self, user_id: str, tags: List[str]) -> None:
+        slot = self._slot_of.get(user_id)
+        if slot is None:
+            # New profiles go at the end; their random position comes from the random start slot
+            slot = len(self._user_ids)
+            self._user_ids.append(user_id)
+            self._slot_tags.append(())
+            self._slot_of[user_id] = slot
+        else:
+            self._unlink(slot)
+
+        bit = 1 << slot
+        unique_tags = tuple(dict.fromkeys(tags))
+        for tag in unique_tags:
+            if tag in self._postings:
+                self._postings[tag] |= bit
+                continue
+            slots = self._sparse.setdefault(tag, set())
+            slots.add(slot)
+            if len(slots) > self._dense_threshold():
+                self._postings[tag] = self._bitmap_of(self._sparse.pop(tag))
+        self._slot_tags[slot] = unique_tags
+        self._alive |= bit
+
+    def remove(self, user_id: str) -> None:
+        slot = self._slot_of.pop(user_id, None)
+        if slot is None:
+            return
+        self._unlink(slot)
+        self._alive &= ~(1 << slot)
+        self._user_ids[slot] = None
+        self._holes += 1
+        if self._holes > 64 and self._holes * 4 > len(self._user_ids):
+            self._compact()
+
+    def _compact(self) -> None:
+        survivors = [(uid, tags) for uid, tags in zip(self._user_ids, self._slot_tags) if uid is not None]
+        user_of_doc, ready = self._user_of_doc, self.ready
+        self.replace_all({"user_id": uid, "tags": list(tags)} for uid, tags in survivors)
+        self._user_of_doc, self.ready = user_of_doc, ready
+
+    def _bitmap_of(self, slots: Iterable[int]) -> int:
+        bits = bytearray((len(self._user_ids) + 7) // 8)
+        for slot in slots:
+            bits[slot >> 3] |= 1 << (slot & 7)
+        return int.from_bytes(bits, "little")
+
+    def _slots_bitmap(self, user_ids: Iterable[str]) -> int:
+        slot_of = self._slot_of
+        return self._bitmap_of(slot_of[uid] for uid in user_ids if uid in slot_of)
+
+    def rank(
+        self, exclude_ids: Iterable[str], requires: List[str], excludes: List[str],
+        bonus: List[str], abonus: List[str], limit: int, start: Optional[float] = None
+    ) -> List[Tuple[str, int]]:
+        """Top `limit` (user_id, score) pairs, highest score first."""
+        self.queries += 1
+        size = len(self._user_ids)
+        if not size or limit <= 0:
+            return []
+
+        universe = self._alive & ~self._slots_bitmap(exclude_ids)
+        for tag in requires:
+            universe &= self._posting(tag)
+        for tag in excludes:
+            universe &= ~self._posting(tag)
+        if not universe:
+            return []
+
+        bonus_planes: List[int] = []
+        for tag in dict.fromkeys(bonus):
+            _add_to_counter(bonus_planes, self._posting(tag) & universe)
+        abonus_planes: List[int] = []
+        for tag in dict.fromkeys(abonus):
+            _add_to_counter(abonus_planes, self._posting(tag) & universe)
+
+        bonus_levels = {b: _equal_to(bonus_planes, b, universe) for b in range(len(set(bonus)) + 1)}
+        abonus_levels = {a: _equal_to(abonus_planes, a, universe) for a in range(len(set(abonus)) + 1)}
+        bonus_levels = {b: bits for b, bits in bonus_levels.items() if bits}
+        abonus_levels = {a: bits for a, bits in abonus_levels.items() if bits}
+
+        first_slot = int((random.random() if start is None else start) * size) % size
+        by_score: Dict[int, int] = {}
+        for b, b_bits in bonus_levels.items():
+            for a, a_bits in abonus_levels.items():
+                both = b_bits & a_bits
+                if both:
+                    by_score[b - a] = by_score.get(b - a, 0) | both
+
+        ranked: List[Tuple[str, int]] = []
+        for score in sorted(by_score, reverse=True):
+            for slot in _take_rotated(by_score[score], first_slot, limit - len(ranked)):
+                ranked.append((self._user_ids[slot], score))
+            if len(ranked) >= limit:
+                break
+        return ranked
+
+    def metrics(self) -> dict:
+        return {
+            "ready": self.ready,
+            "profiles": len(self._slot_of),
+            "slots": len(self._user_ids),
+            "tags": len(self._postings) + len(self._sparse),
+            "bitmap_tags": len(self._postings),
+            "queries": self.queries,
+        }
+
+
+class MongoFeedIndexSync(MongoMirrorSync):
+    """Keeps a `TagBitmapFeedIndex` in step with `feed_candidates`."""
+
+    def __init__(self, index: TagBitmapFeedIndex, poll_interval: float = 30.0):
+        super().__init__(
+            index, "feed_candidates_collection", {"user_id": 1, "tags": 1, "random_index": 1}, "feed index", poll_interval
+        )
@@ -0,0 +1,130 @@
+import secrets
+from typing import Dict, List, Optional, Tuple
+
+from netlazy.domain.repository import FeedSessionPort
+from netlazy.infrastructure.ttl_cache import TtlLruCache
+
+
+class _Session:
+    __slots__ = ("viewer_id", "seen")
+
+    def __init__(self, viewer_id: str):
+        self.viewer_id = viewer_id
+        # dict as an insertion-ordered set, so the oldest ids are the ones dropped at the cap
+        self.seen: Dict[str, None] = {}
+
+
+class InMemoryFeedSessionStore(FeedSessionPort):
+    """Per-worker feed sessions keyed by random tokens, with sliding TTL and LRU eviction.
+
+    A token only resumes the session of the viewer that opened it. Each session keeps
+    at most `max_seen` ids; past that the oldest are forgotten, which can only make a
+    very old profile eligible again. A token this worker does not know (restart, other
+    worker, expiry) starts a new session rather than failing the request.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800.0, max_seen: int = 5000):
+        self._sessions: TtlLruCache[_Session] = TtlLruCache(max_sessions, ttl_seconds)
+        self._max_seen = max_seen
+        self.resumed = 0
+        self.started = 0
+
+    async def resume(self, viewer_id: str, token: Optional[str]) -> Tuple[str, List[str]]:
+        session = self._sessions.peek(token) if token else None
+        if session is not None and session.viewer_id == viewer_id:
+            # Re-inserting restarts the TTL and marks the session recently used
+            self._sessions.put(token, session)
+            self.resumed += 1
+            return token, list(session.seen)
+
+        token = secrets.token_urlsafe(16)
+        self._sessions.put(token, _Session(viewer_id))
+        self.started += 1
+        return token, []
+
+    async def record(self, token: str, user_ids: List[str]) -> None:
+        session = self._sessions.peek(token)
+        if session is None:
+            return
+        seen = session.seen
+        for user_id in user_ids:
+            seen[user_id] = None
+        overflow = len(seen) - self._max_seen
+        if overflow > 0:
+            for user_id in list(seen)[:overflow]:
+                del seen[user_id]
+
+    async def seen(self, token: str) -> Optional[List[str]]:
+        session = self._sessions.peek(token)
+        return list(session.seen) if session is not None else None
+
+    def metrics(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self._sessions.max_entries,
+            "ttl_seconds": self._sessions.ttl,
+            "started": self.started,
+            "resumed": self.resumed,
+            "evictions": self._sessions.evictions,
+        }
+
+
+class SharedFeedSessionStore(FeedSessionPort):
+    """Feed sessions kept in the hub's shared state, so a cursor resumes on any worker.
+
+    While the hub runs a single worker (or netlazy runs standalone) the state is not
+    shared and every call goes to `local`. Each session is one cache entry holding the
+    viewer and its seen ids; recording is read-modify-write, so if two pages of one
+    session are served at the same moment one page's ids can be lost, which only makes
+    those profiles eligible again.
+    """
+
+    KEY_PREFIX = "netlazy:feed_session:"
+
+    def __init__(self, state, local: InMemoryFeedSessionStore, ttl_seconds: float = 1800.0, max_seen: int = 5000):
+        self._state = state
+        self._local = local
+        self._ttl = ttl_seconds
+        self._max_seen = max_seen
+        self.resumed = 0
+        self.started = 0
+
+    async def resume(self, viewer_id: str, token: Optional[str]) -> Tuple[str, List[str]]:
+        if not self._state.shared:
+            return await self._local.resume(viewer_id, token)
+        session = await self._state.cache_get(self.KEY_PREFIX + token) if token else None
+        if session is not None and session.get("viewer_id") == viewer_id:
+            # No write here: the record that follows every resume slides the expiry
+            self.resumed += 1
+            return token, list(session.get("seen", []))
+
+        token = secrets.token_urlsafe(16)
+        await self._state.cache_set(self.KEY_PREFIX + token, {"viewer_id": viewer_id, "seen": []}, self._ttl)
+        self.started += 1
+        return token, []
+
+    async def record(self, token: str, user_ids: List[str]) -> None:
+        if not self._state.shared:
+            await self._local.record(token, user_ids)
+            return
+        session = await self._state.cache_get(self.KEY_PREFIX + token)
+        if session is None:
+            return
+        seen = list(dict.fromkeys(session.get("seen", []) + user_ids))[-self._max_seen:]
+        await self._state.cache_set(self.KEY_PREFIX + token, {**session, "seen": seen}, self._ttl)
+
+    async def seen(self, token: str) -> Optional[List[str]]:
+        if not self._state.shared:
+            return await self._local.seen(token)
+        session = await self._state.cache_get(self.KEY_PREFIX + token)
+        return list(session.get("seen", [])) if session is not None else None
+
+    def metrics(self) -> dict:
+        if not self._state.shared:
+            return {"backend": "local", **self._local.metrics()}
+        return {
+            "backend": "shared",
+            "ttl_seconds": self._ttl,
+            "started": self.started,
+            "resumed": self.resumed,
+        }
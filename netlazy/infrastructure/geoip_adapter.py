@@ -0,0 +1,57 @@
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from netlazy.domain.repository import GeoLocatorPort
+
+try:
+    import maxminddb
+except ImportError:  # Optional: without it travel checks are skipped
+    maxminddb = None
+
+
+class MaxMindGeoLocator(GeoLocatorPort):
+    """Offline IP -> (lat, lon) lookups from a GeoLite2/GeoIP2 City `.mmdb` file.
+
+    The database is memory-mapped, so lookups never leave the process; recent results
+    are also kept in a small LRU since the same few IPs repeat for every active user.
+    """
+
+    def __init__(self, database_path: str, cache_size: int = 10000):
+        self._reader = maxminddb.open_database(database_path)
+        self._cache: "OrderedDict[str, Optional[Tuple[float, float]]]" = OrderedDict()
+        self._cache_size = cache_size
+
+    @classmethod
+    def from_settings(cls, database_path: str) -> Optional["MaxMindGeoLocator"]:
+        if not database_path:
+            return None
+        if maxminddb is None:
+            logging.warning("[netlazy] GEOIP_DATABASE_PATH is set but maxminddb is not installed; travel checks disabled")
+            return None
+        try:
+            return cls(database_path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"[netlazy] Could not open GeoIP database {database_path}: {e}; travel checks disabled")
+            return None
+
+    def locate(self, ip: str) -> Optional[Tuple[float, float]]:
+        if ip in self._cache:
+            self._cache.move_to_end(ip)
+            return self._cache[ip]
+
+        try:
+            record = self._reader.get(ip)
+        except ValueError:
+            record = None
+        location = (record or {}).get("location") or {}
+        latitude, longitude = location.get("latitude"), location.get("longitude")
+        position = (latitude, longitude) if latitude is not None and longitude is not None else None
+
+        self._cache[ip] = position
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return position
+
+    def close(self) -> None:
+        self._reader.close()
@@ -0,0 +1,58 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from netlazy.infrastructure.ttl_cache import TtlLruCache
+
+
+class InteractionCache:
+    """Bounded TTL/LRU cache of the users each viewer has a live handshake with.
+
+    Handshake writes in this process patch cached sets in place. A write that cannot
+    be patched exactly, such as a delete, drops the entry instead. Loads are versioned,
+    so a database read that overlaps a write to the same user is not cached: its result
+    may predate the write. Writes made by other workers are never seen here, so the TTL
+    alone bounds their staleness; the app wires a much shorter TTL when the hub runs
+    several workers (`interaction_cache_shared_ttl_seconds`).
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self._entries: TtlLruCache[Set[str]] = TtlLruCache(max_entries, ttl_seconds)
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0
+
+    def get(self, user_id: str) -> Optional[List[str]]:
+        ids = self._entries.get(user_id)
+        return list(ids) if ids is not None else None
+
+    def load_token(self, user_id: str) -> Tuple[int, int]:
+        """Taken before reading from the database and handed back to `put`."""
+        return self._epoch, self._versions.get(user_id, 0)
+
+    def put(self, user_id: str, ids: Iterable[str], token: Tuple[int, int]) -> None:
+        if token == self.load_token(user_id):
+            self._entries.put(user_id, set(ids))
+
+    def _touch(self, user_id: str) -> None:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        if len(self._versions) > self._entries.max_entries * 4:
+            # Forgetting versions is only safe if every load in flight is rejected too
+            self._versions.clear()
+            self._epoch += 1
+
+    def add(self, user_id: str, other_id: str) -> None:
+        self._touch(user_id)
+        ids = self._entries.peek(user_id)
+        if ids is not None:
+            ids.add(other_id)
+
+    def discard(self, user_id: str, other_id: str) -> None:
+        self._touch(user_id)
+        ids = self._entries.peek(user_id)
+        if ids is not None:
+            ids.discard(other_id)
+
+    def invalidate(self, user_id: str) -> None:
+        self._touch(user_id)
+        self._entries.invalidate(user_id)
+
+    def metrics(self) -> dict:
+        return self._entries.metrics()
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from typing import Iterable, Optional, Protocol
+
+from pymongo.errors import OperationFailure
+
+from netlazy.database import db_instance
+
+
+class MirrorTarget(Protocol):
+    def replace_all(self, docs: Iterable[dict]) -> None: ...
+    def apply_document(self, doc: dict) -> None: ...
+    def discard_id(self, doc_id: object) -> None: ...
+    def metrics(self) -> dict: ...
+
+
+class _StreamInvalidated(Exception):
+    pass
+
+
+class MongoMirrorSync:
+    """Keeps an in-memory mirror in step with one collection.
+
+    Follows a change stream when the deployment supports one (replica sets, Atlas).
+    On standalone servers, where opening the stream fails, it falls back to reloading
+    the collection every `poll_interval` seconds. Transient stream errors trigger a
+    full reload before the stream is reopened, so no change is lost across the gap.
+    """
+
+    def __init__(
+        self, target: MirrorTarget, collection_attr: str, projection: dict, label: str, poll_interval: float = 30.0
+    ):
+        self._target = target
+        self._collection_attr = collection_attr
+        self._projection = projection
+        self._label = label
+        self._poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self.mode = "stopped"
+        self.reloads = 0
+        self.changes_applied = 0
+
+    @property
+    def _collection(self):
+        return getattr(db_instance, self._collection_attr)
+
+    async def reload(self) -> None:
+        docs = await self._collection.find({}, self._projection).to_list(length=None)
+        self._target.replace_all(docs)
+        self.reloads += 1
+
+    def apply_change(self, change: dict) -> None:
+        operation = change.get("operationType")
+        if operation in ("insert", "update", "replace"):
+            doc = change.get("fullDocument")
+            if doc is not None:
+                self._target.apply_document(doc)
+        elif operation == "delete":
+            self._target.discard_id(change.get("documentKey", {}).get("_id"))
+        else:
+            # drop / rename / invalidate: the stream is done, caller reloads and reopens
+            raise _StreamInvalidated(operation)
+        self.changes_applied += 1
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        try:
+            await self.reload()
+        except Exception as e:
+            logging.warning(f"[netlazy] Initial {self._label} load failed, using database queries until it succeeds: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.mode = "stopped"
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                await self._follow_stream()
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if self.mode == "change_stream":
+                    # e.g. the resume point fell off the oplog; reopen after a full reload
+                    logging.warning(f"[netlazy] {self._label} change stream failed: {e}. Resyncing")
+                    self.mode = "resyncing"
+                    continue
+                logging.info(
+                    f"[netlazy] {self._label} change stream unavailable ({e.code}); polling every {self._poll_interval}s"
+                )
+                await self._poll()
+            except _StreamInvalidated:
+                pass
+            except Exception as e:
+                logging.warning(f"[netlazy] {self._label} change stream interrupted: {e}. Resyncing in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    async def _follow_stream(self) -> None:
+        async with self._collection.watch(full_document="updateLookup") as stream:
+            # Opening the cursor first means anything written during the reload is still delivered
+            first = await stream.try_next()
+            await self.reload()
+            self.mode = "change_stream"
+            if first is not None:
+                self.apply_change(first)
+            async for change in stream:
+                self.apply_change(change)
+
+    async def _poll(self) -> None:
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logging.warning(f"[netlazy] {self._label} poll failed: {e}")
+
+    def metrics(self) -> dict:
+        return {
+            **self._target.metrics(),
+            "sync_mode": self.mode,
+            "reloads": self.reloads,
+            "changes_applied": self.changes_applied,
+        }
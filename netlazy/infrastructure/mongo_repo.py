@@ -1,15 +1,19 @@
 import random
 from datetime import datetime, timezone
-from typing import List, Optional, Any, Tuple
-from pymongo.errors import DuplicateKeyError
-from pymongo import UpdateOne, ReadPreference
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo import UpdateOne, ReadPreference, ReturnDocument
 from netlazy.database import db_instance
 from netlazy.config import settings
-from netlazy.domain.models import Contact, Handshake, MediaItem, PoWChallenge, Profile, Tag, User, UserAlreadyExistsError
+from netlazy.domain.chain import RatchetOutcome
+from netlazy.domain.models import BanReport, Contact, Handshake, MediaItem, PoWChallenge, Profile, Tag, User, UserAlreadyExistsError
+from netlazy.infrastructure.ban_index import BanIndex
+from netlazy.infrastructure.feed_index import TagBitmapFeedIndex
+from netlazy.infrastructure.interaction_cache import InteractionCache
+from netlazy.infrastructure.user_cache import UserCache
 from netlazy.domain.repository import (
     ChainRepository,
     HandshakeRepository,
-    NonceRepository,
     ProfileRepository,
     SecurityRepository,
     TagRepository,
@@ -18,6 +22,43 @@ from netlazy.domain.repository import (
 )
 
 
+def _trusted_bot_ips() -> set:
+    return {t.strip() for t in settings.trusted_bot_ips.split(",") if t.strip()}
+
+
+# Mirrors the "non-empty profile" rule: anything a viewer could actually see
+_FEED_ELIGIBLE_MATCH = {"$or": [
+    {"bio": {"$nin": ["", None]}},
+    {"tags.0": {"$exists": True}},
+    {"media.0": {"$exists": True}},
+    {"audio": {"$type": "object"}},
+    {"contacts": {"$elemMatch": {"is_private": False, "type": {"$ne": "unknown"}, "value": {"$nin": ["", None]}}}}
+]}
+
+
+# Process-local side effects (in-memory indexes and caches) of writes made inside a
+# transaction, keyed by session and held back until that transaction commits
+_after_commit_actions: Dict[int, List[Callable[[], None]]] = {}
+
+
+def _after_commit(session: Any, action: Callable[[], None]) -> None:
+    pending = _after_commit_actions.get(id(session)) if session is not None else None
+    if pending is None:
+        action()
+    else:
+        pending.append(action)
+
+
+def _is_feed_eligible(profile: Profile) -> bool:
+    return bool(
+        profile.bio
+        or profile.tags
+        or profile.media
+        or profile.audio
+        or any(not c.is_private and c.type != "unknown" and c.value for c in profile.contacts)
+    )
+
+
 def _force_utc(dt: Optional[datetime]) -> Optional[datetime]:
     if dt is None:
         return None
@@ -27,6 +68,9 @@ def _force_utc(dt: Optional[datetime]) -> Optional[datetime]:
 
 
 class MongoUserRepository(UserRepository):
+    def __init__(self, cache: Optional[UserCache] = None):
+        self._cache = cache
+
     async def create(self, user: User, session: Any = None) -> None:
         try:
             await db_instance.users_collection.insert_one({
@@ -43,10 +87,26 @@ class MongoUserRepository(UserRepository):
             raise UserAlreadyExistsError(f"User {user.user_id} already registered")
 
     async def get_by_id(self, user_id: str, session: Any = None) -> Optional[User]:
+        # Transactional reads must see the session's snapshot, never the cache
+        if self._cache and session is None:
+            cached = self._cache.get(user_id)
+            if cached:
+                return cached
+
         doc = await db_instance.users_collection.find_one({"user_id": user_id}, session=session)
         if not doc or "ed25519_public_pem" not in doc:
             return None
-        return self._to_domain(doc)
+        user = self._to_domain(doc)
+        if self._cache and session is None:
+            self._cache.put(user)
+        return user
+
+    async def invalidate(self, user_id: str) -> None:
+        if self._cache:
+            self._cache.invalidate(user_id)
+
+    def cache_metrics(self) -> Optional[dict]:
+        return self._cache.metrics() if self._cache else None
 
     def _to_domain(self, doc: dict) -> User:
         return User(
@@ -64,8 +124,7 @@ class MongoUserRepository(UserRepository):
         if not ip and not fingerprint:
             return
         updates = {}
-        trusted_ips = [t.strip() for t in settings.trusted_bot_ips.split(",") if t.strip()]
-        if ip and ip not in trusted_ips:
+        if ip and ip not in _trusted_bot_ips():
             updates["known_ips"] = ip
         if fingerprint:
             updates["known_fingerprints"] = fingerprint
@@ -74,6 +133,8 @@ class MongoUserRepository(UserRepository):
                 {"user_id": user_id},
                 {"$addToSet": updates, "$set": {"last_ip": ip, "last_active": datetime.now(timezone.utc)}}
             )
+            if self._cache:
+                self._cache.note_footprint(user_id, updates.get("known_ips"), updates.get("known_fingerprints"))
 
     async def get_last_activity(self, user_id: str) -> Tuple[Optional[str], Optional[int]]:
         doc = await db_instance.users_collection.find_one({"user_id": user_id}, {"last_ip": 1, "last_active": 1})
@@ -91,10 +152,29 @@ class MongoUserRepository(UserRepository):
             {"$inc": {"risk_score": score_delta}},
             return_document=True
         )
+        await self.invalidate(user_id)
         return doc.get("risk_score", 0.0) if doc else 0.0
 
+    async def increment_risk_scores(self, deltas: Dict[str, float]) -> Dict[str, float]:
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta > 0}
+        if not deltas:
+            return {}
+        await db_instance.users_collection.bulk_write([
+            UpdateOne({"user_id": user_id, "is_banned": {"$ne": True}}, {"$inc": {"risk_score": delta}})
+            for user_id, delta in deltas.items()
+        ], ordered=False)
+        cursor = db_instance.users_collection.find(
+            {"user_id": {"$in": list(deltas)}, "is_banned": {"$ne": True}},
+            {"user_id": 1, "risk_score": 1}
+        )
+        scores = {doc["user_id"]: doc.get("risk_score", 0.0) async for doc in cursor}
+        for user_id in deltas:
+            await self.invalidate(user_id)
+        return scores
+
     async def delete(self, user_id: str, session: Any = None) -> None:
         await db_instance.users_collection.delete_one({"user_id": user_id}, session=session)
+        await self.invalidate(user_id)
 
     async def get_active_user_ids(self, user_ids: List[str]) -> List[str]:
         cursor = db_instance.users_collection.find({
@@ -103,24 +183,37 @@ class MongoUserRepository(UserRepository):
         }, {"user_id": 1})
         return [doc["user_id"] async for doc in cursor]
 
+    async def find_linked(
+        self, ips: List[str], fingerprints: List[str], exclude_user_ids: List[str], limit: int
+    ) -> List[User]:
+        # Shared proxies would link every account behind them, so trusted IPs never form an edge
+        trusted_ips = _trusted_bot_ips()
+        ips = [ip for ip in ips if ip not in trusted_ips]
+        clauses = []
+        if ips:
+            clauses.append({"known_ips": {"$in": ips}})
+        if fingerprints:
+            clauses.append({"known_fingerprints": {"$in": fingerprints}})
+        if not clauses or limit <= 0:
+            return []
 
-class MongoNonceRepository(NonceRepository):
-    async def insert_if_not_exists(self, user_id: str, nonce: str) -> bool:
-        try:
-            await db_instance.used_nonces_collection.insert_one({
-                "nonce": nonce,
-                "user_id": user_id,
-                "created_at": datetime.now(timezone.utc),
-            })
-            return True
-        except DuplicateKeyError:
-            return False
-
-    async def delete_for_user(self, user_id: str, session: Any = None) -> None:
-        await db_instance.used_nonces_collection.delete_many({"user_id": user_id}, session=session)
+        cursor = db_instance.users_collection.find({
+            "$or": clauses,
+            "user_id": {"$nin": exclude_user_ids},
+            "ed25519_public_pem": {"$exists": True}
+        }).limit(limit)
+        return [self._to_domain(doc) async for doc in cursor]
 
 
 class MongoSecurityRepository(SecurityRepository):
+    def __init__(
+        self, user_cache: Optional[UserCache] = None, ban_index: Optional[BanIndex] = None,
+        feed_index: Optional[TagBitmapFeedIndex] = None
+    ):
+        self._user_cache = user_cache
+        self._ban_index = ban_index
+        self._feed_index = feed_index
+
     async def create_challenge(self, challenge: PoWChallenge) -> None:
         await db_instance.challenges_collection.insert_one({
             "id": challenge.id,
@@ -135,6 +228,9 @@ class MongoSecurityRepository(SecurityRepository):
         return PoWChallenge(id=doc["id"], difficulty=doc["difficulty"], created_at=_force_utc(doc["created_at"]))
 
     async def is_banned(self, ip: str, fingerprint: str, user_id: Optional[str] = None) -> bool:
+        if self._ban_index is not None and self._ban_index.ready:
+            return self._ban_index.contains(ip, fingerprint, user_id)
+
         queries = []
         if ip:
             queries.append({"type": "ip", "value": ip})
@@ -148,22 +244,55 @@ class MongoSecurityRepository(SecurityRepository):
         doc = await db_instance.bans_collection.find_one({"$or": queries})
         return doc is not None
 
-    async def apply_bans(self, ips: List[str], fingerprints: List[str], user_id: str) -> None:
-        trusted_ips = [t.strip() for t in settings.trusted_bot_ips.split(",") if t.strip()]
-        ips_to_ban = [ip for ip in ips if ip not in trusted_ips]
+    async def apply_bans(self, ips: List[str], fingerprints: List[str], user_ids: List[str]) -> BanReport:
+        trusted_ips = _trusted_bot_ips()
+        ips_to_ban = [ip for ip in dict.fromkeys(ips) if ip not in trusted_ips]
+        fingerprints = list(dict.fromkeys(fingerprints))
+        user_ids = list(dict.fromkeys(user_ids))
 
-        ops = []
-        for ip in ips_to_ban:
-            ops.append({"type": "ip", "value": ip, "created_at": datetime.now(timezone.utc)})
-        for fp in fingerprints:
-            ops.append({"type": "fingerprint", "value": fp, "created_at": datetime.now(timezone.utc)})
-        ops.append({"type": "user_id", "value": user_id, "created_at": datetime.now(timezone.utc)})
+        keys = (
+            [("ip", ip) for ip in ips_to_ban]
+            + [("fingerprint", fp) for fp in fingerprints]
+            + [("user_id", uid) for uid in user_ids]
+        )
+        report = BanReport(user_ids=user_ids, ips=len(ips_to_ban), fingerprints=len(fingerprints))
+        if not keys:
+            return report
 
-        for op in ops:
-            await db_instance.bans_collection.update_one(
-                {"type": op["type"], "value": op["value"]}, {"$set": op}, upsert=True
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne({"type": ban_type, "value": value}, {"$setOnInsert": {"created_at": now}}, upsert=True)
+            for ban_type, value in keys
+        ]
+        try:
+            result = await db_instance.bans_collection.bulk_write(operations, ordered=False)
+            report.bans_created = result.upserted_count
+            report.bans_existing = result.matched_count
+        except BulkWriteError as e:
+            # A concurrent ban of the same footprint wins the upsert race; the ban exists either way
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            report.bans_created = e.details.get("nUpserted", 0)
+            report.bans_existing = len(keys) - report.bans_created
+
+        if user_ids:
+            flagged = await db_instance.users_collection.update_many(
+                {"user_id": {"$in": user_ids}}, {"$set": {"is_banned": True}}
             )
-        await db_instance.users_collection.update_one({"user_id": user_id}, {"$set": {"is_banned": True}})
+            report.users_flagged = flagged.modified_count
+            await db_instance.feed_candidates_collection.delete_many({"user_id": {"$in": user_ids}})
+            if self._feed_index is not None:
+                for uid in user_ids:
+                    self._feed_index.remove(uid)
+
+        if self._ban_index is not None:
+            # The change stream catches up other workers; this one enforces the ban immediately
+            for ban_type, value in keys:
+                self._ban_index.add(ban_type, value)
+        if self._user_cache:
+            for uid in user_ids:
+                self._user_cache.invalidate(uid)
+        return report
 
     async def remove_bans(self, ips: List[str], fingerprints: List[str], user_id: str) -> None:
         ops = []
@@ -175,6 +304,27 @@ class MongoSecurityRepository(SecurityRepository):
 
         if ops:
             await db_instance.bans_collection.delete_many({"$or": ops})
+            if self._ban_index is not None:
+                for op in ops:
+                    self._ban_index.discard(op["type"], op["value"])
+
+        await db_instance.users_collection.update_one({"user_id": user_id}, {"$set": {"is_banned": False}})
+        if self._user_cache:
+            self._user_cache.invalidate(user_id)
+
+        # apply_bans dropped the feed candidate; restore it if the profile still qualifies
+        doc = await db_instance.profiles_collection.find_one(
+            {"user_id": user_id, **_FEED_ELIGIBLE_MATCH}, {"_id": 0, "tags": 1, "random_index": 1}
+        )
+        if doc is not None:
+            tags = doc.get("tags") or []
+            await db_instance.feed_candidates_collection.update_one(
+                {"user_id": user_id},
+                {"$set": {"tags": tags, "random_index": doc.get("random_index")}},
+                upsert=True
+            )
+            if self._feed_index is not None:
+                self._feed_index.upsert(user_id, tags)
 
 
 class MongoTagRepository(TagRepository):
@@ -272,6 +422,9 @@ class MongoTagRepository(TagRepository):
 
 
 class MongoProfileRepository(ProfileRepository):
+    def __init__(self, feed_index: Optional[TagBitmapFeedIndex] = None):
+        self._feed_index = feed_index
+
     async def get_by_user_id(self, user_id: str, session: Any = None) -> Optional[Profile]:
         doc = await db_instance.profiles_collection.find_one({"user_id": user_id}, session=session)
         if not doc:
@@ -289,98 +442,134 @@ class MongoProfileRepository(ProfileRepository):
             upsert=True,
             session=session
         )
+        await self._sync_feed_candidate(profile, session=session)
 
-    async def get_feed(
-        self, viewer_id: str, exclude_ids: List[str], requires: List[str], excludes: List[str],
-        bonus: List[str], abonus: List[str], limit: int
-    ) -> List[Profile]:
-        ignored = exclude_ids + [viewer_id]
-        base_match = {"user_id": {"$nin": ignored}}
-
-        if requires:
-            base_match["tags"] = {"$all": requires}
-        if excludes:
-            base_match.setdefault("tags", {})["$nin"] = excludes
-
-        base_match["$or"] = [
-            {"bio": {"$nin": ["", None]}},
-            {"tags.0": {"$exists": True}},
-            {"media.0": {"$exists": True}},
-            {"audio": {"$type": "object"}},
-            {"contacts": {"$elemMatch": {"is_private": False, "type": {"$ne": "unknown"}, "value": {"$nin": ["", None]}}}}
-        ]
-
-        rand_val = random.random()
-        fetch_limit = limit * 10
+    async def _sync_feed_candidate(self, profile: Profile, session: Any = None) -> None:
+        if _is_feed_eligible(profile):
+            await db_instance.feed_candidates_collection.update_one(
+                {"user_id": profile.user_id},
+                {"$set": {"tags": profile.tags, "random_index": profile.random_index}},
+                upsert=True,
+                session=session
+            )
+            if self._feed_index is not None:
+                _after_commit(session, lambda: self._feed_index.upsert(profile.user_id, profile.tags))
+        else:
+            await db_instance.feed_candidates_collection.delete_one({"user_id": profile.user_id}, session=session)
+            if self._feed_index is not None:
+                _after_commit(session, lambda: self._feed_index.remove(profile.user_id))
+
+    async def rebuild_feed_candidates(self, only_if_empty: bool = True) -> Optional[int]:
+        """Backfills `feed_candidates` from profiles; the one place that still joins against users.
+
+        A forced rebuild (`only_if_empty=False`) also prunes candidates whose profile is
+        gone or no longer eligible, or whose user is banned, so drift left by missed
+        writes is reconciled rather than only topped up.
+        """
+        if only_if_empty and await db_instance.feed_candidates_collection.find_one({}, {"_id": 1}):
+            return None
+        await db_instance.profiles_collection.aggregate([
+            {"$match": _FEED_ELIGIBLE_MATCH},
+            {"$lookup": {
+                "from": "users",
+                "localField": "user_id",
+                "foreignField": "user_id",
+                "as": "user_info"
+            }},
+            {"$match": {"user_info.is_banned": {"$ne": True}}},
+            {"$project": {"_id": 0, "user_id": 1, "tags": {"$ifNull": ["$tags", []]}, "random_index": 1}},
+            {"$merge": {"into": "feed_candidates", "on": "user_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]).to_list(length=None)
 
-        async def fetch_profiles(direction_match):
-            pipeline = [
-                {"$match": {**base_match, **direction_match}},
+        if not only_if_empty:
+            stale = await db_instance.feed_candidates_collection.aggregate([
                 {"$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "user_id",
-                    "as": "user_info"
+                    "from": "profiles",
+                    "let": {"uid": "$user_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$user_id", "$$uid"]}}},
+                        {"$match": _FEED_ELIGIBLE_MATCH},
+                        {"$project": {"_id": 1}}
+                    ],
+                    "as": "profile"
                 }},
-                {"$match": {"user_info.is_banned": {"$ne": True}}},
-                {"$sort": {"random_index": 1}},
-                {"$limit": fetch_limit}
-            ]
-            db_cursor = db_instance.profiles_collection.aggregate(pipeline)
-            docs = [self._to_domain(doc) async for doc in db_cursor]
-
-            for p in docs:
-                if bonus or abonus:
-                    bonus_score = len(set(p.tags) & set(bonus))
-                    abonus_score = len(set(p.tags) & set(abonus))
-                    p.score = bonus_score - abonus_score
-                else:
-                    p.score = 0
-
-            docs.sort(key=lambda x: (x.score, -x.random_index), reverse=True)
-            return docs[:limit]
-
-        results = await fetch_profiles({"random_index": {"$gte": rand_val}})
-
-        if len(results) < limit:
-            needed = limit - len(results)
-            found_ids = [r.user_id for r in results]
-
-            wrap_match = {"random_index": {"$lt": rand_val}}
-            wrap_base_match = base_match.copy()
-            wrap_base_match["user_id"] = {"$nin": ignored + found_ids}
-
-            pipeline = [
-                {"$match": {**wrap_base_match, **wrap_match}},
                 {"$lookup": {
                     "from": "users",
                     "localField": "user_id",
                     "foreignField": "user_id",
                     "as": "user_info"
                 }},
-                {"$match": {"user_info.is_banned": {"$ne": True}}},
-                {"$sort": {"random_index": 1}},
-                {"$limit": needed * 10}
-            ]
+                {"$match": {"$or": [{"profile": {"$size": 0}}, {"user_info.is_banned": True}]}},
+                {"$project": {"_id": 0, "user_id": 1}}
+            ]).to_list(length=None)
+            stale_ids = [doc["user_id"] for doc in stale]
+            if stale_ids:
+                await db_instance.feed_candidates_collection.delete_many({"user_id": {"$in": stale_ids}})
+                if self._feed_index is not None:
+                    for user_id in stale_ids:
+                        self._feed_index.remove(user_id)
+        return await db_instance.feed_candidates_collection.count_documents({})
 
-            wrap_cursor = db_instance.profiles_collection.aggregate(pipeline)
-            wrap_docs = [self._to_domain(doc) async for doc in wrap_cursor]
+    async def get_feed(
+        self, viewer_id: str, exclude_ids: List[str], requires: List[str], excludes: List[str],
+        bonus: List[str], abonus: List[str], limit: int
+    ) -> List[Profile]:
+        ignored = exclude_ids + [viewer_id]
+        if self._feed_index is not None and self._feed_index.ready:
+            ranked = [
+                (score, 0.0, user_id)
+                for user_id, score in self._feed_index.rank(ignored, requires, excludes, bonus, abonus, limit)
+            ]
+            return await self._hydrate_ranked(ranked)
 
-            for p in wrap_docs:
-                if bonus or abonus:
-                    bonus_score = len(set(p.tags) & set(bonus))
-                    abonus_score = len(set(p.tags) & set(abonus))
-                    p.score = bonus_score - abonus_score
-                else:
-                    p.score = 0
+        base_match = {"user_id": {"$nin": ignored}}
 
-            wrap_docs.sort(key=lambda x: (x.score, -x.random_index), reverse=True)
-            results.extend(wrap_docs[:needed])
+        if requires:
+            base_match["tags"] = {"$all": requires}
+        if excludes:
+            base_match.setdefault("tags", {})["$nin"] = excludes
 
+        rand_val = random.random()
+        bonus_set, abonus_set = set(bonus), set(abonus)
+
+        async def fetch_candidates(match: dict, wanted: int) -> List[Tuple[int, float, str]]:
+            # Candidates hold only what ranking needs, so oversampling stays cheap
+            cursor = db_instance.feed_candidates_collection.find(
+                match, {"_id": 0, "user_id": 1, "tags": 1, "random_index": 1}
+            ).sort("random_index", 1).limit(wanted * 10)
+            ranked = []
+            async for doc in cursor:
+                tags = set(doc.get("tags", []))
+                score = len(tags & bonus_set) - len(tags & abonus_set) if (bonus_set or abonus_set) else 0
+                ranked.append((score, doc["random_index"], doc["user_id"]))
+            ranked.sort(key=lambda c: (c[0], -c[1]), reverse=True)
+            return ranked[:wanted]
+
+        ranked = await fetch_candidates({**base_match, "random_index": {"$gte": rand_val}}, limit)
+
+        if len(ranked) < limit:
+            wrap_match = {**base_match, "user_id": {"$nin": ignored + [c[2] for c in ranked]}}
+            wrap_match["random_index"] = {"$lt": rand_val}
+            ranked.extend(await fetch_candidates(wrap_match, limit - len(ranked)))
+        return await self._hydrate_ranked(ranked)
+
+    async def _hydrate_ranked(self, ranked: List[Tuple[int, float, str]]) -> List[Profile]:
+        if not ranked:
+            return []
+        profiles = {p.user_id: p for p in await self.get_by_user_ids([c[2] for c in ranked])}
+        results = []
+        for score, _, user_id in ranked:
+            profile = profiles.get(user_id)
+            if profile is not None:
+                profile.score = score
+                results.append(profile)
         return results
 
     async def delete(self, user_id: str, session: Any = None) -> None:
         await db_instance.profiles_collection.delete_one({"user_id": user_id}, session=session)
+        await db_instance.feed_candidates_collection.delete_one({"user_id": user_id}, session=session)
+        if self._feed_index is not None:
+            _after_commit(session, lambda: self._feed_index.remove(user_id))
 
     async def count_media_usage(self, file_hash: str) -> int:
         if not file_hash:
@@ -459,17 +648,41 @@ class MongoProfileRepository(ProfileRepository):
 
 
 class MongoHandshakeRepository(HandshakeRepository):
+    def __init__(self, interaction_cache: Optional[InteractionCache] = None):
+        self._interactions = interaction_cache
+
     async def create(self, handshake: Handshake) -> None:
         await db_instance.handshakes_collection.insert_one(self._to_doc(handshake))
+        self._note_interaction(handshake)
+
+    async def update(self, handshake: Handshake, session: Any = None) -> None:
+        await db_instance.handshakes_collection.update_one(
+            {"id": handshake.id}, {"$set": self._to_doc(handshake)}, session=session
+        )
+        _after_commit(session, lambda: self._note_interaction(handshake))
 
-    async def update(self, handshake: Handshake) -> None:
-        await db_instance.handshakes_collection.update_one({"id": handshake.id}, {"$set": self._to_doc(handshake)})
+    def _note_interaction(self, h: Handshake) -> None:
+        if self._interactions is None:
+            return
+        # A hidden side may still see the other user through another handshake, so reload rather than guess
+        for user_id, other_id, deleted in (
+            (h.sender_id, h.receiver_id, h.sender_deleted), (h.receiver_id, h.sender_id, h.receiver_deleted)
+        ):
+            if deleted:
+                self._interactions.invalidate(user_id)
+            else:
+                self._interactions.add(user_id, other_id)
 
     async def delete(self, handshake_id: str) -> None:
-        await db_instance.handshakes_collection.delete_one({"id": handshake_id})
+        doc = await db_instance.handshakes_collection.find_one_and_delete(
+            {"id": handshake_id}, projection={"_id": 0, "sender_id": 1, "receiver_id": 1}
+        )
+        if doc and self._interactions is not None:
+            self._interactions.invalidate(doc["sender_id"])
+            self._interactions.invalidate(doc["receiver_id"])
 
-    async def get_by_id(self, handshake_id: str) -> Optional[Handshake]:
-        doc = await db_instance.handshakes_collection.find_one({"id": handshake_id})
+    async def get_by_id(self, handshake_id: str, session: Any = None) -> Optional[Handshake]:
+        doc = await db_instance.handshakes_collection.find_one({"id": handshake_id}, session=session)
         return self._to_domain(doc) if doc else None
 
     async def get_between_users(self, user_id_1: str, user_id_2: str) -> Optional[Handshake]:
@@ -491,18 +704,27 @@ class MongoHandshakeRepository(HandshakeRepository):
         return [self._to_domain(doc) async for doc in cursor]
 
     async def get_interacted_user_ids(self, user_id: str) -> List[str]:
+        if self._interactions is not None:
+            cached = self._interactions.get(user_id)
+            if cached is not None:
+                return cached
+            token = self._interactions.load_token(user_id)
+
+        # Both branches are covered by the (party, party_deleted, other party) indexes
         cursor = db_instance.handshakes_collection.find({
             "$or": [
                 {"sender_id": user_id, "sender_deleted": {"$ne": True}},
                 {"receiver_id": user_id, "receiver_deleted": {"$ne": True}}
             ]
-        })
+        }, {"_id": 0, "sender_id": 1, "receiver_id": 1})
         interacted = set()
         async for doc in cursor:
             if doc["sender_id"] == user_id:
                 interacted.add(doc["receiver_id"])
             else:
                 interacted.add(doc["sender_id"])
+        if self._interactions is not None:
+            self._interactions.put(user_id, interacted, token)
         return list(interacted)
 
     async def delete_for_user(self, user_id: str, session: Any = None) -> None:
@@ -510,6 +732,16 @@ class MongoHandshakeRepository(HandshakeRepository):
             {"$or": [{"sender_id": user_id}, {"receiver_id": user_id}]},
             session=session
         )
+        # Counterparts keep the retired id in their sets until expiry; it matches no profile
+        if self._interactions is not None:
+            _after_commit(session, lambda: self._interactions.invalidate(user_id))
+
+    async def invalidate_interactions(self, user_id: str) -> None:
+        if self._interactions is not None:
+            self._interactions.invalidate(user_id)
+
+    def cache_metrics(self) -> Optional[dict]:
+        return self._interactions.metrics() if self._interactions else None
 
     def _to_doc(self, h: Handshake) -> dict:
         return {
@@ -537,7 +769,19 @@ class MongoHandshakeRepository(HandshakeRepository):
 class MongoTransactionManager(TransactionManager):
     async def execute_in_transaction(self, callback: Any) -> Any:
         async with await db_instance.client.start_session() as session:
-            return await session.with_transaction(callback, read_preference=ReadPreference.PRIMARY)
+            async def attempt(s):
+                # with_transaction may rerun the callback; only the committed attempt's actions count
+                _after_commit_actions[id(s)] = []
+                return await callback(s)
+
+            try:
+                result = await session.with_transaction(attempt, read_preference=ReadPreference.PRIMARY)
+                actions = _after_commit_actions.get(id(session), [])
+            finally:
+                _after_commit_actions.pop(id(session), None)
+            for action in actions:
+                action()
+            return result
 
 
 class MongoChainRepository(ChainRepository):
@@ -558,5 +802,50 @@ class MongoChainRepository(ChainRepository):
             session=session
         )
 
+    @staticmethod
+    def _record_nonce(nonce: str, retention_seconds: int) -> dict:
+        # Expired nonces are pruned on every write; the timestamp window already rejects their replays
+        return {"$concatArrays": [
+            {"$filter": {
+                "input": {"$ifNull": ["$nonces", []]},
+                "cond": {"$gt": ["$$this.t", {"$subtract": ["$$NOW", retention_seconds * 1000]}]}
+            }},
+            [{"n": nonce, "t": "$$NOW"}]
+        ]}
+
+    async def advance(
+        self, user_id: str, prev_anchor: str, next_anchor: str, nonce: str,
+        nonce_retention_seconds: int, window_size: int = 5
+    ) -> RatchetOutcome:
+        result = await db_instance.chains_collection.update_one(
+            {"user_id": user_id, "anchors": prev_anchor, "nonces.n": {"$ne": nonce}},
+            [{"$set": {
+                "anchors": {"$slice": [{"$concatArrays": ["$anchors", [next_anchor]]}, -window_size]},
+                "nonces": self._record_nonce(nonce, nonce_retention_seconds)
+            }}]
+        )
+        if result.matched_count:
+            return RatchetOutcome.ADVANCED
+
+        # Only rejected requests pay for a second read to report why
+        doc = await db_instance.chains_collection.find_one(
+            {"user_id": user_id}, {"nonces": {"$elemMatch": {"n": nonce}}}
+        )
+        if doc and doc.get("nonces"):
+            return RatchetOutcome.NONCE_REUSED
+        return RatchetOutcome.ANCHOR_UNKNOWN
+
+    async def consume_nonce(self, user_id: str, nonce: str, nonce_retention_seconds: int) -> Optional[List[str]]:
+        doc = await db_instance.chains_collection.find_one_and_update(
+            {"user_id": user_id, "nonces.n": {"$ne": nonce}},
+            [{"$set": {"nonces": self._record_nonce(nonce, nonce_retention_seconds)}}],
+            projection={"anchors": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc:
+            return doc.get("anchors", [])
+        exists = await db_instance.chains_collection.find_one({"user_id": user_id}, {"_id": 1})
+        return None if exists else []
+
     async def delete_for_user(self, user_id: str, session: Any = None) -> None:
         await db_instance.chains_collection.delete_one({"user_id": user_id}, session=session)
\ No newline at end of file
@@ -0,0 +1,179 @@
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from netlazy.domain.models import PoWChallenge
+from netlazy.domain.repository import ChallengeIssuerPort
+
+
+class SpentTokenSet:
+    """Remembers redeemed challenge ids until their tokens expire.
+
+    Entries are spread over `shards` dicts keyed by a hash of the id, and each insert
+    sweeps expired entries from its own shard at most once per `sweep_interval`, so
+    cleanup cost stays proportional to one shard rather than the whole set. Once
+    `max_entries` live tokens are held, further redemptions are refused until some expire.
+    """
+
+    def __init__(self, shards: int = 16, max_entries: int = 200_000, sweep_interval: float = 5.0):
+        self._shards: List[Dict[str, float]] = [{} for _ in range(shards)]
+        self._next_sweep = [0.0] * shards
+        self._max_entries = max_entries
+        self._sweep_interval = sweep_interval
+        self._size = 0
+        self.replays = 0
+        self.refused = 0
+
+    def _sweep(self, index: int, now: float) -> None:
+        shard = self._shards[index]
+        expired = [key for key, expires_at in shard.items() if expires_at <= now]
+        for key in expired:
+            del shard[key]
+        self._size -= len(expired)
+        self._next_sweep[index] = now + self._sweep_interval
+
+    def add(self, key: str, expires_at: float) -> bool:
+        now = time.time()
+        index = hash(key) % len(self._shards)
+        if now >= self._next_sweep[index]:
+            self._sweep(index, now)
+
+        shard = self._shards[index]
+        existing = shard.get(key)
+        if existing is not None and existing > now:
+            self.replays += 1
+            return False
+
+        if self._size >= self._max_entries:
+            for i in range(len(self._shards)):
+                self._sweep(i, now)
+            if self._size >= self._max_entries:
+                self.refused += 1
+                return False
+
+        if existing is None:
+            self._size += 1
+        shard[key] = expires_at
+        return True
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class HmacChallengeIssuer(ChallengeIssuerPort):
+    """Self-contained PoW challenges: `<id>.<difficulty>.<expires>.<mac>`.
+
+    The MAC covers the visible fields plus an optional client key (the caller's IP),
+    so a token cannot be re-targeted, extended or handed to another client. The whole
+    token is the challenge id clients hash with their nonce, which keeps the existing
+    `sha256(challenge_id + nonce)` puzzle and client code unchanged. Every worker must
+    share the same secret: without a configured one, a random secret is generated and
+    `start` settles on a single value through the hub's shared state when it is
+    cross-worker. Spent ids are remembered in process and, when the hub's
+    shared state is cross-worker, also there until the token expires, so a solution
+    cannot be replayed against another worker.
+    """
+
+    SPENT_KEY_PREFIX = "netlazy:pow_spent:"
+    SECRET_KEY = "netlazy:pow_secret"
+    # Effectively permanent; deleting the entry rotates the secret on the next restart
+    SHARED_SECRET_TTL = 10 * 365 * 24 * 60 * 60
+
+    def __init__(
+        self, secret: Optional[bytes] = None, ttl_seconds: int = 300,
+        spent: Optional[SpentTokenSet] = None, shared_state=None
+    ):
+        self._secret_source = "configured" if secret else "generated"
+        self._secret = secret or secrets.token_bytes(32)
+        self._ttl = ttl_seconds
+        self._spent = spent or SpentTokenSet()
+        self._shared_state = shared_state
+        self.issued = 0
+        self.rejected = 0
+        self.shared_replays = 0
+
+    async def start(self) -> None:
+        """Adopts the cross-worker generated secret; configured secrets are left alone."""
+        if self._secret_source == "configured" or self._shared_state is None or not self._shared_state.shared:
+            return
+        # The first worker to store its candidate wins; everyone else reads it back
+        await self._shared_state.cache_add(self.SECRET_KEY, self._secret.hex(), self.SHARED_SECRET_TTL)
+        stored = await self._shared_state.cache_get(self.SECRET_KEY)
+        if not stored:
+            raise RuntimeError("Could not agree on a proof-of-work secret through shared state")
+        self._secret = bytes.fromhex(stored)
+        self._secret_source = "shared"
+
+    def _mac(self, body: str, client_key: str) -> str:
+        digest = hmac.new(self._secret, f"{body}|{client_key}".encode("utf-8"), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:16]).rstrip(b"=").decode("ascii")
+
+    def issue(self, difficulty: int, client_key: str = "") -> PoWChallenge:
+        now = int(time.time())
+        body = f"{secrets.token_hex(8)}.{difficulty}.{now + self._ttl}"
+        self.issued += 1
+        return PoWChallenge(
+            id=f"{body}.{self._mac(body, client_key)}",
+            difficulty=difficulty,
+            created_at=datetime.fromtimestamp(now, timezone.utc)
+        )
+
+    def open(self, challenge_id: str, client_key: str = "") -> Optional[PoWChallenge]:
+        parts = challenge_id.split(".") if challenge_id else []
+        if len(parts) != 4:
+            self.rejected += 1
+            return None
+        body, mac = challenge_id.rsplit(".", 1)
+        if not hmac.compare_digest(mac, self._mac(body, client_key)):
+            self.rejected += 1
+            return None
+
+        try:
+            difficulty, expires_at = int(parts[1]), int(parts[2])
+        except ValueError:
+            self.rejected += 1
+            return None
+        if expires_at <= time.time():
+            self.rejected += 1
+            return None
+        return PoWChallenge(
+            id=challenge_id,
+            difficulty=difficulty,
+            created_at=datetime.fromtimestamp(expires_at - self._ttl, timezone.utc)
+        )
+
+    async def mark_spent(self, challenge_id: str) -> bool:
+        token_id = challenge_id.split(".", 1)[0]
+        expires_at = float(challenge_id.split(".")[2])
+        if not self._spent.add(token_id, expires_at):
+            return False
+        if self._shared_state is None or not self._shared_state.shared:
+            return True
+        try:
+            added = await self._shared_state.cache_add(
+                self.SPENT_KEY_PREFIX + token_id, True, max(expires_at - time.time(), 1.0)
+            )
+        except Exception as e:
+            # The local record still stops replays against this worker
+            logging.warning(f"[netlazy] Could not record spent PoW token in shared state: {e}")
+            return True
+        if not added:
+            self.shared_replays += 1
+        return added
+
+    def metrics(self) -> dict:
+        return {
+            "mode": "stateless",
+            "secret": self._secret_source,
+            "ttl_seconds": self._ttl,
+            "issued": self.issued,
+            "rejected": self.rejected,
+            "spent_tracked": len(self._spent),
+            "replays": self._spent.replays + self.shared_replays,
+            "spent_set_full": self._spent.refused,
+        }
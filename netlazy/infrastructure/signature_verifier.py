@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from netlazy.domain.repository import HybridCryptoPort, SignatureVerifierPort, VerifierSaturatedError
+
+
+class LatencyHistogram:
+    BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+    def __init__(self):
+        self._counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if value_ms <= bound:
+                self._counts[i] += 1
+                break
+        else:
+            self._counts[-1] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in self.BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(labels, self._counts)),
+        }
+
+
+def _timed_verify(crypto_port: HybridCryptoPort, args: tuple) -> Tuple[float, Optional[Exception]]:
+    started = time.perf_counter()
+    try:
+        crypto_port.verify_hybrid_signature(*args)
+        error = None
+    except Exception as e:
+        error = e
+    return (time.perf_counter() - started) * 1000, error
+
+
+_process_crypto_port: Optional[HybridCryptoPort] = None
+
+
+def _verify_in_worker_process(args: tuple) -> Tuple[float, Optional[Exception]]:
+    # Key objects can't cross process boundaries, so each worker keeps its own adapter and key cache
+    global _process_crypto_port
+    if _process_crypto_port is None:
+        from netlazy.infrastructure.crypto_adapter import CryptographyHybridAdapter
+        _process_crypto_port = CryptographyHybridAdapter()
+    return _timed_verify(_process_crypto_port, args)
+
+
+class ExecutorSignatureVerifier(SignatureVerifierPort):
+    """Runs hybrid signature checks off the event loop with bounded admission.
+
+    The default thread pool is enough because OpenSSL releases the GIL during
+    verification; a process pool can be selected for deployments where it does not.
+    At most `max_pending` checks may be queued or running, beyond which callers get
+    `VerifierSaturatedError` immediately instead of waiting behind the backlog.
+    """
+
+    def __init__(
+        self,
+        crypto_port: HybridCryptoPort,
+        max_workers: Optional[int] = None,
+        max_pending: int = 64,
+        use_processes: bool = False
+    ):
+        self._crypto_port = crypto_port
+        self._max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._max_pending = max_pending
+        self._use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram()
+        self.verify_time = LatencyHistogram()
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the module never forks or spawns threads
+        if self._executor is None:
+            if self._use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="netlazy-verify")
+        return self._executor
+
+    async def verify(
+        self,
+        ed25519_public_pem: str,
+        mldsa_public_hex: str,
+        payload: bytes,
+        ed25519_sig: bytes,
+        mldsa_sig: bytes
+    ) -> None:
+        if self._pending >= self._max_pending:
+            self.rejected += 1
+            raise VerifierSaturatedError("Signature verification queue is full")
+
+        args = (ed25519_public_pem, mldsa_public_hex, payload, ed25519_sig, mldsa_sig)
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            if self._use_processes:
+                elapsed_ms, error = await loop.run_in_executor(self._get_executor(), _verify_in_worker_process, args)
+            else:
+                elapsed_ms, error = await loop.run_in_executor(self._get_executor(), _timed_verify, self._crypto_port, args)
+        finally:
+            self._pending -= 1
+
+        total_ms = (time.perf_counter() - submitted) * 1000
+        self.verify_time.observe(elapsed_ms)
+        self.queue_wait.observe(max(total_ms - elapsed_ms, 0.0))
+        if error is not None:
+            raise error
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def metrics(self) -> dict:
+        return {
+            "mode": "process" if self._use_processes else "thread",
+            "workers": self._max_workers,
+            "max_pending": self._max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.snapshot(),
+            "verify": self.verify_time.snapshot(),
+        }
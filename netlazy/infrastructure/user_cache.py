@@ -0,0 +1,46 @@
+import dataclasses
+from typing import Optional
+
+from netlazy.domain.models import User
+from netlazy.infrastructure.ttl_cache import TtlLruCache
+
+
+class UserCache:
+    """Bounded TTL/LRU cache of decoded users for the signed-request hot path.
+
+    Writers in this process invalidate entries explicitly; the TTL bounds how long a
+    change made by another worker can go unnoticed.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30.0):
+        self._entries: TtlLruCache[User] = TtlLruCache(max_entries, ttl_seconds)
+
+    @staticmethod
+    def _copy(user: User) -> User:
+        # Callers own what they get back; the cached record must not change under us
+        return dataclasses.replace(
+            user, known_ips=list(user.known_ips), known_fingerprints=list(user.known_fingerprints)
+        )
+
+    def get(self, user_id: str) -> Optional[User]:
+        user = self._entries.get(user_id)
+        return self._copy(user) if user is not None else None
+
+    def put(self, user: User) -> None:
+        self._entries.put(user.user_id, self._copy(user))
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.invalidate(user_id)
+
+    def note_footprint(self, user_id: str, ip: Optional[str], fingerprint: Optional[str]) -> None:
+        """Mirrors a `$addToSet` footprint update so cached records stay usable for cascade bans."""
+        user = self._entries.peek(user_id)
+        if user is None:
+            return
+        if ip and ip not in user.known_ips:
+            user.known_ips.append(ip)
+        if fingerprint and fingerprint not in user.known_fingerprints:
+            user.known_fingerprints.append(fingerprint)
+
+    def metrics(self) -> dict:
+        return self._entries.metrics()
@@ -18,8 +18,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from netlazy.config import settings
 from netlazy.database import connect_to_mongo, close_mongo_connection, db_instance, DatabaseUnavailableError
 from netlazy.presentation.route_handler import NetlazyRoute
-from netlazy.presentation import auth_router, profile_router, tag_router, feed_router, inbox_router, security_router
-from netlazy.presentation.dependencies import tag_service
+from netlazy.presentation import auth_router, batch_router, profile_router, tag_router, feed_router, inbox_router, security_router
+from netlazy.presentation.dependencies import (
+    ban_index_sync, challenge_issuer, feed_index_sync, profile_repo, risk_engine, security_service, signature_verifier, tag_service
+)
+
+try:
+    from shared_state import shared_state as hub_shared_state
+except ImportError:
+    hub_shared_state = None
 
 mimetypes.add_type("application/javascript", ".js")
 mimetypes.add_type("text/css", ".css")
@@ -123,12 +130,28 @@ async def startup_clients():
     synced_count = await tag_service.sync_from_yaml(settings.tags_yaml_path)
     logging.info(f"[netlazy] Tag registry synced: {synced_count} tags loaded from {settings.tags_yaml_path}")
 
+    backfilled = await profile_repo.rebuild_feed_candidates(only_if_empty=not settings.feed_candidates_rebuild_on_startup)
+    if backfilled is not None:
+        logging.info(f"[netlazy] Feed candidate index built: {backfilled} eligible profiles")
+
+    if challenge_issuer is not None:
+        await challenge_issuer.start()
+    if settings.feed_index_enabled:
+        await feed_index_sync.start()
+    if settings.ban_index_enabled:
+        await ban_index_sync.start()
+    risk_engine.start(security_service.cascade_ban_user)
+
 
 async def shutdown_clients():
     """Explicit shutdown hook called by monorepo loaders and internal lifespan."""
     logging.info("[netlazy] Running shutdown hooks: closing connections...")
     logging.getLogger().removeHandler(mongo_handler)
     await mongo_handler.stop_worker()
+    await risk_engine.stop()
+    await ban_index_sync.stop()
+    await feed_index_sync.stop()
+    signature_verifier.shutdown()
     await close_mongo_connection()
 
 
@@ -168,7 +191,7 @@ app.add_middleware(
     allow_credentials=False if "*" in settings.cors_origins else settings.cors_allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Next-Anchor"]
+    expose_headers=["X-Next-Anchor", "X-Feed-Cursor"]
 )
 
 
@@ -189,10 +212,13 @@ router.include_router(profile_router.router, prefix="/api", dependencies=api_dep
 router.include_router(feed_router.router, prefix="/api", dependencies=api_deps)
 router.include_router(inbox_router.router, prefix="/api", dependencies=api_deps)
 router.include_router(security_router.router, prefix="/api", dependencies=api_deps)
+router.include_router(batch_router.router, prefix="/api", dependencies=api_deps)
 
 _cached_version = None
 _cached_time = 0
 _version_lock = asyncio.Lock()
+APP_VERSION_TTL = 3600
+APP_VERSION_CACHE_KEY = "netlazy:app_version"
 
 
 def fetch_gh_version():
@@ -204,24 +230,50 @@ def fetch_gh_version():
         return json.loads(res.read())
 
 
+async def _resolve_app_version():
+    """Returns the latest APK and when it was fetched, so callers expire it with the shared entry."""
+    # Under the hub, workers share one lookup per TTL instead of each polling GitHub
+    if hub_shared_state is not None:
+        try:
+            shared = await hub_shared_state.cache_get(APP_VERSION_CACHE_KEY)
+            if shared and "fetched_at" in shared:
+                return shared["version"], shared["fetched_at"]
+        except Exception:
+            pass
+
+    files = await asyncio.to_thread(fetch_gh_version)
+    for f in files:
+        if f["name"].endswith(".apk") and f["name"].startswith("netlazy-"):
+            match = re.search(r'netlazy-v?([\d\.]+)\.apk', f["name"])
+            if match:
+                version = {
+                    "version": match.group(1),
+                    "url": f"https://cdn.jsdelivr.net/gh/Nergan/cdn@main/netlazy/apk/{f['name']}"
+                }
+                fetched_at = time.time()
+                if hub_shared_state is not None:
+                    try:
+                        await hub_shared_state.cache_set(
+                            APP_VERSION_CACHE_KEY, {"version": version, "fetched_at": fetched_at}, APP_VERSION_TTL
+                        )
+                    except Exception:
+                        pass
+                return version, fetched_at
+    return None, None
+
+
 @router.get("/api/app-version")
 async def get_app_version():
     global _cached_version, _cached_time
-    if time.time() - _cached_time > 3600:
+    if time.time() - _cached_time > APP_VERSION_TTL:
         async with _version_lock:
-            if time.time() - _cached_time > 3600:
+            if time.time() - _cached_time > APP_VERSION_TTL:
                 try:
-                    files = await asyncio.to_thread(fetch_gh_version)
-                    for f in files:
-                        if f["name"].endswith(".apk") and f["name"].startswith("netlazy-"):
-                            match = re.search(r'netlazy-v?([\d\.]+)\.apk', f["name"])
-                            if match:
-                                _cached_version = {
-                                    "version": match.group(1),
-                                    "url": f"https://cdn.jsdelivr.net/gh/Nergan/cdn@main/netlazy/apk/{f['name']}"
-                                }
-                                _cached_time = time.time()
-                                break
+                    version, fetched_at = await _resolve_app_version()
+                    if version:
+                        # A value taken from the shared cache keeps only its remaining lifetime
+                        _cached_version = version
+                        _cached_time = fetched_at
                 except Exception:
                     pass
     return _cached_version or {"version": "0.0.1", "url": ""}
@@ -3,13 +3,14 @@ import binascii
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Header
 from pydantic import BaseModel, Field
 
-from netlazy.domain.repository import InvalidPublicKeyError, HashChainDesyncError, SignatureVerificationError
+from netlazy.domain.repository import InvalidPublicKeyError, HashChainDesyncError, SignatureVerificationError, VerifierSaturatedError
 from netlazy.domain.models import UserAlreadyExistsError, User
 from netlazy.application.auth_service import AuthenticationError
 from netlazy.database import DatabaseUnavailableError
 from netlazy.presentation.route_handler import NetlazyRoute
 from netlazy.presentation.dependencies import (
     auth_service,
+    create_overloaded_error,
     profile_service, 
     inbox_service, 
     verify_pow, 
@@ -115,6 +116,8 @@ async def get_current_anchor(
         raise
     except SignatureVerificationError:
         raise HTTPException(status_code=401, detail="Invalid identity signature")
+    except VerifierSaturatedError:
+        raise create_overloaded_error()
     except AuthenticationError as e:
         if str(e) == "Unknown user":
             raise HTTPException(status_code=401, detail="Unknown user")
@@ -0,0 +1,69 @@
+from typing import Annotated, List, Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+
+from netlazy.application.batch_service import BatchOperationError
+from netlazy.application.inbox_service import (
+    HandshakeNotFoundError, InvalidHandshakeStateError, OtherUserBannedError, OtherUserNotFoundError,
+    UnauthorizedHandshakeActionError
+)
+from netlazy.application.profile_service import InvalidTagError
+from netlazy.config import settings
+from netlazy.domain.models import User
+from netlazy.presentation.dependencies import batch_service, verify_request_signature
+from netlazy.presentation.profile_router import ContactRequest
+from netlazy.presentation.route_handler import NetlazyRoute
+
+router = APIRouter(prefix="/batch", tags=["Batch"], route_class=NetlazyRoute)
+
+
+class ProfileUpdateOperation(BaseModel):
+    op: Literal["profile.update"]
+    bio: str = Field("", max_length=200)
+    tags: List[str] = Field(default_factory=list, max_length=50)
+    contacts: List[ContactRequest] = Field(default_factory=list, max_length=20)
+
+class HandshakeResolveOperation(BaseModel):
+    op: Literal["handshake.resolve"]
+    handshake_id: str
+    status: str = Field(..., pattern="^(accepted|declined)$")
+    returned_contact: Optional[str] = None
+
+class HandshakeReadOperation(BaseModel):
+    op: Literal["handshake.read"]
+    handshake_id: str
+
+BatchOperation = Annotated[
+    Union[ProfileUpdateOperation, HandshakeResolveOperation, HandshakeReadOperation],
+    Field(discriminator="op")
+]
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=settings.batch_max_operations)
+
+class BatchResponse(BaseModel):
+    results: List[dict]
+
+
+_ERROR_STATUS = (
+    ((HandshakeNotFoundError, OtherUserNotFoundError, OtherUserBannedError), 404),
+    ((UnauthorizedHandshakeActionError,), 403),
+    ((InvalidHandshakeStateError, InvalidTagError, ValueError), 400),
+)
+
+
+@router.post("", response_model=BatchResponse)
+async def execute_batch(body: BatchRequest, user: User = Depends(verify_request_signature)):
+    """One signature and one chain advance for the whole envelope; operations commit atomically."""
+    try:
+        results = await batch_service.execute(user.user_id, [operation.model_dump() for operation in body.operations])
+    except BatchOperationError as e:
+        for error_types, status_code in _ERROR_STATUS:
+            if isinstance(e.cause, error_types):
+                raise HTTPException(
+                    status_code=status_code,
+                    detail={"index": e.index, "op": e.op, "error": str(e.cause)}
+                )
+        raise
+    return BatchResponse(results=results)
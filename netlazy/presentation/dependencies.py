@@ -7,6 +7,8 @@ from fastapi import Request, Header, HTTPException, BackgroundTasks
 from starlette.requests import ClientDisconnect
 
 from netlazy.application.auth_service import AuthService, AuthenticationError
+from netlazy.application.batch_service import BatchService
+from netlazy.application.risk_engine import RiskEngine
 from netlazy.application.profile_service import ProfileService
 from netlazy.application.tag_service import TagService
 from netlazy.application.feed_service import FeedService
@@ -16,22 +18,35 @@ from netlazy.config import settings
 from netlazy.database import DatabaseUnavailableError
 from netlazy.domain.models import User
 from netlazy.domain.chain import build_request_payload
+from netlazy.domain.pow import AdaptiveDifficulty, DifficultyPolicy
 from netlazy.domain.risk import RiskThresholds
-from netlazy.domain.repository import RiskEventDispatcherPort, HashChainDesyncError
+from netlazy.domain.repository import RiskEventDispatcherPort, HashChainDesyncError, VerifierSaturatedError
+from netlazy.infrastructure.ban_index import BanIndex, MongoBanIndexSync
 from netlazy.infrastructure.cloudinary_adapter import CloudinaryMediaStorage
+from netlazy.infrastructure.feed_index import MongoFeedIndexSync, TagBitmapFeedIndex
+from netlazy.infrastructure.feed_sessions import InMemoryFeedSessionStore, SharedFeedSessionStore
+from netlazy.infrastructure.interaction_cache import InteractionCache
 from netlazy.infrastructure.crypto_adapter import CryptographyHybridAdapter
+from netlazy.infrastructure.geoip_adapter import MaxMindGeoLocator
+from netlazy.infrastructure.signature_verifier import ExecutorSignatureVerifier
 from netlazy.infrastructure.media_processor import FFmpegMediaProcessor
+from netlazy.infrastructure.pow_challenges import HmacChallengeIssuer
 from netlazy.infrastructure.yaml_loader import YamlTagLoader
 from netlazy.infrastructure.mongo_repo import (
     MongoChainRepository,
     MongoHandshakeRepository,
-    MongoNonceRepository,
     MongoProfileRepository,
     MongoSecurityRepository,
     MongoTagRepository,
     MongoUserRepository,
     MongoTransactionManager,
 )
+from netlazy.infrastructure.user_cache import UserCache
+
+try:
+    from shared_state import shared_state as hub_shared_state
+except ImportError:
+    hub_shared_state = None
 
 def create_auth_error() -> HTTPException:
     return HTTPException(status_code=401, detail="Invalid authentication credentials")
@@ -42,16 +57,45 @@ def create_banned_error() -> HTTPException:
 def create_pow_error() -> HTTPException:
     return HTTPException(status_code=400, detail="Invalid or missing Proof of Work")
 
-user_repo = MongoUserRepository()
+def create_overloaded_error() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+
+user_cache = UserCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl_seconds=settings.user_cache_ttl_seconds
+)
+user_repo = MongoUserRepository(cache=user_cache)
 chain_repo = MongoChainRepository()
-nonce_repo = MongoNonceRepository()
 tag_repo = MongoTagRepository()
-profile_repo = MongoProfileRepository()
-handshake_repo = MongoHandshakeRepository()
-security_repo = MongoSecurityRepository()
+feed_index = TagBitmapFeedIndex()
+feed_index_sync = MongoFeedIndexSync(feed_index, poll_interval=settings.feed_index_poll_seconds)
+profile_repo = MongoProfileRepository(feed_index=feed_index if settings.feed_index_enabled else None)
+interaction_cache = InteractionCache(
+    max_entries=settings.interaction_cache_max_entries,
+    # Other workers' handshake writes never reach this cache, so only the TTL bounds their staleness
+    ttl_seconds=(
+        settings.interaction_cache_shared_ttl_seconds
+        if hub_shared_state is not None and hub_shared_state.shared
+        else settings.interaction_cache_ttl_seconds
+    )
+)
+handshake_repo = MongoHandshakeRepository(interaction_cache=interaction_cache)
+ban_index = BanIndex()
+ban_index_sync = MongoBanIndexSync(ban_index, poll_interval=settings.ban_index_poll_seconds)
+security_repo = MongoSecurityRepository(
+    user_cache=user_cache,
+    ban_index=ban_index if settings.ban_index_enabled else None,
+    feed_index=feed_index if settings.feed_index_enabled else None
+)
 media_storage = CloudinaryMediaStorage()
 
-hybrid_crypto = CryptographyHybridAdapter()
+hybrid_crypto = CryptographyHybridAdapter(key_cache_size=settings.public_key_cache_size)
+signature_verifier = ExecutorSignatureVerifier(
+    hybrid_crypto,
+    max_workers=settings.signature_verify_workers or None,
+    max_pending=settings.signature_verify_max_pending,
+    use_processes=settings.signature_verify_use_processes
+)
 media_processor = FFmpegMediaProcessor()
 tag_loader = YamlTagLoader()
 transaction_manager = MongoTransactionManager()
@@ -59,9 +103,9 @@ transaction_manager = MongoTransactionManager()
 auth_service = AuthService(
     user_repo=user_repo,
     chain_repo=chain_repo,
-    nonce_repo=nonce_repo, 
     crypto_port=hybrid_crypto, 
-    transaction_manager=transaction_manager
+    transaction_manager=transaction_manager,
+    signature_verifier=signature_verifier
 )
 
 tag_service = TagService(tag_repo=tag_repo, tag_loader=tag_loader)
@@ -78,9 +122,26 @@ profile_service = ProfileService(
     audio_bitrate=settings.audio_bitrate,
 )
 
+feed_sessions = InMemoryFeedSessionStore(
+    max_sessions=settings.feed_session_max_sessions,
+    ttl_seconds=settings.feed_session_ttl_seconds,
+    max_seen=settings.feed_session_max_seen
+)
+if hub_shared_state is not None:
+    # Under several hub workers a cursor must resume wherever the next page lands
+    feed_sessions = SharedFeedSessionStore(
+        hub_shared_state,
+        feed_sessions,
+        ttl_seconds=settings.feed_session_ttl_seconds,
+        max_seen=settings.feed_session_max_seen
+    )
+
 feed_service = FeedService(
     profile_repo=profile_repo,
-    handshake_repo=handshake_repo
+    handshake_repo=handshake_repo,
+    feed_sessions=feed_sessions,
+    prefetch_ttl_seconds=settings.feed_prefetch_ttl_seconds,
+    max_prefetched=settings.feed_prefetch_max_viewers
 )
 
 inbox_service = InboxService(
@@ -89,11 +150,46 @@ inbox_service = InboxService(
     user_repo=user_repo
 )
 
+batch_service = BatchService(
+    transaction_manager=transaction_manager,
+    profile_service=profile_service,
+    inbox_service=inbox_service
+)
+
+challenge_issuer = None
+if settings.pow_challenge_mode != "database":
+    challenge_issuer = HmacChallengeIssuer(
+        settings.pow_challenge_secret.encode("utf-8") or None,
+        ttl_seconds=settings.pow_challenge_ttl_seconds,
+        shared_state=hub_shared_state
+    )
+
+difficulty_controller = AdaptiveDifficulty(DifficultyPolicy(
+    min_difficulty=settings.pow_difficulty if settings.pow_min_difficulty is None else settings.pow_min_difficulty,
+    max_difficulty=settings.pow_max_difficulty,
+    half_life_seconds=settings.pow_rate_half_life_seconds,
+    ip_rate_limit=settings.pow_ip_rate_limit,
+    fingerprint_rate_limit=settings.pow_fingerprint_rate_limit,
+    global_rate_limit=settings.pow_global_rate_limit
+)) if settings.pow_adaptive else None
+
+risk_engine = RiskEngine(
+    user_repo=user_repo,
+    thresholds=RiskThresholds(),
+    geo_locator=MaxMindGeoLocator.from_settings(settings.geoip_database_path),
+    rate_window_seconds=settings.risk_rate_window_seconds,
+    flush_interval=settings.risk_flush_interval_seconds
+)
+
 security_service = SecurityService(
     security_repo=security_repo,
     user_repo=user_repo,
     difficulty=settings.pow_difficulty,
-    risk_thresholds=RiskThresholds()
+    risk_thresholds=RiskThresholds(),
+    max_cascade_accounts=settings.ban_cascade_max_accounts,
+    challenge_issuer=challenge_issuer,
+    difficulty_controller=difficulty_controller,
+    risk_engine=risk_engine
 )
 
 
@@ -213,6 +309,8 @@ async def verify_request_signature(
         )
     except DatabaseUnavailableError:
         raise
+    except VerifierSaturatedError:
+        raise create_overloaded_error()
     except HashChainDesyncError as e:
         raise HTTPException(status_code=409, detail=str(e))
     except AuthenticationError as e:
@@ -246,7 +344,7 @@ async def verify_pow(
     ip, fingerprint = _get_client_footprint(request)
     try:
         await security_service.verify_not_banned(ip, fingerprint)
-        await security_service.verify_pow(x_challenge_id, x_pow_nonce)
+        await security_service.verify_pow(x_challenge_id, x_pow_nonce, client_ip=ip, fingerprint=fingerprint)
     except DatabaseUnavailableError:
         raise
     except BannedError:
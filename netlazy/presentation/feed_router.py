@@ -1,32 +1,42 @@
-from typing import List
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from netlazy.domain.models import User
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Response
+from pydantic import BaseModel, TypeAdapter
+from netlazy.domain.models import Profile, User
 from netlazy.presentation.route_handler import NetlazyRoute
 from netlazy.presentation.dependencies import feed_service, verify_request_signature
 from netlazy.presentation.profile_router import ProfileResponse, _to_response as profile_to_response
 
 router = APIRouter(prefix="/feed", tags=["Feed"], route_class=NetlazyRoute)
 
+_page_adapter = TypeAdapter(List[ProfileResponse])
+
 class FeedSearchRequest(BaseModel):
-    seen_ids: List[str] = []
+    cursor: Optional[str] = None  # Value of the previous page's X-Feed-Cursor header
+    seen_ids: List[str] = []  # Legacy clients only; the feed session tracks what was shown
     requires: List[str] = []
     excludes: List[str] = []
     bonus: List[str] = []
     abonus: List[str] = []
 
+def _render_page(profiles: List[Profile]) -> bytes:
+    return _page_adapter.dump_json([profile_to_response(p) for p in profiles])
+
 @router.post("/search", response_model=List[ProfileResponse])
 async def get_feed(
     body: FeedSearchRequest,
     user: User = Depends(verify_request_signature)
 ):
-    profiles = await feed_service.get_feed(
+    page = await feed_service.get_feed(
         viewer_id=user.user_id,
         seen_ids=body.seen_ids,
         requires=body.requires,
         excludes=body.excludes,
         bonus=body.bonus,
         abonus=body.abonus,
-        limit=20
+        limit=20,
+        cursor=body.cursor,
+        render=_render_page
     )
-    return [profile_to_response(p) for p in profiles]
\ No newline at end of file
+    # Pages may come pre-rendered from the prefetch stage, so the body is sent as is
+    headers = {"X-Feed-Cursor": page.cursor} if page.cursor else None
+    return Response(content=page.body, media_type="application/json", headers=headers)
@@ -1,10 +1,14 @@
 import asyncio
+import dataclasses
 import secrets
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
 from pydantic import BaseModel
 from netlazy.config import settings
 from netlazy.presentation.route_handler import NetlazyRoute
-from netlazy.presentation.dependencies import security_service
+from netlazy.presentation.dependencies import (
+    _get_client_footprint, ban_index_sync, challenge_issuer, difficulty_controller, feed_index_sync, feed_service,
+    feed_sessions, handshake_repo, hybrid_crypto, profile_repo, risk_engine, security_service, signature_verifier, user_repo
+)
 
 router = APIRouter(prefix="/security", tags=["Security"], route_class=NetlazyRoute)
 
@@ -17,15 +21,41 @@ class ChallengeResponse(BaseModel):
     difficulty: int
 
 @router.get("/challenge", response_model=ChallengeResponse)
-async def get_challenge():
-    await asyncio.sleep(settings.bot_protection_delay)
-    data = await security_service.generate_challenge()
+async def get_challenge(request: Request):
+    if challenge_issuer is None:
+        await asyncio.sleep(settings.bot_protection_delay)
+    ip, fingerprint = _get_client_footprint(request)
+    data = await security_service.generate_challenge(client_ip=ip, fingerprint=fingerprint)
     return ChallengeResponse(**data)
 
 @router.post("/ban/{user_id}", dependencies=[Depends(verify_admin)])
-async def cascade_ban_user(user_id: str):
+async def cascade_ban_user(user_id: str, depth: int = Query(0, ge=0, le=settings.ban_cascade_max_depth)):
     try:
-        await security_service.cascade_ban_user(user_id)
-        return {"message": f"User {user_id} and all network footprints banned permanently."}
+        report = await security_service.cascade_ban_user(user_id, depth=depth)
+        return {
+            "message": f"User {user_id} and all network footprints banned permanently.",
+            "report": dataclasses.asdict(report)
+        }
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/feed/rebuild", dependencies=[Depends(verify_admin)])
+async def rebuild_feed_candidates():
+    candidates = await profile_repo.rebuild_feed_candidates(only_if_empty=False)
+    return {"message": "Feed candidates reconciled.", "candidates": candidates}
+
+@router.get("/metrics", dependencies=[Depends(verify_admin)])
+async def runtime_metrics():
+    return {
+        "user_cache": user_repo.cache_metrics(),
+        "interaction_cache": handshake_repo.cache_metrics(),
+        "public_key_cache": hybrid_crypto.key_cache_metrics(),
+        "signature_verifier": signature_verifier.metrics(),
+        "ban_index": ban_index_sync.metrics(),
+        "feed_index": feed_index_sync.metrics(),
+        "feed_sessions": feed_sessions.metrics(),
+        "feed_prefetch": feed_service.prefetch_metrics(),
+        "pow_challenges": challenge_issuer.metrics() if challenge_issuer else {"mode": "database"},
+        "pow_difficulty": difficulty_controller.metrics() if difficulty_controller else None,
+        "risk_engine": risk_engine.metrics()
+    }
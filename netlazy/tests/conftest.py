@@ -1,10 +1,78 @@
 import sys
 from pathlib import Path
 
+import pytest
+from pymongo.errors import OperationFailure
+
 # Ensure the monorepo root and netlazy directory are in sys.path
 NETLAZY_DIR = Path(__file__).resolve().parent.parent
 CUTAWAY_DIR = NETLAZY_DIR.parent
 
 for path in (str(CUTAWAY_DIR), str(NETLAZY_DIR)):
     if path not in sys.path:
-        sys.path.insert(0, path)
\ No newline at end of file
+        sys.path.insert(0, path)
+
+from shared_state import LocalSharedState, SharedState  # noqa: E402  (needs the monorepo root on sys.path)
+
+
+class AsyncCursor:
+    """Stands in for a Motor cursor over a fixed list of documents."""
+
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        self._docs = self._docs[:n]
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._docs:
+            yield doc
+
+
+@pytest.fixture
+def cursor_of():
+    return AsyncCursor
+
+
+class TransactionSession:
+    """Stands in for a Motor session whose transaction commits or aborts after the callback."""
+
+    def __init__(self, commits: bool):
+        self._commits = commits
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def with_transaction(self, callback, **kwargs):
+        result = await callback(self)
+        if not self._commits:
+            raise OperationFailure("Transaction aborted")
+        return result
+
+
+@pytest.fixture
+def transaction_session():
+    return TransactionSession
+
+
+class CrossWorkerState(LocalSharedState):
+    """Hub shared state backend that reports itself as cross-worker, backed by one process's dicts."""
+
+    shared = True
+
+
+@pytest.fixture
+def cross_worker_state():
+    state = SharedState()
+    state.use(CrossWorkerState())
+    return state
@@ -3,7 +3,8 @@ import time
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock
 
-from netlazy.application.auth_service import AuthService, AuthenticationError
+from netlazy.application.auth_service import AuthService, AuthenticationError, NONCE_RETENTION_SECONDS
+from netlazy.domain.chain import RatchetOutcome
 from netlazy.domain.models import User
 from netlazy.domain.repository import (
     SignatureVerificationError,
@@ -16,7 +17,6 @@ def auth_deps():
     return {
         "user_repo": AsyncMock(),
         "chain_repo": AsyncMock(),
-        "nonce_repo": AsyncMock(),
         "crypto_port": MagicMock(),
         "transaction_manager": AsyncMock()
     }
@@ -55,8 +55,7 @@ async def test_authenticate_request_success(auth_service, auth_deps):
         created_at=datetime.now(timezone.utc)
     )
     auth_deps["user_repo"].get_by_id.return_value = mock_user
-    auth_deps["nonce_repo"].insert_if_not_exists.return_value = True
-    auth_deps["chain_repo"].get_recent_anchors.return_value = ["anchor_prev"]
+    auth_deps["chain_repo"].advance.return_value = RatchetOutcome.ADVANCED
 
     user, next_anchor = await auth_service.authenticate_request(
         user_id="id1",
@@ -72,7 +71,9 @@ async def test_authenticate_request_success(auth_service, auth_deps):
     )
 
     auth_deps["crypto_port"].verify_hybrid_signature.assert_called_once()
-    auth_deps["chain_repo"].push_anchor.assert_called_once()
+    auth_deps["chain_repo"].advance.assert_called_once_with(
+        "id1", "anchor_prev", next_anchor, "nonce_unique", NONCE_RETENTION_SECONDS
+    )
     assert user == mock_user
     assert next_anchor is not None
 
@@ -98,7 +99,7 @@ async def test_authenticate_request_invalid_timestamp(auth_service):
 async def test_authenticate_request_used_nonce(auth_service, auth_deps):
     mock_user = User("id1", "ed", "pq", datetime.now(timezone.utc))
     auth_deps["user_repo"].get_by_id.return_value = mock_user
-    auth_deps["nonce_repo"].insert_if_not_exists.return_value = False
+    auth_deps["chain_repo"].advance.return_value = RatchetOutcome.NONCE_REUSED
 
     with pytest.raises(AuthenticationError, match="Nonce already used"):
         await auth_service.authenticate_request(
@@ -119,8 +120,7 @@ async def test_authenticate_request_used_nonce(auth_service, auth_deps):
 async def test_authenticate_request_chain_desync(auth_service, auth_deps):
     mock_user = User("id1", "ed", "pq", datetime.now(timezone.utc))
     auth_deps["user_repo"].get_by_id.return_value = mock_user
-    auth_deps["nonce_repo"].insert_if_not_exists.return_value = True
-    auth_deps["chain_repo"].get_recent_anchors.return_value = ["anchor_1", "anchor_2"]
+    auth_deps["chain_repo"].advance.return_value = RatchetOutcome.ANCHOR_UNKNOWN
 
     with pytest.raises(HashChainDesyncError):
         await auth_service.authenticate_request(
@@ -161,4 +161,63 @@ async def test_rotate_key_transaction(auth_service, auth_deps):
     assert new_id == "new_user_id"
     assert anchor is not None
     auth_deps["user_repo"].create.assert_called_once()
-    auth_deps["user_repo"].delete.assert_called_once_with("old_user_id", session=None)
\ No newline at end of file
+    auth_deps["user_repo"].delete.assert_called_once_with("old_user_id", session=None)
+    auth_deps["user_repo"].invalidate.assert_called_once_with("old_user_id")
+
+
+@pytest.mark.asyncio
+async def test_rotate_key_discards_retired_public_keys(auth_service, auth_deps):
+    old_user = User(
+        user_id="old_user_id",
+        ed25519_public_pem="old_ed",
+        mldsa_public_hex="old_pq",
+        created_at=datetime.now(timezone.utc)
+    )
+    auth_deps["crypto_port"].derive_user_id.return_value = "new_user_id"
+    auth_deps["user_repo"].get_by_id.side_effect = lambda user_id, session=None: old_user if user_id == "old_user_id" else None
+
+    async def mock_execute(cb):
+        return await cb(session=None)
+
+    auth_deps["transaction_manager"].execute_in_transaction.side_effect = mock_execute
+
+    await auth_service.rotate_key("old_user_id", "new_ed", "new_pq", AsyncMock(), AsyncMock())
+
+    auth_deps["crypto_port"].discard_public_keys.assert_called_once_with("old_ed", "old_pq")
+
+
+@pytest.mark.asyncio
+async def test_authenticate_request_uses_async_verifier(auth_deps):
+    verifier = AsyncMock()
+    service = AuthService(**auth_deps, signature_verifier=verifier)
+    auth_deps["user_repo"].get_by_id.return_value = User(
+        user_id="id1",
+        ed25519_public_pem="ed_pub",
+        mldsa_public_hex="pq_hex",
+        created_at=datetime.now(timezone.utc)
+    )
+    auth_deps["chain_repo"].advance.return_value = RatchetOutcome.ADVANCED
+
+    await service.authenticate_request(
+        user_id="id1", method="POST", path="/api/feed/search", timestamp=int(time.time()),
+        nonce="nonce_unique", body_hash="hash_123", prev_anchor="anchor_prev",
+        canonical_payload=b"payload_bytes", ed25519_signature=b"sig_ed", mldsa_signature=b"sig_pq"
+    )
+
+    verifier.verify.assert_awaited_once_with("ed_pub", "pq_hex", b"payload_bytes", b"sig_ed", b"sig_pq")
+    auth_deps["crypto_port"].verify_hybrid_signature.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_authenticate_identity_consumes_nonce_with_chain_read(auth_service, auth_deps):
+    auth_deps["user_repo"].get_by_id.return_value = User("id1", "ed", "pq", datetime.now(timezone.utc))
+    auth_deps["chain_repo"].consume_nonce.return_value = ["anchor_1", "anchor_2"]
+
+    head = await auth_service.authenticate_identity("id1", int(time.time()), "n1", "hash", "GET", "/api/auth/anchor", b"", b"")
+
+    assert head == "anchor_2"
+    auth_deps["chain_repo"].consume_nonce.assert_called_once_with("id1", "n1", NONCE_RETENTION_SECONDS)
+
+    auth_deps["chain_repo"].consume_nonce.return_value = None
+    with pytest.raises(AuthenticationError, match="Nonce already used"):
+        await auth_service.authenticate_identity("id1", int(time.time()), "n1", "hash", "GET", "/api/auth/anchor", b"", b"")
@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from netlazy.infrastructure.ban_index import BanIndex, MongoBanIndexSync
+from netlazy.infrastructure.mongo_repo import MongoSecurityRepository
+
+
+def test_ban_index_matches_exact_values_and_cidr_ranges():
+    index = BanIndex()
+    index.replace_all([
+        {"_id": 1, "type": "ip", "value": "203.0.113.7"},
+        {"_id": 2, "type": "ip", "value": "10.0.0.0/8"},
+        {"_id": 3, "type": "ip", "value": "2001:db8::/32"},
+        {"_id": 4, "type": "fingerprint", "value": "fp_bad"},
+        {"_id": 5, "type": "user_id", "value": "u_bad"},
+    ])
+
+    assert index.ready
+    assert index.contains("203.0.113.7", None)
+    assert index.contains("10.200.3.4", None)
+    assert index.contains("::ffff:10.1.1.1", None)
+    assert index.contains("2001:0db8:0000::1", None)
+    assert index.contains(None, "fp_bad")
+    assert index.contains("1.1.1.1", "fp_ok", "u_bad")
+
+    assert not index.contains("11.0.0.1", "fp_ok", "u_ok")
+    assert not index.contains("2001:db9::1", None)
+    assert not index.contains("not-an-ip", None)
+
+    metrics = index.metrics()
+    assert metrics["ips"] == 1
+    assert metrics["ip_ranges"] == 2
+
+
+def test_ban_index_sync_applies_change_stream_events():
+    index = BanIndex()
+    index.replace_all([])
+    sync = MongoBanIndexSync(index)
+
+    sync.apply_change({"operationType": "insert", "fullDocument": {"_id": "a", "type": "ip", "value": "192.168.0.0/16"}})
+    sync.apply_change({"operationType": "insert", "fullDocument": {"_id": "b", "type": "fingerprint", "value": "fp1"}})
+    assert index.contains("192.168.4.4", None)
+    assert index.contains(None, "fp1")
+
+    sync.apply_change({"operationType": "replace", "fullDocument": {"_id": "b", "type": "fingerprint", "value": "fp2"}})
+    assert not index.contains(None, "fp1")
+    assert index.contains(None, "fp2")
+
+    sync.apply_change({"operationType": "delete", "documentKey": {"_id": "a"}})
+    assert not index.contains("192.168.4.4", None)
+    assert sync.metrics()["changes_applied"] == 4
+
+
+@pytest.mark.asyncio
+async def test_security_repository_uses_ready_index_and_writes_through():
+    index = BanIndex()
+    repo = MongoSecurityRepository(ban_index=index)
+
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.bans_collection.find_one = AsyncMock(return_value=None)
+        db.bans_collection.delete_many = AsyncMock()
+        db.users_collection.update_one = AsyncMock()
+        db.profiles_collection.find_one = AsyncMock(return_value=None)
+        index.replace_all([{"_id": 1, "type": "user_id", "value": "u_bad"}])
+
+        assert await repo.is_banned("1.1.1.1", "fp", "u_bad") is True
+        assert await repo.is_banned("1.1.1.1", "fp", "u_ok") is False
+        db.bans_collection.find_one.assert_not_called()
+
+        await repo.remove_bans([], [], "u_bad")
+        assert await repo.is_banned("1.1.1.1", "fp", "u_bad") is False
+
+
+@pytest.mark.asyncio
+async def test_remove_bans_restores_the_feed_candidate():
+    feed_index = MagicMock()
+    repo = MongoSecurityRepository(feed_index=feed_index)
+
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.bans_collection.delete_many = AsyncMock()
+        db.users_collection.update_one = AsyncMock()
+        db.profiles_collection.find_one = AsyncMock(return_value={"tags": ["music"], "random_index": 0.5})
+        db.feed_candidates_collection.update_one = AsyncMock()
+
+        await repo.remove_bans([], [], "u1")
+
+        db.users_collection.update_one.assert_awaited_once_with({"user_id": "u1"}, {"$set": {"is_banned": False}})
+        db.feed_candidates_collection.update_one.assert_awaited_once_with(
+            {"user_id": "u1"}, {"$set": {"tags": ["music"], "random_index": 0.5}}, upsert=True
+        )
+        feed_index.upsert.assert_called_once_with("u1", ["music"])
+
+
+@pytest.mark.asyncio
+async def test_apply_bans_issues_one_unordered_bulk_write():
+    index = BanIndex()
+    index.replace_all([])
+    repo = MongoSecurityRepository(ban_index=index)
+
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.bans_collection.bulk_write = AsyncMock(return_value=MagicMock(upserted_count=3, matched_count=1))
+        db.users_collection.update_many = AsyncMock(return_value=MagicMock(modified_count=2))
+        db.feed_candidates_collection.delete_many = AsyncMock()
+
+        report = await repo.apply_bans(["1.1.1.1", "1.1.1.1"], ["fp"], ["u1", "u2"])
+
+        operations = db.bans_collection.bulk_write.call_args.args[0]
+        assert len(operations) == 4
+        assert db.bans_collection.bulk_write.call_args.kwargs == {"ordered": False}
+        assert (report.bans_created, report.bans_existing, report.users_flagged) == (3, 1, 2)
+        db.feed_candidates_collection.delete_many.assert_called_once_with({"user_id": {"$in": ["u1", "u2"]}})
+        assert index.contains("1.1.1.1", None)
+        assert index.contains(None, None, "u2")
@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from pymongo.errors import OperationFailure
+
+from netlazy.application.batch_service import BatchOperationError, BatchService
+from netlazy.application.inbox_service import HandshakeNotFoundError
+from netlazy.domain.models import Handshake, Profile
+
+
+@pytest.fixture
+def batch_deps():
+    transaction_manager = AsyncMock()
+
+    async def mock_execute(cb):
+        return await cb(session="txn")
+
+    transaction_manager.execute_in_transaction.side_effect = mock_execute
+    return {
+        "transaction_manager": transaction_manager,
+        "profile_service": AsyncMock(),
+        "inbox_service": AsyncMock()
+    }
+
+
+@pytest.fixture
+def batch_service(batch_deps):
+    return BatchService(**batch_deps)
+
+
+def _handshake(status: str = "pending") -> Handshake:
+    now = datetime.now(timezone.utc)
+    return Handshake(
+        id="h1", sender_id="s1", receiver_id="u1", handshake_type="share", status=status,
+        created_at=now, updated_at=now
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_all_operations_in_one_transaction(batch_service, batch_deps):
+    batch_deps["profile_service"].update_profile.return_value = Profile(user_id="u1")
+    batch_deps["inbox_service"].resolve_handshake.return_value = _handshake("accepted")
+    batch_deps["inbox_service"].mark_as_read.return_value = _handshake()
+
+    results = await batch_service.execute("u1", [
+        {"op": "profile.update", "bio": "hi", "tags": [], "contacts": [{"type": "email", "value": "a@b.c", "is_private": True}]},
+        {"op": "handshake.resolve", "handshake_id": "h1", "status": "accepted"},
+        {"op": "handshake.read", "handshake_id": "h1"},
+    ])
+
+    assert [r["op"] for r in results] == ["profile.update", "handshake.resolve", "handshake.read"]
+    batch_deps["transaction_manager"].execute_in_transaction.assert_called_once()
+    assert batch_deps["profile_service"].update_profile.call_args.kwargs["session"] == "txn"
+    assert batch_deps["inbox_service"].resolve_handshake.call_args.kwargs["session"] == "txn"
+    batch_deps["inbox_service"].mark_as_read.assert_called_once_with("u1", "h1", session="txn")
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reports_failing_operation(batch_service, batch_deps):
+    batch_deps["inbox_service"].mark_as_read.return_value = _handshake()
+    batch_deps["inbox_service"].resolve_handshake.side_effect = HandshakeNotFoundError("Handshake not found")
+
+    with pytest.raises(BatchOperationError) as exc_info:
+        await batch_service.execute("u1", [
+            {"op": "handshake.read", "handshake_id": "h1"},
+            {"op": "handshake.resolve", "handshake_id": "missing", "status": "declined"},
+        ])
+
+    assert exc_info.value.index == 1
+    assert exc_info.value.op == "handshake.resolve"
+    assert isinstance(exc_info.value.cause, HandshakeNotFoundError)
+
+
+@pytest.mark.asyncio
+async def test_batch_leaves_driver_errors_unwrapped_for_transaction_retries(batch_service, batch_deps):
+    conflict = OperationFailure("WriteConflict", code=112, details={"errorLabels": ["TransientTransactionError"]})
+    batch_deps["inbox_service"].mark_as_read.side_effect = conflict
+
+    with pytest.raises(OperationFailure) as exc_info:
+        await batch_service.execute("u1", [{"op": "handshake.read", "handshake_id": "h1"}])
+
+    assert exc_info.value is conflict
+    assert exc_info.value.has_error_label("TransientTransactionError")
@@ -0,0 +1,62 @@
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric.mldsa import MLDSA65PrivateKey
+
+from netlazy.domain.repository import SignatureVerificationError, VerifierSaturatedError
+from netlazy.infrastructure.crypto_adapter import CryptographyHybridAdapter
+from netlazy.infrastructure.signature_verifier import ExecutorSignatureVerifier
+
+
+def _identity():
+    ed_private = ed25519.Ed25519PrivateKey.generate()
+    pq_private = MLDSA65PrivateKey.generate()
+    ed_pem = ed_private.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+    return ed_private, pq_private, ed_pem, pq_private.public_key().public_bytes_raw().hex()
+
+
+def test_verify_reuses_parsed_keys_and_discards_on_rotation():
+    ed_private, pq_private, ed_pem, pq_hex = _identity()
+    payload = b"payload"
+    adapter = CryptographyHybridAdapter(key_cache_size=4)
+
+    for _ in range(3):
+        adapter.verify_hybrid_signature(ed_pem, pq_hex, payload, ed_private.sign(payload), pq_private.sign(payload))
+    assert adapter.key_cache_metrics()["misses"] == 1
+    assert adapter.key_cache_metrics()["hits"] == 2
+
+    with pytest.raises(SignatureVerificationError):
+        adapter.verify_hybrid_signature(ed_pem, pq_hex, b"tampered", ed_private.sign(payload), pq_private.sign(payload))
+
+    adapter.discard_public_keys(ed_pem, pq_hex)
+    assert adapter.key_cache_metrics()["size"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_processes", [False, True])
+async def test_executor_verifier_checks_signatures_off_loop(use_processes):
+    ed_private, pq_private, ed_pem, pq_hex = _identity()
+    payload = b"payload"
+    verifier = ExecutorSignatureVerifier(CryptographyHybridAdapter(), max_workers=2, use_processes=use_processes)
+    try:
+        await verifier.verify(ed_pem, pq_hex, payload, ed_private.sign(payload), pq_private.sign(payload))
+        with pytest.raises(SignatureVerificationError):
+            await verifier.verify(ed_pem, pq_hex, b"tampered", ed_private.sign(payload), pq_private.sign(payload))
+    finally:
+        verifier.shutdown()
+
+    metrics = verifier.metrics()
+    assert metrics["verify"]["count"] == 2
+    assert metrics["queue_wait"]["count"] == 2
+    assert metrics["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_executor_verifier_rejects_when_saturated():
+    verifier = ExecutorSignatureVerifier(CryptographyHybridAdapter(), max_pending=0)
+    with pytest.raises(VerifierSaturatedError):
+        await verifier.verify("ed", "pq", b"payload", b"sig", b"sig")
+    assert verifier.metrics()["rejected"] == 1
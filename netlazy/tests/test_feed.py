@@ -1,7 +1,10 @@
+import asyncio
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from netlazy.application.feed_service import FeedService
-from netlazy.domain.models import Profile
+from netlazy.domain.models import Contact, Profile
+from netlazy.infrastructure.feed_sessions import InMemoryFeedSessionStore, SharedFeedSessionStore
+from netlazy.infrastructure.mongo_repo import MongoProfileRepository, _is_feed_eligible
 
 
 @pytest.fixture
@@ -24,7 +27,7 @@ async def test_get_feed_excludes_interacted(feed_service, feed_deps):
         Profile(user_id="u4", bio="Target User")
     ]
 
-    profiles = await feed_service.get_feed(
+    page = await feed_service.get_feed(
         viewer_id="u1",
         seen_ids=["u5"],
         requires=["tech"],
@@ -33,10 +36,148 @@ async def test_get_feed_excludes_interacted(feed_service, feed_deps):
         abonus=["crypto"],
         limit=20
     )
+    profiles = page.profiles
 
     assert len(profiles) == 1
     assert profiles[0].user_id == "u4"
     
     called_kwargs = feed_deps["profile_repo"].get_feed.call_args.kwargs
     assert set(called_kwargs["exclude_ids"]) == {"u2", "u3", "u5"}
-    assert called_kwargs["requires"] == ["tech"]
\ No newline at end of file
+    assert called_kwargs["requires"] == ["tech"]
+
+
+@pytest.mark.asyncio
+async def test_feed_session_excludes_earlier_pages_without_client_ids(feed_deps):
+    service = FeedService(**feed_deps, feed_sessions=InMemoryFeedSessionStore())
+    feed_deps["handshake_repo"].get_interacted_user_ids.return_value = ["u2"]
+    feed_deps["profile_repo"].get_feed.return_value = [Profile(user_id="u4"), Profile(user_id="u5")]
+
+    first = await service.get_feed("u1", [], [], [], [], [], limit=2)
+    feed_deps["profile_repo"].get_feed.return_value = [Profile(user_id="u6")]
+    second = await service.get_feed("u1", [], [], [], [], [], limit=2, cursor=first.cursor)
+
+    assert second.cursor == first.cursor
+    assert set(feed_deps["profile_repo"].get_feed.call_args.kwargs["exclude_ids"]) == {"u2", "u4", "u5"}
+
+    other = await service.get_feed("u9", [], [], [], [], [], limit=2, cursor=first.cursor)
+    assert other.cursor != first.cursor
+    assert set(feed_deps["profile_repo"].get_feed.call_args.kwargs["exclude_ids"]) == {"u2"}
+
+
+@pytest.mark.asyncio
+async def test_next_page_is_prefetched_and_served_pre_rendered(feed_deps):
+    sessions = InMemoryFeedSessionStore()
+    service = FeedService(**feed_deps, feed_sessions=sessions, prefetch_ttl_seconds=30)
+    feed_deps["handshake_repo"].get_interacted_user_ids.return_value = []
+    feed_deps["profile_repo"].get_feed.side_effect = [
+        [Profile(user_id="a"), Profile(user_id="b")],
+        [Profile(user_id="c"), Profile(user_id="d")],
+        [Profile(user_id="e")],
+        [Profile(user_id="f"), Profile(user_id="g")],
+    ]
+    render = lambda profiles: ",".join(p.user_id for p in profiles).encode()
+
+    first = await service.get_feed("u1", [], [], [], [], [], limit=2, render=render)
+    await asyncio.sleep(0)
+    second = await service.get_feed("u1", [], [], [], [], [], limit=2, cursor=first.cursor, render=render)
+
+    assert (first.body, second.body) == (b"a,b", b"c,d")
+    assert set(feed_deps["profile_repo"].get_feed.call_args_list[1].kwargs["exclude_ids"]) == {"a", "b"}
+    assert service.prefetch_metrics()["hits"] == 1
+    assert (sessions.started, sessions.resumed) == (1, 1)
+
+    await asyncio.sleep(0)
+    changed = await service.get_feed("u1", [], ["tech"], [], [], [], limit=2, cursor=first.cursor, render=render)
+    assert changed.body == b"f,g"
+    assert set(feed_deps["profile_repo"].get_feed.call_args.kwargs["exclude_ids"]) == {"a", "b", "c", "d"}
+    assert service.prefetch_metrics()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_prefetch_for_a_session_that_is_gone(feed_deps):
+    sessions = InMemoryFeedSessionStore(max_sessions=1)
+    service = FeedService(**feed_deps, feed_sessions=sessions, prefetch_ttl_seconds=30)
+    feed_deps["handshake_repo"].get_interacted_user_ids.return_value = []
+    feed_deps["profile_repo"].get_feed.return_value = [Profile(user_id="a")]
+
+    page = await service.get_feed("u1", [], [], [], [], [], limit=1, render=lambda profiles: b"")
+    await sessions.resume("u2", None)
+    await asyncio.sleep(0)
+
+    assert feed_deps["profile_repo"].get_feed.call_count == 1
+    assert await sessions.seen(page.cursor) is None
+    assert sessions.started == 2
+
+
+@pytest.mark.asyncio
+async def test_feed_session_forgets_oldest_ids_past_the_cap():
+    store = InMemoryFeedSessionStore(max_sessions=1, max_seen=3)
+    token, seen = await store.resume("u1", None)
+    await store.record(token, ["a", "b"])
+    await store.record(token, ["c", "d"])
+
+    assert await store.resume("u1", token) == (token, ["b", "c", "d"])
+    await store.resume("u2", None)
+    assert (await store.resume("u1", token))[1] == []
+
+
+@pytest.mark.asyncio
+async def test_shared_feed_sessions_resume_on_any_worker(cross_worker_state):
+    workers = [
+        SharedFeedSessionStore(cross_worker_state, InMemoryFeedSessionStore(), ttl_seconds=60, max_seen=3)
+        for _ in range(2)
+    ]
+    token, _ = await workers[0].resume("u1", None)
+    await workers[0].record(token, ["a", "b"])
+    await workers[1].record(token, ["c", "d"])
+
+    assert await workers[1].resume("u1", token) == (token, ["b", "c", "d"])
+    assert (await workers[0].resume("u2", token))[0] != token
+    assert workers[0].metrics()["backend"] == "shared"
+
+
+def test_feed_eligibility_matches_non_empty_profile_rule():
+    assert not _is_feed_eligible(Profile(user_id="u1"))
+    assert not _is_feed_eligible(Profile(user_id="u1", contacts=[Contact("tg", "@me", is_private=True)]))
+    assert _is_feed_eligible(Profile(user_id="u1", contacts=[Contact("tg", "@me", is_private=False)]))
+    assert _is_feed_eligible(Profile(user_id="u1", tags=["tech"]))
+
+
+@pytest.mark.asyncio
+async def test_profile_upsert_maintains_feed_candidate():
+    repo = MongoProfileRepository()
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.profiles_collection.update_one = AsyncMock()
+        db.feed_candidates_collection.update_one = AsyncMock()
+        db.feed_candidates_collection.delete_one = AsyncMock()
+
+        await repo.upsert(Profile(user_id="u1", tags=["tech"], random_index=0.5))
+        db.feed_candidates_collection.update_one.assert_called_once_with(
+            {"user_id": "u1"}, {"$set": {"tags": ["tech"], "random_index": 0.5}}, upsert=True, session=None
+        )
+
+        await repo.upsert(Profile(user_id="u1"))
+        db.feed_candidates_collection.delete_one.assert_called_once_with({"user_id": "u1"}, session=None)
+
+
+@pytest.mark.asyncio
+async def test_repository_feed_ranks_candidates_and_loads_only_winners(cursor_of):
+    repo = MongoProfileRepository()
+    candidates = [
+        {"user_id": "a", "tags": ["x"], "random_index": 0.1},
+        {"user_id": "b", "tags": ["python"], "random_index": 0.2},
+        {"user_id": "c", "tags": ["crypto"], "random_index": 0.3},
+    ]
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db, \
+            patch("netlazy.infrastructure.mongo_repo.random.random", return_value=0.0):
+        db.feed_candidates_collection.find = MagicMock(return_value=cursor_of(candidates))
+        db.profiles_collection.find = MagicMock(return_value=cursor_of([
+            {"user_id": "a", "random_index": 0.1}, {"user_id": "b", "random_index": 0.2}
+        ]))
+
+        profiles = await repo.get_feed("viewer", ["z"], [], [], ["python"], ["crypto"], limit=2)
+
+        assert [p.user_id for p in profiles] == ["b", "a"]
+        assert [p.score for p in profiles] == [1, 0]
+        assert db.profiles_collection.find.call_args.args[0] == {"user_id": {"$in": ["b", "a"]}}
+        db.profiles_collection.aggregate.assert_not_called()
@@ -0,0 +1,126 @@
+import random
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import OperationFailure
+
+from netlazy.domain.models import Profile
+from netlazy.infrastructure.feed_index import TagBitmapFeedIndex
+from netlazy.infrastructure.mongo_repo import MongoProfileRepository, MongoTransactionManager
+
+
+def _random_docs(n, seed=7):
+    rng = random.Random(seed)
+    tags = [f"t{i}" for i in range(12)]
+    return [
+        {"_id": f"doc{i}", "user_id": f"u{i}", "tags": rng.sample(tags, rng.randint(0, 5)), "random_index": rng.random()}
+        for i in range(n)
+    ]
+
+
+def _expected_scores(docs, exclude, requires, excludes, bonus, abonus):
+    scores = {}
+    for doc in docs:
+        tags = set(doc["tags"])
+        if doc["user_id"] in exclude or not set(requires) <= tags or tags & set(excludes):
+            continue
+        scores[doc["user_id"]] = len(tags & set(bonus)) - len(tags & set(abonus))
+    return scores
+
+
+def test_rank_matches_brute_force_scoring():
+    docs = _random_docs(3000)
+    index = TagBitmapFeedIndex()
+    index.replace_all(docs)
+    exclude = {f"u{i}" for i in range(0, 3000, 7)}
+
+    for requires, excludes, bonus, abonus in [
+        ([], [], [], []),
+        (["t1"], ["t2"], ["t3", "t4", "t5"], ["t6"]),
+        ([], ["t0"], ["t1", "t2", "t3", "t4", "t5", "t6", "t7"], ["t8", "t9"]),
+    ]:
+        expected = _expected_scores(docs, exclude, requires, excludes, bonus, abonus)
+        ranked = index.rank(exclude, requires, excludes, bonus, abonus, limit=40)
+
+        assert len(ranked) == min(40, len(expected))
+        assert all(expected[uid] == score for uid, score in ranked)
+        assert [s for _, s in ranked] == sorted((s for _, s in ranked), reverse=True)
+        assert ranked[-1][1] >= sorted(expected.values(), reverse=True)[len(ranked) - 1]
+
+
+def test_ties_rotate_from_the_random_start_in_random_index_order():
+    index = TagBitmapFeedIndex()
+    index.replace_all([{"user_id": uid, "tags": [], "random_index": r} for uid, r in
+                       [("c", 0.3), ("a", 0.1), ("d", 0.4), ("b", 0.2)]])
+
+    assert [uid for uid, _ in index.rank([], [], [], [], [], limit=4, start=0.5)] == ["c", "d", "a", "b"]
+
+
+def test_updates_removals_and_compaction_keep_postings_consistent():
+    docs = _random_docs(400)
+    index = TagBitmapFeedIndex()
+    index.replace_all(docs)
+
+    index.upsert("u1", ["fresh"])
+    index.upsert("new", ["fresh", "t1"])
+    index.discard_id("doc2")
+    for i in range(3, 300):
+        index.remove(f"u{i}")
+
+    assert index.metrics()["slots"] < 400
+    assert {uid for uid, _ in index.rank([], ["fresh"], [], [], [], limit=10)} == {"u1", "new"}
+    remaining = [d for d in docs if d["user_id"] in {"u0"} | {f"u{i}" for i in range(300, 400)}]
+    remaining += [{"user_id": "u1", "tags": ["fresh"]}, {"user_id": "new", "tags": ["fresh", "t1"]}]
+    expected = _expected_scores(remaining, set(), ["t1"], [], ["fresh"], [])
+    assert dict(index.rank([], ["t1"], [], ["fresh"], [], limit=500)) == expected
+    index.discard_id("doc350")
+    assert "u350" not in dict(index.rank([], [], [], [], [], limit=500))
+
+
+@pytest.mark.asyncio
+async def test_repository_ranks_from_ready_index_and_writes_through(cursor_of):
+    index = TagBitmapFeedIndex()
+    index.replace_all([
+        {"user_id": "a", "tags": ["x"], "random_index": 0.1},
+        {"user_id": "b", "tags": ["python"], "random_index": 0.2},
+    ])
+    repo = MongoProfileRepository(feed_index=index)
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.profiles_collection.update_one = AsyncMock()
+        db.feed_candidates_collection.update_one = AsyncMock()
+        await repo.upsert(Profile(user_id="c", tags=["python", "go"], random_index=0.9))
+
+        db.profiles_collection.find = MagicMock(return_value=cursor_of([
+            {"user_id": "c", "random_index": 0.9}, {"user_id": "b", "random_index": 0.2}
+        ]))
+        profiles = await repo.get_feed("a", [], [], [], ["python", "go"], [], limit=2)
+
+        assert [(p.user_id, p.score) for p in profiles] == [("c", 2), ("b", 1)]
+        db.feed_candidates_collection.find.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_transactional_writes_reach_the_index_only_after_commit(transaction_session):
+    index = TagBitmapFeedIndex()
+    index.replace_all([{"user_id": "a", "tags": ["x"], "random_index": 0.1}])
+    repo = MongoProfileRepository(feed_index=index)
+
+    async def rewrite(session):
+        await repo.upsert(Profile(user_id="c", tags=["python"], random_index=0.9), session=session)
+        await repo.delete("a", session=session)
+        assert index.metrics()["profiles"] == 1
+
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.profiles_collection.update_one = AsyncMock()
+        db.profiles_collection.delete_one = AsyncMock()
+        db.feed_candidates_collection.update_one = AsyncMock()
+        db.feed_candidates_collection.delete_one = AsyncMock()
+
+        db.client.start_session = AsyncMock(return_value=transaction_session(commits=False))
+        with pytest.raises(OperationFailure):
+            await MongoTransactionManager().execute_in_transaction(rewrite)
+        assert [uid for uid, _ in index.rank(set(), [], [], [], [], 10)] == ["a"]
+
+        db.client.start_session = AsyncMock(return_value=transaction_session(commits=True))
+        await MongoTransactionManager().execute_in_transaction(rewrite)
+        assert [uid for uid, _ in index.rank(set(), [], [], [], [], 10)] == ["c"]
@@ -0,0 +1,73 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import OperationFailure
+
+from netlazy.domain.models import Handshake
+from netlazy.infrastructure.interaction_cache import InteractionCache
+from netlazy.infrastructure.mongo_repo import MongoHandshakeRepository, MongoTransactionManager
+
+
+def _handshake(sender_id: str, receiver_id: str, **kwargs) -> Handshake:
+    now = datetime.now(timezone.utc)
+    return Handshake("h1", sender_id, receiver_id, "share", "pending", created_at=now, updated_at=now, **kwargs)
+
+
+def test_loads_overlapping_a_write_are_not_cached():
+    cache = InteractionCache()
+    token = cache.load_token("u1")
+    cache.add("u1", "u2")
+    cache.put("u1", ["u3"], token)
+    assert cache.get("u1") is None
+
+    cache.put("u1", ["u3"], cache.load_token("u1"))
+    cache.add("u1", "u2")
+    cache.discard("u1", "u3")
+    assert cache.get("u1") == ["u2"]
+
+
+@pytest.mark.asyncio
+async def test_interacted_ids_are_served_from_cache_and_kept_current(cursor_of):
+    repo = MongoHandshakeRepository(interaction_cache=InteractionCache())
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.handshakes_collection.find = MagicMock(return_value=cursor_of([{"sender_id": "u1", "receiver_id": "u2"}]))
+        db.handshakes_collection.insert_one = AsyncMock()
+        db.handshakes_collection.update_one = AsyncMock()
+        db.handshakes_collection.find_one_and_delete = AsyncMock(return_value={"sender_id": "u3", "receiver_id": "u1"})
+
+        assert await repo.get_interacted_user_ids("u1") == ["u2"]
+        await repo.create(_handshake("u3", "u1"))
+        assert sorted(await repo.get_interacted_user_ids("u1")) == ["u2", "u3"]
+        db.handshakes_collection.find.assert_called_once()
+
+        await repo.update(_handshake("u3", "u1", receiver_deleted=True))
+        await repo.get_interacted_user_ids("u1")
+        assert db.handshakes_collection.find.call_count == 2
+
+        await repo.delete("h1")
+        await repo.get_interacted_user_ids("u1")
+        assert db.handshakes_collection.find.call_count == 3
+        assert repo.cache_metrics()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_transactional_updates_patch_the_cache_only_after_commit(cursor_of, transaction_session):
+    cache = InteractionCache()
+    cache.put("u1", ["u2"], cache.load_token("u1"))
+    repo = MongoHandshakeRepository(interaction_cache=cache)
+
+    async def accept(session):
+        await repo.update(_handshake("u3", "u1"), session=session)
+        assert cache.get("u1") == ["u2"]
+
+    with patch("netlazy.infrastructure.mongo_repo.db_instance") as db:
+        db.handshakes_collection.update_one = AsyncMock()
+
+        db.client.start_session = AsyncMock(return_value=transaction_session(commits=False))
+        with pytest.raises(OperationFailure):
+            await MongoTransactionManager().execute_in_transaction(accept)
+        assert cache.get("u1") == ["u2"]
+
+        db.client.start_session = AsyncMock(return_value=transaction_session(commits=True))
+        await MongoTransactionManager().execute_in_transaction(accept)
+        assert sorted(cache.get("u1")) == ["u2", "u3"]
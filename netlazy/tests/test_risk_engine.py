@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from netlazy.application.risk_engine import RiskEngine
+from netlazy.application.security_service import SecurityService
+from netlazy.domain.repository import GeoLocatorPort
+from netlazy.domain.risk import RiskThresholds, haversine_km
+
+
+class _FixedGeo(GeoLocatorPort):
+    POSITIONS = {"1.1.1.1": (52.52, 13.40), "2.2.2.2": (35.68, 139.69), "3.3.3.3": (52.50, 13.45)}
+
+    def locate(self, ip):
+        return self.POSITIONS.get(ip)
+
+
+@pytest.mark.asyncio
+async def test_risk_engine_scores_request_floods_from_memory():
+    user_repo = AsyncMock()
+    engine = RiskEngine(user_repo, RiskThresholds(max_requests_per_second=1.0), rate_window_seconds=5.0)
+
+    penalties = [await engine.score("u1", "", b"", 1000) for _ in range(20)]
+
+    assert penalties[0] == 0.0
+    assert penalties[-1] > 0.0
+    user_repo.get_by_id.assert_not_called()
+    user_repo.get_last_activity.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_risk_engine_flags_impossible_travel_only():
+    user_repo = AsyncMock()
+    user_repo.get_last_activity.return_value = ("1.1.1.1", 1000)
+    thresholds = RiskThresholds()
+    engine = RiskEngine(user_repo, thresholds, geo_locator=_FixedGeo())
+
+    assert await engine.score("u1", "3.3.3.3", b"", 1060) == 0.0
+    assert await engine.score("u1", "2.2.2.2", b"", 1120) == thresholds.impossible_travel_score
+    assert await engine.score("u1", "2.2.2.2", b"", 1180) == 0.0
+    user_repo.get_last_activity.assert_called_once_with("u1")
+    assert 8800 < haversine_km(_FixedGeo.POSITIONS["1.1.1.1"], _FixedGeo.POSITIONS["2.2.2.2"]) < 9000
+
+
+@pytest.mark.asyncio
+async def test_penalties_are_batched_and_threshold_users_banned():
+    user_repo = AsyncMock()
+    user_repo.increment_risk_scores.return_value = {"u1": 150.0, "u2": 20.0}
+    engine = RiskEngine(user_repo)
+    service = SecurityService(AsyncMock(), user_repo, difficulty=2, risk_engine=engine)
+
+    await service.evaluate_risk("u1", "", b"A" * 300, 1000)
+    await service.evaluate_risk("u1", "", b"A" * 300, 1001)
+    await service.evaluate_risk("u2", "", b"A" * 300, 1001)
+    user_repo.increment_risk_scores.assert_not_called()
+
+    assert await engine.flush() == ["u1"]
+    user_repo.increment_risk_scores.assert_called_once_with({"u1": 40.0, "u2": 20.0})
+    user_repo.get_by_id.assert_not_called()
+
+    user_repo.increment_risk_scores.side_effect = RuntimeError("down")
+    engine.queue("u3", 5.0)
+    with pytest.raises(RuntimeError):
+        await engine.flush()
+    assert engine.metrics()["pending_users"] == 1
@@ -5,7 +5,9 @@ import hashlib
 from unittest.mock import AsyncMock
 
 from netlazy.application.security_service import SecurityService, ProofOfWorkError, BannedError
-from netlazy.domain.models import PoWChallenge, User
+from netlazy.domain.models import BanReport, PoWChallenge, User
+from netlazy.domain.pow import AdaptiveDifficulty, DifficultyPolicy
+from netlazy.infrastructure.pow_challenges import HmacChallengeIssuer, SpentTokenSet
 from netlazy.domain.risk import (
     RiskThresholds,
     score_entropy,
@@ -60,6 +62,16 @@ async def test_verify_not_banned(security_service, security_deps):
         await security_service.verify_not_banned("192.168.1.1", "fp_123")
 
 
+@pytest.mark.asyncio
+async def test_account_ban_is_not_excused_by_a_stale_user_record(security_service, security_deps):
+    security_deps["security_repo"].is_banned.side_effect = lambda ip, fp, uid=None: uid == "u_bad" or ip == "6.6.6.6"
+    security_deps["user_repo"].get_by_id.return_value = User("u", "ed", "pq", None, is_banned=False)
+
+    with pytest.raises(BannedError):
+        await security_service.verify_not_banned("1.1.1.1", "fp", "u_bad")
+    await security_service.verify_not_banned("6.6.6.6", "fp", "u_ok")
+
+
 def test_entropy_scoring():
     zero_entropy = b"A" * 128
     assert shannon_entropy_ratio(zero_entropy) == 0.0
@@ -79,4 +91,145 @@ async def test_risk_evaluation_cascade_ban_on_low_entropy(security_service, secu
     low_entropy_payload = b"A" * 300
     await security_service.evaluate_risk("u1", "2.2.2.2", low_entropy_payload, int(time.time()))
 
-    security_deps["security_repo"].apply_bans.assert_called_once()
\ No newline at end of file
+    security_deps["security_repo"].apply_bans.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cascade_ban_reads_fresh_user(security_service, security_deps):
+    user = User("u1", "ed_pem", "mldsa_hex", None, known_ips=["3.3.3.3"], known_fingerprints=["fp_1"])
+    security_deps["user_repo"].get_by_id.return_value = user
+
+    await security_service.cascade_ban_user("u1")
+
+    security_deps["user_repo"].invalidate.assert_called_once_with("u1")
+    security_deps["security_repo"].apply_bans.assert_called_once_with(
+        ips=["3.3.3.3"], fingerprints=["fp_1"], user_ids=["u1"]
+    )
+    security_deps["user_repo"].find_linked.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cascade_ban_follows_shared_footprints_up_to_depth(security_service, security_deps):
+    root = User("u1", "ed_pem", "mldsa_hex", None, known_ips=["1.1.1.1"], known_fingerprints=["fp_1"])
+    hop_one = User("u2", "ed_pem", "mldsa_hex", None, known_ips=["1.1.1.1", "2.2.2.2"])
+    hop_two = User("u3", "ed_pem", "mldsa_hex", None, known_ips=["2.2.2.2"], known_fingerprints=["fp_3"])
+    security_deps["user_repo"].get_by_id.return_value = root
+    security_deps["user_repo"].find_linked.side_effect = [[hop_one], [hop_two]]
+    security_deps["security_repo"].apply_bans.return_value = BanReport(user_ids=["u1", "u2", "u3"])
+
+    report = await security_service.cascade_ban_user("u1", depth=2)
+
+    first_hop, second_hop = security_deps["user_repo"].find_linked.call_args_list
+    assert first_hop.args == (["1.1.1.1"], ["fp_1"], ["u1"], 499)
+    assert second_hop.args[:2] == (["2.2.2.2"], [])
+    security_deps["security_repo"].apply_bans.assert_called_once_with(
+        ips=["1.1.1.1", "2.2.2.2"], fingerprints=["fp_1", "fp_3"], user_ids=["u1", "u2", "u3"]
+    )
+    assert report.depth == 2
+
+
+def _solve(challenge_id: str, difficulty: int) -> str:
+    nonce = 0
+    while not hashlib.sha256((challenge_id + str(nonce)).encode("utf-8")).hexdigest().startswith("0" * difficulty):
+        nonce += 1
+    return str(nonce)
+
+
+@pytest.mark.asyncio
+async def test_stateless_pow_round_trip_without_repository(security_deps):
+    security_deps["challenge_issuer"] = HmacChallengeIssuer(b"secret", ttl_seconds=60)
+    service = SecurityService(**security_deps)
+
+    data = await service.generate_challenge(client_ip="9.9.9.9")
+    nonce = _solve(data["challenge_id"], data["difficulty"])
+    await service.verify_pow(data["challenge_id"], nonce, client_ip="9.9.9.9")
+
+    with pytest.raises(ProofOfWorkError):
+        await service.verify_pow(data["challenge_id"], nonce, client_ip="9.9.9.9")
+    security_deps["security_repo"].create_challenge.assert_not_called()
+    security_deps["security_repo"].consume_challenge.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stateless_pow_rejects_tampered_foreign_and_expired_tokens(security_deps):
+    issuer = HmacChallengeIssuer(b"secret", ttl_seconds=60)
+    security_deps["challenge_issuer"] = issuer
+    service = SecurityService(**security_deps)
+
+    token = (await service.generate_challenge(client_ip="9.9.9.9"))["challenge_id"]
+    token_id, _, expires, mac = token.split(".")
+    assert issuer.open(f"{token_id}.0.{expires}.{mac}", "9.9.9.9") is None
+    assert issuer.open(token, "8.8.8.8") is None
+    assert issuer.open(token, "9.9.9.9").difficulty == 2
+
+    expired = HmacChallengeIssuer(b"secret", ttl_seconds=-1).issue(2, "9.9.9.9")
+    with pytest.raises(ProofOfWorkError):
+        await service.verify_pow(expired.id, _solve(expired.id, 2), client_ip="9.9.9.9")
+
+
+@pytest.mark.asyncio
+async def test_stateless_pow_replay_is_refused_by_another_worker(cross_worker_state):
+    first, second = (
+        HmacChallengeIssuer(b"secret", ttl_seconds=60, shared_state=cross_worker_state) for _ in range(2)
+    )
+
+    token = first.issue(2, "9.9.9.9").id
+    assert await first.mark_spent(token)
+    assert not await second.mark_spent(token)
+    assert second.metrics()["replays"] == 1
+
+
+@pytest.mark.asyncio
+async def test_generated_pow_secret_is_agreed_across_workers(cross_worker_state):
+    first, second = (HmacChallengeIssuer(ttl_seconds=60, shared_state=cross_worker_state) for _ in range(2))
+    await first.start()
+    await second.start()
+
+    token = first.issue(2, "9.9.9.9").id
+    assert second.open(token, "9.9.9.9") is not None
+    assert second.metrics()["secret"] == "shared"
+
+
+def test_spent_token_set_forgets_expired_entries_and_bounds_size():
+    spent = SpentTokenSet(shards=2, max_entries=2, sweep_interval=0)
+    assert spent.add("a", time.time() + 60)
+    assert not spent.add("a", time.time() + 60)
+    assert spent.add("b", time.time() - 1)
+    assert spent.add("c", time.time() + 60)
+    assert not spent.add("d", time.time() + 60)
+    assert len(spent) == 2
+
+
+def test_adaptive_difficulty_rises_with_load_and_decays():
+    controller = AdaptiveDifficulty(DifficultyPolicy(min_difficulty=3, max_difficulty=6, half_life_seconds=10.0))
+
+    assert controller.on_challenge("1.1.1.1", "fp", now=0.0) == 3
+    for _ in range(40):
+        difficulty = controller.on_challenge("1.1.1.1", "fp", now=1.0)
+    assert difficulty > 3
+    assert controller.current("2.2.2.2", "fp_other", now=1.0) == 3
+    assert controller.current("1.1.1.1", "fp", now=200.0) == 3
+
+    for _ in range(500):
+        controller.on_challenge("1.1.1.1", None, now=300.0)
+    assert controller.current("1.1.1.1", None, now=300.0) == 6
+
+
+@pytest.mark.asyncio
+async def test_failed_solutions_and_risk_make_next_challenge_harder(security_deps):
+    security_deps["difficulty_controller"] = AdaptiveDifficulty(
+        DifficultyPolicy(min_difficulty=1, failures_per_step=2, risk_score_per_step=10)
+    )
+    security_deps["security_repo"].consume_challenge.return_value = PoWChallenge(id="c1", difficulty=8)
+    service = SecurityService(**security_deps)
+
+    assert (await service.generate_challenge("5.5.5.5", "fp"))["difficulty"] == 1
+    for _ in range(3):
+        with pytest.raises(ProofOfWorkError):
+            await service.verify_pow("c1", "0", client_ip="5.5.5.5", fingerprint="fp")
+    assert (await service.generate_challenge("5.5.5.5", "fp"))["difficulty"] == 2
+
+    security_deps["user_repo"].get_by_id.return_value = User("u1", "ed_pem", "mldsa_hex", None)
+    security_deps["user_repo"].increment_risk_score.return_value = 20.0
+    await service.evaluate_risk("u1", "6.6.6.6", b"A" * 300, int(time.time()))
+    assert (await service.generate_challenge("6.6.6.6", None))["difficulty"] == 2
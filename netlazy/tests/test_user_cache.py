@@ -0,0 +1,54 @@
+import time
+from datetime import datetime, timezone
+
+from netlazy.domain.models import User
+from netlazy.infrastructure.user_cache import UserCache
+
+
+def _user(user_id: str) -> User:
+    return User(user_id, "ed_pem", "mldsa_hex", datetime.now(timezone.utc), known_ips=["1.1.1.1"])
+
+
+def test_user_cache_hit_miss_and_invalidation():
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    assert cache.get("u1") is None
+
+    cache.put(_user("u1"))
+    assert cache.get("u1").user_id == "u1"
+
+    cache.invalidate("u1")
+    assert cache.get("u1") is None
+
+    metrics = cache.metrics()
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 2
+    assert metrics["invalidations"] == 1
+
+
+def test_user_cache_evicts_least_recently_used_and_expires():
+    cache = UserCache(max_entries=2, ttl_seconds=60)
+    cache.put(_user("u1"))
+    cache.put(_user("u2"))
+    cache.get("u1")
+    cache.put(_user("u3"))
+
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None
+    assert cache.metrics()["evictions"] == 1
+
+    expiring = UserCache(max_entries=2, ttl_seconds=0.01)
+    expiring.put(_user("u1"))
+    time.sleep(0.02)
+    assert expiring.get("u1") is None
+
+
+def test_user_cache_returns_copies_and_tracks_footprints():
+    cache = UserCache()
+    cache.put(_user("u1"))
+
+    cache.get("u1").known_ips.append("6.6.6.6")
+    cache.note_footprint("u1", "2.2.2.2", "fp_new")
+
+    user = cache.get("u1")
+    assert user.known_ips == ["1.1.1.1", "2.2.2.2"]
+    assert user.known_fingerprints == ["fp_new"]
@@ -0,0 +1,90 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Iterable
+
+SUSPICIOUS = "suspicious"
+API = "api"
+STATIC = "static"
+PAGE = "page"
+
+
+class PathClassifier:
+    """Classifies unmatched request paths for the 404 handler with one precompiled pass.
+
+    Suspicious substrings from every registered source are folded into a single
+    alternation regex (rebuilt only when a source registers new patterns), static
+    assets are detected through an extension table lookup, and results for recently
+    seen paths are served from a bounded LRU since scanners repeat the same probes.
+    """
+
+    def __init__(self, static_extensions: Iterable[str], cache_size: int = 4096):
+        self._static_extensions = frozenset(static_extensions)
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pattern_sources = {}
+        self._matcher = None
+        self.category_counts = Counter()
+        self.pattern_source_counts = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def register_patterns(self, patterns: Iterable[str], source: str = "hub") -> None:
+        with self._lock:
+            for pattern in patterns:
+                pattern = pattern.lower()
+                if pattern:
+                    self._pattern_sources.setdefault(pattern, source)
+            # Longest first so overlapping literals attribute to the most specific pattern
+            ordered = sorted(self._pattern_sources, key=len, reverse=True)
+            self._matcher = re.compile("|".join(re.escape(p) for p in ordered)) if ordered else None
+            self._cache.clear()
+
+    def _classify_uncached(self, path: str):
+        lowered = path.lower()
+        if self._matcher is not None:
+            match = self._matcher.search(lowered)
+            if match:
+                return SUSPICIOUS, self._pattern_sources[match.group(0)]
+
+        segments = [seg for seg in lowered.split("/") if seg]
+        if "api" in segments or path.startswith("/api") or path.endswith(".json"):
+            return API, None
+
+        last_segment = path.rsplit("/", 1)[-1]
+        dot = last_segment.rfind(".")
+        if (dot != -1 and last_segment[dot:] in self._static_extensions) or "static" in segments or "scripts" in segments:
+            return STATIC, None
+
+        return PAGE, None
+
+    def classify(self, path: str) -> str:
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None:
+                self._cache.move_to_end(path)
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+                cached = self._classify_uncached(path)
+                self._cache[path] = cached
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+            category, source = cached
+            self.category_counts[category] += 1
+            if source:
+                self.pattern_source_counts[source] += 1
+            return category
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "categories": dict(self.category_counts),
+                "suspicious_by_source": dict(self.pattern_source_counts),
+                "patterns": len(self._pattern_sources),
+                "cache_size": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+            }
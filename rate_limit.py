@@ -0,0 +1,208 @@
+import json
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy:
+    def __init__(self, prefix: str, rate: float, burst: int):
+        self.prefix = prefix
+        self.rate = rate
+        self.burst = burst
+
+
+def parse_policies(spec: str) -> List[RateLimitPolicy]:
+    """Parses `"/=20:100,/formular/api=1:10"` into policies (prefix=tokens_per_second:burst)."""
+    policies = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        prefix, _, limits = item.partition("=")
+        rate, _, burst = limits.partition(":")
+        policies.append(RateLimitPolicy(prefix.strip() or "/", float(rate), int(burst or rate)))
+    return policies
+
+
+class ShardedTokenBucketStore:
+    """In-memory token buckets split over independent LRU shards.
+
+    Each shard is an OrderedDict, so touching a bucket and evicting the least
+    recently used one are both O(1); a client that was evicted simply starts
+    again with a full bucket.
+    """
+
+    def __init__(self, shards: int = 16, max_buckets_per_shard: int = 4096):
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._max_buckets = max_buckets_per_shard
+
+    async def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """Takes one token; returns (allowed, seconds until the next token if denied)."""
+        shard = self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+        now = time.monotonic()
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = shard[key] = [float(burst), now]
+            if len(shard) > self._max_buckets:
+                shard.popitem(last=False)
+        else:
+            shard.move_to_end(key)
+            bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return True, 0.0
+        return False, (1.0 - bucket[0]) / rate if rate > 0 else 60.0
+
+    def size(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+class MongoTokenBucketStore:
+    """Token buckets shared by every worker, refilled and consumed in one atomic update.
+
+    Uses the server clock ($$NOW) so workers never disagree about elapsed time.
+    Falls back to a local store if MongoDB is unreachable, failing open per worker.
+    """
+
+    def __init__(self, collection, fallback: ShardedTokenBucketStore, idle_ttl_seconds: int = 3600):
+        self._collection = collection
+        self._fallback = fallback
+        self._idle_ttl = idle_ttl_seconds
+        self._indexed = False
+
+    async def _ensure_index(self):
+        if not self._indexed:
+            await self._collection.create_index("updated_at", expireAfterSeconds=self._idle_ttl)
+            self._indexed = True
+
+    async def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        try:
+            await self._ensure_index()
+            elapsed_seconds = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+            doc = await self._collection.find_one_and_update(
+                {"_id": key},
+                [
+                    {"$set": {
+                        "tokens": {"$min": [
+                            float(burst),
+                            {"$add": [{"$ifNull": ["$tokens", float(burst)]}, {"$multiply": [elapsed_seconds, rate]}]}
+                        ]},
+                        "updated_at": "$$NOW"
+                    }},
+                    {"$set": {
+                        "allowed": {"$gte": ["$tokens", 1]},
+                        "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]}
+                    }}
+                ],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.warning(f"Shared rate limit store unavailable, using local buckets: {e}")
+            return await self._fallback.consume(key, rate, burst)
+
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (1.0 - doc["tokens"]) / rate if rate > 0 else 60.0
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class RateLimiter:
+    def __init__(self, policies: List[RateLimitPolicy], store):
+        # Longest prefix first so the most specific policy wins
+        self._policies = sorted(policies, key=lambda p: len(p.prefix), reverse=True)
+        self._store = store
+        self.allowed = 0
+        self.rejected = 0
+
+    def policy_for(self, path: str) -> Optional[RateLimitPolicy]:
+        for policy in self._policies:
+            if policy.prefix == "/" or path == policy.prefix or path.startswith(policy.prefix.rstrip("/") + "/"):
+                return policy
+        return None
+
+    async def check(self, client_ip: str, path: str) -> Tuple[bool, float]:
+        policy = self.policy_for(path)
+        if policy is None:
+            return True, 0.0
+        allowed, retry_after = await self._store.consume(f"{policy.prefix}|{client_ip}", policy.rate, policy.burst)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return allowed, retry_after
+
+    def metrics(self) -> dict:
+        return {
+            "policies": {p.prefix: {"rate": p.rate, "burst": p.burst} for p in self._policies},
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "tracked_buckets": self._store.size(),
+        }
+
+
+def _client_ip(scope, trusted_proxies: FrozenSet[str] = frozenset()) -> str:
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if peer not in trusted_proxies:
+        # Anyone can send X-Forwarded-For; it only means something when our own proxy added it
+        return peer
+    hops = [
+        hop.strip()
+        for key, value in scope.get("headers", []) if key == b"x-forwarded-for"
+        for hop in value.decode("latin1").split(",") if hop.strip()
+    ]
+    # Proxies append, so walking back from the nearest hop skips our own chain; anything
+    # further left was supplied by the client and could be forged
+    for hop in reversed(hops):
+        if hop not in trusted_proxies:
+            return hop
+    return peer
+
+
+class RateLimitMiddleware:
+    """Raw ASGI token-bucket limiter that sheds abusive clients before routing or body parsing.
+
+    Clients are keyed by the connecting peer, or by the address a trusted reverse proxy
+    (one of `trusted_proxies`) recorded in X-Forwarded-For.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, trusted_proxies: Iterable[str] = ()):
+        self.app = app
+        self.limiter = limiter
+        self.trusted_proxies = frozenset(trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        allowed, retry_after = await self.limiter.check(_client_ip(scope, self.trusted_proxies), scope.get("path", "/"))
+        if allowed:
+            return await self.app(scope, receive, send)
+
+        if scope["type"] == "websocket":
+            # Policy violation close before the handshake is accepted
+            await send({"type": "websocket.close", "code": 1008})
+            return
+
+        body = json.dumps({"detail": "Too Many Requests"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin1")),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode("latin1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSharedState:
+    """Single-process backend: plain dicts, correct only while the hub runs one worker."""
+
+    shared = False
+
+    def __init__(self):
+        self._counters: Dict[str, int] = {}
+        self._cache: Dict[str, tuple] = {}
+        self._slots: Dict[str, Dict[str, float]] = {}
+
+    async def incr(self, name: str, delta: int = 1) -> int:
+        self._counters[name] = self._counters.get(name, 0) + delta
+        return self._counters[name]
+
+    async def get_counter(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    async def cache_get(self, key: str) -> Optional[Any]:
+        entry = self._cache.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            self._cache.pop(key, None)
+            return None
+        return entry[0]
+
+    async def cache_set(self, key: str, value: Any, ttl: float) -> None:
+        self._cache[key] = (value, time.monotonic() + ttl)
+
+    async def cache_add(self, key: str, value: Any, ttl: float) -> bool:
+        if await self.cache_get(key) is not None:
+            return False
+        await self.cache_set(key, value, ttl)
+        return True
+
+    async def acquire_slot(self, pool: str, holder: str, limit: int, ttl: float) -> bool:
+        now = time.monotonic()
+        holders = {h: exp for h, exp in self._slots.get(pool, {}).items() if exp > now and h != holder}
+        granted = len(holders) < limit
+        if granted:
+            holders[holder] = now + ttl
+        self._slots[pool] = holders
+        return granted
+
+    async def release_slot(self, pool: str, holder: str) -> None:
+        self._slots.get(pool, {}).pop(holder, None)
+
+    async def slot_count(self, pool: str) -> int:
+        now = time.monotonic()
+        return sum(1 for exp in self._slots.get(pool, {}).values() if exp > now)
+
+
+class MongoSharedState:
+    """Cross-worker backend where every operation is one atomic MongoDB update.
+
+    Counters live as `{_id: name, count}` documents in `counters` (the hub passes its
+    stats collection, so the existing `unique_visitors` document is the shared
+    counter). Cache entries and slot pools live in `store`; cache documents expire
+    through a TTL index, and slot holders carry their own expiry so a crashed worker
+    cannot leak capacity forever.
+    """
+
+    shared = True
+
+    def __init__(self, counters, store):
+        self._counters = counters
+        self._store = store
+        self._indexed = False
+
+    async def _ensure_index(self):
+        if not self._indexed:
+            await self._store.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+
+    async def incr(self, name: str, delta: int = 1) -> int:
+        doc = await self._counters.find_one_and_update(
+            {'_id': name}, {'$inc': {'count': delta}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return doc.get('count', 0)
+
+    async def get_counter(self, name: str) -> int:
+        doc = await self._counters.find_one({'_id': name}, {'count': 1})
+        return doc.get('count', 0) if doc else 0
+
+    async def cache_get(self, key: str) -> Optional[Any]:
+        doc = await self._store.find_one({'_id': f"cache:{key}", 'expires_at': {'$gt': datetime.utcnow()}})
+        return doc['value'] if doc else None
+
+    async def cache_set(self, key: str, value: Any, ttl: float) -> None:
+        await self._ensure_index()
+        await self._store.update_one(
+            {'_id': f"cache:{key}"},
+            {'$set': {'value': value, 'expires_at': datetime.utcnow() + timedelta(seconds=ttl)}},
+            upsert=True
+        )
+
+    async def cache_add(self, key: str, value: Any, ttl: float) -> bool:
+        """Sets the entry only if no live one exists; False means another worker got there first."""
+        await self._ensure_index()
+        now = datetime.utcnow()
+        try:
+            # A live entry fails the filter, and the upsert then collides with its _id
+            await self._store.update_one(
+                {'_id': f"cache:{key}", 'expires_at': {'$lte': now}},
+                {'$set': {'value': value, 'expires_at': now + timedelta(seconds=ttl)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def acquire_slot(self, pool: str, holder: str, limit: int, ttl: float) -> bool:
+        live_others = {'$filter': {
+            'input': {'$ifNull': ['$holders', []]},
+            'cond': {'$and': [{'$gt': ['$$this.exp', '$$NOW']}, {'$ne': ['$$this.id', holder]}]}
+        }}
+        doc = await self._store.find_one_and_update(
+            {'_id': f"slots:{pool}"},
+            [
+                {'$set': {'holders': live_others}},
+                {'$set': {'granted': {'$lt': [{'$size': '$holders'}, limit]}}},
+                {'$set': {'holders': {'$cond': [
+                    '$granted',
+                    {'$concatArrays': ['$holders', [{'id': holder, 'exp': {'$add': ['$$NOW', int(ttl * 1000)]}}]]},
+                    '$holders'
+                ]}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return bool(doc and doc.get('granted'))
+
+    async def release_slot(self, pool: str, holder: str) -> None:
+        await self._store.update_one({'_id': f"slots:{pool}"}, {'$pull': {'holders': {'id': holder}}})
+
+    async def slot_count(self, pool: str) -> int:
+        doc = await self._store.find_one({'_id': f"slots:{pool}"}, {'holders': 1})
+        now = datetime.utcnow()
+        return sum(1 for h in (doc or {}).get('holders', []) if h['exp'] > now)
+
+
+class SharedState:
+    """Facade plugins import; the root coordinator swaps in a cross-worker backend at boot.
+
+    Plugins booted standalone keep the local backend, which behaves exactly like the
+    module globals it replaces.
+    """
+
+    def __init__(self):
+        self.backend = LocalSharedState()
+
+    def use(self, backend) -> None:
+        self.backend = backend
+        logger.info(f"Shared state backend: {type(backend).__name__}")
+
+    @property
+    def shared(self) -> bool:
+        return self.backend.shared
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+class SharedCounter:
+    """Process-local view of a shared counter for hot read paths.
+
+    Local bumps are visible immediately; when the backend is shared, the view is
+    re-read every `refresh_interval` seconds so increments made by other workers
+    show up without a database round trip per request.
+    """
+
+    def __init__(self, state: SharedState, name: str, refresh_interval: float = 5.0):
+        self._state = state
+        self.name = name
+        self.value = 0
+        self._refresh_interval = refresh_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def bump(self, delta: int) -> None:
+        self.value += delta
+
+    async def refresh(self) -> int:
+        self.value = await self._state.get_counter(self.name)
+        return self.value
+
+    def start(self) -> None:
+        if self._task is None and self._state.shared:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Could not refresh shared counter {self.name}: {e}")
+
+
+shared_state = SharedState()
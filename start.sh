@@ -6,5 +6,6 @@ fi
 
 echo "Starting Main Site on port 7860 with native asyncio loop..."
 # Force standard asyncio to bypass the uvloop SSL handshake timeout bug.
-# Added --proxy-headers and --forwarded-allow-ips "*" to recognize HTTPS scheme from the proxy.
-exec uvicorn main:app --host 0.0.0.0 --port 7860 --loop asyncio --proxy-headers --forwarded-allow-ips "*"
\ No newline at end of file
+# --proxy-headers recognizes the HTTPS scheme and client address set by the proxy. Only the proxies in
+# TRUSTED_PROXY_IPS are believed: with "*", any client could rewrite its own address and dodge the rate limiter.
+exec uvicorn main:app --host 0.0.0.0 --port 7860 --loop asyncio --proxy-headers --forwarded-allow-ips "${TRUSTED_PROXY_IPS:-127.0.0.1,::1}"
\ No newline at end of file
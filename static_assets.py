@@ -0,0 +1,165 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".js", ".mjs", ".css", ".json", ".svg", ".html", ".htm", ".txt", ".xml", ".map", ".wasm", ".webmanifest"
+}
+MIN_COMPRESS_BYTES = 1024
+
+# Build-tool fingerprints such as `index-BdF3x9Qa.js` or `app.3f9a1c2b.css`: 8+ chars mixing letters and digits
+_FINGERPRINT = re.compile(r"[-.](?=[A-Za-z0-9_]*\d)(?=[A-Za-z0-9_]*[A-Za-z])[A-Za-z0-9_]{8,}\.[A-Za-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token] = quality
+    return accepted
+
+
+class _AssetVariants:
+    __slots__ = ("mtime_ns", "size", "digest", "encoded")
+
+    def __init__(self, mtime_ns: int, size: int, digest: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.encoded: Dict[str, Optional[str]] = {}
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that negotiates brotli/gzip variants and emits strong, content-based ETags.
+
+    Compressed variants are produced lazily (off the event loop) on the first request
+    that can use them and kept in a disk cache keyed by content hash, so every later
+    request is a plain file send. Fingerprinted build artifacts are marked immutable;
+    everything else must revalidate, which the strong ETag turns into cheap 304s.
+    """
+
+    def __init__(self, *args, cache_dir: Optional[Path] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_dir = Path(cache_dir or Path(tempfile.gettempdir()) / "hub_static_cache")
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._variants: Dict[str, _AssetVariants] = {}
+        self._lock = threading.Lock()
+
+    def _describe(self, full_path: str, stat_result: os.stat_result) -> _AssetVariants:
+        with self._lock:
+            variants = self._variants.get(full_path)
+        if variants and variants.mtime_ns == stat_result.st_mtime_ns and variants.size == stat_result.st_size:
+            return variants
+
+        digest = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+        variants = _AssetVariants(stat_result.st_mtime_ns, stat_result.st_size, digest.hexdigest()[:32])
+        with self._lock:
+            self._variants[full_path] = variants
+        return variants
+
+    def _encoded_path(self, full_path: str, variants: _AssetVariants, encoding: str) -> Optional[str]:
+        if encoding in variants.encoded:
+            return variants.encoded[encoding]
+
+        target = self._cache_dir / f"{variants.digest}.{encoding}"
+        if not target.exists():
+            with open(full_path, "rb") as f:
+                data = f.read()
+            encoded = brotli.compress(data, quality=11) if encoding == "br" else gzip.compress(data, compresslevel=9, mtime=0)
+            if len(encoded) >= len(data):
+                # Not worth sending; remember so we never try again for this content
+                variants.encoded[encoding] = None
+                return None
+            tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(encoded)
+            os.replace(tmp, target)
+
+        variants.encoded[encoding] = str(target)
+        return variants.encoded[encoding]
+
+    def _prepare(self, full_path: str, stat_result: os.stat_result, accept_encoding: str) -> Tuple[_AssetVariants, Optional[str], Optional[str]]:
+        variants = self._describe(full_path, stat_result)
+        if stat_result.st_size < MIN_COMPRESS_BYTES or Path(full_path).suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            return variants, None, None
+
+        accepted = _accepted_encodings(accept_encoding)
+        candidates = (["br"] if brotli is not None else []) + ["gzip"]
+        for encoding in candidates:
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                encoded_path = self._encoded_path(full_path, variants, encoding)
+                if encoded_path:
+                    return variants, encoding, encoded_path
+        return variants, None, None
+
+    async def get_response(self, path: str, scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        try:
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        except OSError:
+            stat_result = None
+        if not (stat_result and stat.S_ISREG(stat_result.st_mode)):
+            # Directories, index.html handling and error mapping stay with Starlette
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        variants, encoding, encoded_path = await anyio.to_thread.run_sync(
+            self._prepare, full_path, stat_result, request_headers.get("accept-encoding", "")
+        )
+
+        filename = os.path.basename(full_path)
+        headers = {
+            "etag": f'"{variants.digest}-{encoding}"' if encoding else f'"{variants.digest}"',
+            "cache-control": IMMUTABLE_CACHE_CONTROL if _FINGERPRINT.search(filename) else REVALIDATE_CACHE_CONTROL,
+            "vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["content-encoding"] = encoding
+            send_path = encoded_path
+            send_stat = await anyio.to_thread.run_sync(os.stat, encoded_path)
+        else:
+            send_path, send_stat = full_path, stat_result
+
+        response = FileResponse(
+            send_path,
+            stat_result=send_stat,
+            headers=headers,
+            media_type=mimetypes.guess_type(filename)[0] or "text/plain",
+        )
+        # Last-Modified must describe the original file, not the cache entry
+        response.headers["last-modified"] = FileResponse(full_path, stat_result=stat_result).headers["last-modified"]
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
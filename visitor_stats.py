@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class HyperLogLog:
+    """Mergeable cardinality sketch with ~0.8% standard error at the default precision."""
+
+    def __init__(self, precision: int = 14, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.num_registers = 1 << precision
+        if registers is not None and len(registers) != self.num_registers:
+            raise ValueError("HyperLogLog register array does not match its precision")
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.num_registers)
+
+    def add(self, value: str) -> None:
+        x = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = x >> (64 - self.precision)
+        remainder = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Linear counting is far more accurate while most registers are still empty
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class VisitorSketchStore:
+    """Per-day, per-scope HyperLogLog sketches of visitor UUIDs persisted in MongoDB.
+
+    Sketches for the current day live in RAM and are folded into their stored
+    document (read, register-wise max, write) every `flush_interval` seconds. Each
+    write is conditional on the `version` it read, so when several processes fold
+    into the same bucket at once the loser re-reads and merges again instead of
+    overwriting registers. The same flush folds the day into ISO-week and calendar
+    month rollups, so a range query merges whole months and weeks where the range
+    covers them and single days only at its edges: a year costs a few dozen 16KB
+    merges, not 366. Merging and estimating run in a worker thread.
+    """
+
+    CAS_ATTEMPTS = 5
+
+    GLOBAL_SCOPE = 'all'
+
+    def __init__(
+        self, collection, precision: int = 14, flush_interval: float = 30.0,
+        max_range_days: int = 366, max_breakdown_days: int = 92
+    ):
+        self._collection = collection
+        self._precision = precision
+        self._flush_interval = flush_interval
+        self.max_range_days = max_range_days
+        self.max_breakdown_days = max_breakdown_days
+        self._live: Dict[Tuple[str, str], HyperLogLog] = {}
+        self._dirty = set()
+        self._flush_lock = asyncio.Lock()
+        self._worker_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _bucket_id(period: str, scope: str) -> str:
+        return f"{period}:{scope}"
+
+    @staticmethod
+    def _week(day: date) -> str:
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+
+    @staticmethod
+    def _month(day: date) -> str:
+        return f"{day.year}-{day.month:02d}"
+
+    def add(self, uuid: str, scopes: Iterable[str]) -> None:
+        day = datetime.utcnow().date().isoformat()
+        for scope in scopes:
+            key = (day, scope)
+            sketch = self._live.get(key)
+            if sketch is None:
+                sketch = self._live[key] = HyperLogLog(self._precision)
+            sketch.add(uuid)
+            self._dirty.add(key)
+
+    async def _persist(self, period: str, scope: str, sketch: HyperLogLog, fields: dict) -> None:
+        bucket_id = self._bucket_id(period, scope)
+        for _ in range(self.CAS_ATTEMPTS):
+            doc = await self._collection.find_one({'_id': bucket_id})
+            if doc and doc.get("precision") == self._precision:
+                sketch.merge(HyperLogLog(self._precision, bytes(doc["registers"])))
+            fields = {
+                **fields,
+                'scope': scope,
+                'precision': self._precision,
+                'registers': bytes(sketch.registers),
+                'updated_at': datetime.utcnow()
+            }
+            if doc is None:
+                try:
+                    await self._collection.insert_one({'_id': bucket_id, 'version': 1, **fields})
+                    return
+                except DuplicateKeyError:
+                    continue
+            # Documents written before versioning have no field; {'version': None} matches those too
+            result = await self._collection.update_one(
+                {'_id': bucket_id, 'version': doc.get('version')},
+                {'$set': {**fields, 'version': (doc.get('version') or 0) + 1}}
+            )
+            if result.matched_count:
+                return
+        raise RuntimeError(f"sketch {bucket_id} kept changing under concurrent writers")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, set()
+            for key in dirty:
+                day, scope = key
+                live = self._live[key]
+                try:
+                    await self._persist(day, scope, live, {'day': day})
+                    # Rollups get a copy: their registers must never leak back into the day
+                    on = date.fromisoformat(day)
+                    for period, kind in ((self._week(on), 'week'), (self._month(on), 'month')):
+                        copy = HyperLogLog(self._precision, bytes(live.registers))
+                        await self._persist(period, scope, copy, {'period': kind})
+                except Exception as e:
+                    self._dirty.add(key)
+                    logger.error(f"Failed to persist visitor sketch {self._bucket_id(day, scope)}: {e}")
+
+            # Past days are immutable once persisted; keep only today's buckets in RAM
+            today = datetime.utcnow().date().isoformat()
+            for key in [k for k in self._live if k[0] != today and k not in self._dirty]:
+                del self._live[key]
+
+    async def count(self, start: date, end: date, scope: str = GLOBAL_SCOPE) -> int:
+        """Approximate number of distinct visitors across the inclusive day range."""
+        days = self._days(start, end, self.max_range_days)
+        plan = self._plan(start, end)
+        sketches = await self._load(list(plan), scope)
+
+        # Rollups missing from before they existed are covered by their days instead
+        missing_days = [
+            day for period, covered in plan.items() if period not in sketches and covered != [period] for day in covered
+        ]
+        if missing_days:
+            sketches.update(await self._load(missing_days, scope))
+
+        # Fold in registers that have not been flushed yet
+        parts = list(sketches.values()) + [
+            self._live[(day, scope)] for day in days if (day, scope) in self._live
+        ]
+        return await asyncio.to_thread(self._merged_estimate, parts)
+
+    def _merged_estimate(self, parts: List[HyperLogLog]) -> int:
+        merged = HyperLogLog(self._precision)
+        for sketch in parts:
+            merged.merge(sketch)
+        return merged.estimate()
+
+    async def count_per_day(self, start: date, end: date, scope: str = GLOBAL_SCOPE) -> List[dict]:
+        days = self._days(start, end, self.max_breakdown_days)
+        sketches = await self._load(days, scope)
+        for day in days:
+            live = self._live.get((day, scope))
+            if live is not None:
+                sketches.setdefault(day, HyperLogLog(self._precision)).merge(live)
+        estimates = await asyncio.to_thread(lambda: {day: sketch.estimate() for day, sketch in sketches.items()})
+        return [{"day": day, "unique_visitors": estimates.get(day, 0)} for day in days]
+
+    @staticmethod
+    def _days(start: date, end: date, limit: int) -> List[str]:
+        if end < start:
+            raise ValueError("Range end precedes range start")
+        span = (end - start).days + 1
+        if span > limit:
+            raise ValueError(f"Range exceeds {limit} days")
+        return [(start + timedelta(days=offset)).isoformat() for offset in range(span)]
+
+    def _plan(self, start: date, end: date) -> Dict[str, List[str]]:
+        """Largest buckets tiling the range: months, then ISO weeks, then days; each with the days it covers."""
+        plan: Dict[str, List[str]] = {}
+        day = start
+        while day <= end:
+            month_end = (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            if day.day == 1 and month_end <= end:
+                last = month_end
+                plan[self._month(day)] = self._days(day, last, 31)
+            elif day.weekday() == 0 and day + timedelta(days=6) <= end:
+                last = day + timedelta(days=6)
+                plan[self._week(day)] = self._days(day, last, 7)
+            else:
+                last = day
+                plan[day.isoformat()] = [day.isoformat()]
+            day = last + timedelta(days=1)
+        return plan
+
+    async def _load(self, periods: List[str], scope: str) -> Dict[str, HyperLogLog]:
+        sketches = {}
+        cursor = self._collection.find({'_id': {'$in': [self._bucket_id(period, scope) for period in periods]}})
+        async for doc in cursor:
+            if doc.get("precision") == self._precision:
+                sketches[doc["_id"].split(":", 1)[0]] = HyperLogLog(self._precision, bytes(doc["registers"]))
+        return sketches
+
+    def start(self) -> None:
+        if self._worker_task is None:
+            self._worker_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker_task:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
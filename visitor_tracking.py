@@ -0,0 +1,445 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class VisitorWriteBehindBuffer:
+    """Collects unseen visitors in RAM and persists them as a single unordered bulk upsert.
+
+    A flush is triggered either when `max_batch` visitors are pending or every
+    `flush_interval` seconds, whichever comes first. The number of genuinely new
+    visitors is derived from the bulk result and reported through `on_new_visitors`.
+    Failed writes are retried on the next flush; at most `max_pending` records are
+    kept while the database is unreachable, and new-visitor counts whose counter
+    update failed are carried over rather than lost.
+
+    Visitors a Bloom filter claims to know are handed to `enqueue_probable` instead and
+    written on a slower cadence, every `probable_interval` seconds, with the same upsert.
+    For a real returning visitor that only moves `last_seen`; a filter false positive is
+    inserted and counted like any new visitor. So returning visitors do reach MongoDB,
+    as one batched write per interval rather than one per hit: that is the price of
+    never losing a new visitor to the filter's error rate.
+    """
+
+    def __init__(
+        self,
+        visitors_collection,
+        counter_collection,
+        max_batch: int = 500,
+        flush_interval: float = 2.0,
+        on_new_visitors: Optional[Callable[[int], None]] = None,
+        max_pending: int = 100_000,
+        probable_interval: float = 300.0,
+    ):
+        self._visitors = visitors_collection
+        self._counters = counter_collection
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._on_new_visitors = on_new_visitors
+        self._max_pending = max_pending
+
+        self._pending = {}
+        self._probable = {}
+        self._probable_interval = probable_interval
+        self._next_probable_flush = time.monotonic() + probable_interval
+        self._uncounted = 0
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._worker_task: Optional[asyncio.Task] = None
+
+        self._flushes = 0
+        self._flushed_records = 0
+        self._failed_flushes = 0
+        self._dropped_records = 0
+        self._false_positives = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._max_queue_depth = 0
+
+    @staticmethod
+    def _record(queue: dict, uuid: str, ip_address: str, user_agent: str) -> None:
+        now = datetime.utcnow()
+        record = queue.get(uuid)
+        if record:
+            # Repeated hits inside one flush window only move last_seen forward
+            record["last_seen"] = now
+        else:
+            queue[uuid] = {
+                "first_seen": now,
+                "last_seen": now,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+            }
+
+    def enqueue_probable(self, uuid: str, ip_address: str, user_agent: str) -> None:
+        """Queues a visitor that is probably stored already; only its `last_seen` is likely to change."""
+        if uuid in self._pending:
+            return
+        if uuid not in self._probable and len(self._probable) >= self._max_pending:
+            self._dropped_records += 1
+            return
+        self._record(self._probable, uuid, ip_address, user_agent)
+
+    def enqueue(self, uuid: str, ip_address: str, user_agent: str) -> None:
+        self._record(self._pending, uuid, ip_address, user_agent)
+
+        depth = len(self._pending)
+        self._max_queue_depth = max(self._max_queue_depth, depth)
+        if depth >= self._max_batch:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._worker_task is None:
+            self._worker_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the periodic worker and drains everything still buffered."""
+        if self._worker_task:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+        await self.flush(drain=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # flush() handles database errors itself; anything else must not end the worker
+                logger.error(f"Visitor flush worker error: {e}")
+
+    def _requeue(self, batch: dict, error: Exception) -> None:
+        self._failed_flushes += 1
+        logger.error(f"Visitor flush of {len(batch)} records failed, requeueing: {error}")
+        # Re-queue without clobbering records that arrived during the failed write
+        for uuid, record in batch.items():
+            if uuid not in self._pending and len(self._pending) >= self._max_pending:
+                self._dropped_records += 1
+                continue
+            self._pending.setdefault(uuid, record)
+
+    def _credit(self, new_visitors: int) -> None:
+        if new_visitors:
+            self._uncounted += new_visitors
+            if self._on_new_visitors:
+                self._on_new_visitors(new_visitors)
+
+    async def _write_counter(self) -> None:
+        if not self._uncounted:
+            return
+        uncounted, self._uncounted = self._uncounted, 0
+        try:
+            await self._counters.update_one({'_id': 'unique_visitors'}, {'$inc': {'count': uncounted}})
+        except Exception as e:
+            self._uncounted += uncounted
+            logger.error(f"Visitor counter update of {uncounted} failed, retrying next flush: {e}")
+
+    def _take_probable(self, drain: bool) -> dict:
+        if not self._probable:
+            return {}
+        now = time.monotonic()
+        if not drain and now < self._next_probable_flush and len(self._probable) < self._max_batch:
+            return {}
+        self._next_probable_flush = now + self._probable_interval
+        probable, self._probable = self._probable, {}
+        return probable
+
+    async def flush(self, drain: bool = False) -> int:
+        async with self._flush_lock:
+            probable = self._take_probable(drain)
+            if not self._pending and not probable:
+                await self._write_counter()
+                return 0
+
+            batch, self._pending = self._pending, {}
+            for uuid, record in probable.items():
+                batch.setdefault(uuid, record)
+            operations = [
+                UpdateOne(
+                    {'_id': uuid},
+                    {
+                        '$setOnInsert': {
+                            '_id': uuid,
+                            'first_seen': record["first_seen"],
+                            'ip_address': record["ip_address"],
+                            'user_agent': record["user_agent"],
+                        },
+                        '$set': {'last_seen': record["last_seen"]},
+                    },
+                    upsert=True,
+                )
+                for uuid, record in batch.items()
+            ]
+
+            started = time.perf_counter()
+            try:
+                result = await self._visitors.bulk_write(operations, ordered=False)
+                new_visitors = result.upserted_count
+                if probable:
+                    uuids = list(batch)
+                    self._false_positives += sum(1 for index in result.upserted_ids if uuids[index] in probable)
+            except BulkWriteError as e:
+                # Another worker upserted the same UUID first; the loser's duplicate key is a match, not a failure
+                new_visitors = e.details.get('nUpserted', 0)
+                if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                    # Upserts that did land become plain matches on retry, so count them now
+                    self._credit(new_visitors)
+                    await self._write_counter()
+                    self._requeue(batch, e)
+                    return new_visitors
+            except Exception as e:
+                self._requeue(batch, e)
+                return 0
+
+            self._credit(new_visitors)
+            await self._write_counter()
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._flushes += 1
+            self._flushed_records += len(batch)
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            return new_visitors
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": len(self._pending),
+            "max_queue_depth": self._max_queue_depth,
+            "flushes": self._flushes,
+            "failed_flushes": self._failed_flushes,
+            "dropped_records": self._dropped_records,
+            "probable_queue_depth": len(self._probable),
+            "filter_false_positives": self._false_positives,
+            "uncounted_visitors": self._uncounted,
+            "flushed_records": self._flushed_records,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "max_flush_ms": round(self._max_flush_ms, 2),
+        }
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: no false negatives, tunable false-positive rate."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Bloom filter needs a positive capacity and an error rate in (0, 1)")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        # Kirsch-Mitzenmacher double hashing: k positions from two base hashes
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Sets the key's bits and returns True if the key was (probably) not present before."""
+        added = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def merge(self, other: "BloomFilter") -> None:
+        """Adds every key of a filter with the same geometry."""
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(other.bits, "little")
+        self.bits = bytearray(merged.to_bytes(len(self.bits), "little"))
+        # Overlapping inserts can't be told apart, so re-estimate the count from the fill ratio
+        filled = min(merged.bit_count(), self.num_bits - 1)
+        self.count = round(-self.num_bits / self.num_hashes * math.log(1 - filled / self.num_bits))
+
+    def to_document(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "count": self.count,
+            "bits": bytes(self.bits),
+        }
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "BloomFilter":
+        bloom = cls(doc["capacity"], doc["error_rate"])
+        if bloom.num_bits != doc["num_bits"] or bloom.num_hashes != doc["num_hashes"]:
+            raise ValueError("Bloom filter snapshot geometry does not match its parameters")
+        bits = bytes(doc["bits"])
+        if len(bits) != len(bloom.bits):
+            raise ValueError("Bloom filter snapshot is truncated")
+        bloom.bits = bytearray(bits)
+        bloom.count = doc.get("count", 0)
+        return bloom
+
+
+class PersistentVisitorFilter:
+    """Bloom filter of every visitor UUID ever tracked, snapshotted into MongoDB.
+
+    On load the latest snapshot is restored; if none exists (or the configured
+    capacity/error rate changed) the filter is rebuilt once from the visitors
+    collection in the background, so startup does not wait on a full scan. Until
+    the rebuild finishes, returning visitors it has not reached yet are simply
+    written again, which the upsert turns into a match rather than a new count.
+    Workers share one snapshot: each save ORs the stored bits in first and is
+    conditional on the version it read, so no worker's visitors are overwritten.
+    """
+
+    SNAPSHOT_ID = 'visitor_filter'
+    CAS_ATTEMPTS = 5
+
+    def __init__(
+        self,
+        visitors_collection,
+        snapshot_collection,
+        capacity: int = 2_000_000,
+        error_rate: float = 0.001,
+        snapshot_interval: float = 300.0,
+    ):
+        self._visitors = visitors_collection
+        self._snapshots = snapshot_collection
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._snapshot_interval = snapshot_interval
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._dirty = False
+        self._worker_task: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Only a filter covering the whole history may be snapshotted, or a restart would trust a partial one
+        self._complete = False
+
+    @property
+    def rebuilding(self) -> bool:
+        return self._rebuild_task is not None and not self._rebuild_task.done()
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid in self._bloom
+
+    def add(self, uuid: str) -> None:
+        if self._bloom.add(uuid):
+            self._dirty = True
+
+    async def load(self) -> None:
+        doc = await self._snapshots.find_one({'_id': self.SNAPSHOT_ID})
+        if doc and doc.get("capacity") == self._capacity and doc.get("error_rate") == self._error_rate:
+            try:
+                self._bloom.merge(BloomFilter.from_document(doc))
+                self._complete = True
+                logger.info(f"Restored visitor filter snapshot with ~{self._bloom.count} visitors")
+                return
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Discarding unusable visitor filter snapshot: {e}")
+
+        if not self.rebuilding:
+            self._rebuild_task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self) -> None:
+        logger.info("Rebuilding visitor filter from the visitors collection...")
+        try:
+            bloom = BloomFilter(self._capacity, self._error_rate)
+            async for visitor in self._visitors.find({}, {'_id': 1}):
+                bloom.add(str(visitor['_id']))
+            # Keep anything tracked while the rebuild was running
+            bloom.merge(self._bloom)
+            self._bloom = bloom
+            self._complete = True
+            self._dirty = True
+            logger.info(f"Visitor filter rebuilt with {bloom.count} visitors")
+            await self.snapshot()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Visitor filter rebuild failed, continuing with recent visitors only: {e}")
+
+    async def snapshot(self) -> None:
+        if not self._dirty or not self._complete:
+            return
+        self._dirty = False
+        try:
+            await self._save_merged()
+        except Exception:
+            self._dirty = True
+            raise
+
+    async def _save_merged(self) -> None:
+        for _ in range(self.CAS_ATTEMPTS):
+            doc = await self._snapshots.find_one({'_id': self.SNAPSHOT_ID})
+            if doc and doc.get("capacity") == self._capacity and doc.get("error_rate") == self._error_rate:
+                try:
+                    self._bloom.merge(BloomFilter.from_document(doc))
+                except (KeyError, ValueError):
+                    pass
+            fields = {'saved_at': datetime.utcnow(), **self._bloom.to_document()}
+            if doc is None:
+                try:
+                    await self._snapshots.insert_one({'_id': self.SNAPSHOT_ID, 'version': 1, **fields})
+                    return
+                except DuplicateKeyError:
+                    continue
+            # Snapshots saved before versioning have no field; {'version': None} matches those too
+            result = await self._snapshots.update_one(
+                {'_id': self.SNAPSHOT_ID, 'version': doc.get('version')},
+                {'$set': {**fields, 'version': (doc.get('version') or 0) + 1}},
+            )
+            if result.matched_count:
+                return
+        raise RuntimeError("visitor filter snapshot kept changing under concurrent writers")
+
+    def start(self) -> None:
+        if self._worker_task is None:
+            self._worker_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._rebuild_task, self._worker_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._rebuild_task = self._worker_task = None
+        await self.snapshot()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._snapshot_interval)
+            try:
+                await self.snapshot()
+            except Exception as e:
+                logger.error(f"Failed to snapshot visitor filter: {e}")
+
+    def metrics(self) -> dict:
+        return {
+            "approximate_visitors": self._bloom.count,
+            "capacity": self._capacity,
+            "error_rate": self._error_rate,
+            "size_bytes": len(self._bloom.bits),
+            "rebuilding": self.rebuilding,
+        }
@@ -6,12 +6,33 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse
 from playwright.async_api import async_playwright
 
+try:
+    from shared_state import shared_state as hub_shared_state
+except ImportError:
+    hub_shared_state = None
+
 router = APIRouter()
 
+# Browser handles can't leave this process; only the capacity cap is shared across hub workers
 active_sessions = {}
 MAX_SESSIONS = 10
+SESSION_POOL = "yellow_mirror:sessions"
+SESSION_SLOT_TTL = 6 * 3600
 BASE_DIR = Path(__file__).parent
 
+
+def _slot_holder(client_id: str) -> str:
+    return f"{os.getpid()}:{client_id}"
+
+
+async def _reserve_session(client_id: str) -> bool:
+    if hub_shared_state is None:
+        return len(active_sessions) < MAX_SESSIONS
+    try:
+        return await hub_shared_state.acquire_slot(SESSION_POOL, _slot_holder(client_id), MAX_SESSIONS, SESSION_SLOT_TTL)
+    except Exception:
+        return len(active_sessions) < MAX_SESSIONS
+
 @router.get("/")
 async def yellow_mirror_page():
     return FileResponse(BASE_DIR / "yellow-mirror.html")
@@ -20,7 +41,7 @@ async def yellow_mirror_page():
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket.accept()
 
-    if len(active_sessions) >= MAX_SESSIONS:
+    if not await _reserve_session(client_id):
         await websocket.send_json({"type": "error", "message": "Server at maximum capacity (10)."})
         await websocket.close()
         return
@@ -38,6 +59,9 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
             data = await websocket.receive_json()
             await handle_client_message(client_id, data)
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Errors other than a disconnect (bad message, browser crash) must free the shared slot too
         await cleanup_session(client_id)
 
 async def handle_client_message(client_id: str, data: dict):
@@ -144,6 +168,9 @@ async def handle_client_message(client_id: str, data: dict):
 async def cleanup_session(client_id: str):
     session = active_sessions.pop(client_id, None)
     if session:
+        if hub_shared_state is not None:
+            try: await hub_shared_state.release_slot(SESSION_POOL, _slot_holder(client_id))
+            except: pass
         if session.get("context"):
             try: await session["context"].close()
             except: pass